@@ -3,12 +3,15 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import random
 import unittest
 
 import isolation
 import game_agent
+import sample_players
 
 from importlib import reload
+from testutils import random_game, random_position
 
 class IsolationTest(unittest.TestCase):
     """Unit tests for isolation agents"""
@@ -44,6 +47,206 @@ class IsolationTest(unittest.TestCase):
 
 
 
+class InPlaceSearchTest(unittest.TestCase):
+    """Check that searching with apply_move/undo_move visits exactly the same
+    nodes as searching with forecast_move"""
+
+    def search_trace(self, player_cls, search, depth, in_place, seed):
+        """Return the chosen move and the sequence of (position, score) pairs
+        evaluated by a fixed-depth search from a seeded random position."""
+        trace = []
+
+        def traced_score(game, player):
+            score = sample_players.improved_score(game, player)
+            trace.append((game.to_string(), score))
+            return score
+
+        player1 = player_cls(score_fn=traced_score, in_place=in_place)
+        player2 = player_cls(score_fn=traced_score, in_place=in_place)
+        player1.time_left = lambda: float("inf")
+        game = random_game(isolation.Board, seed, 4, player_1=player1,
+                           player_2=player2)
+        before = game.to_string()
+
+        random.seed(seed)
+        move = getattr(player1, search)(game, depth)
+        self.assertEqual(game.to_string(), before)
+        return move, trace
+
+    def check_identical(self, player_cls, search, depth):
+        for seed in range(5):
+            copying = self.search_trace(player_cls, search, depth, False, seed)
+            in_place = self.search_trace(player_cls, search, depth, True, seed)
+            self.assertTrue(copying[1])
+            self.assertEqual(copying, in_place)
+
+    def test_minimax_in_place(self):
+        self.check_identical(game_agent.MinimaxPlayer, "minimax", 3)
+
+    def test_alphabeta_in_place(self):
+        self.check_identical(game_agent.AlphaBetaPlayer, "alphabeta", 4)
+
+
+def minimax_value(game, player, depth):
+    """Reference fixed-depth minimax value of game for player"""
+    moves = game.get_legal_moves()
+    if not moves or depth == 0:
+        return sample_players.improved_score(game, player)
+    values = [minimax_value(game.forecast_move(m), player, depth - 1)
+              for m in moves]
+    return max(values) if game.active_player == player else min(values)
+
+
+class TranspositionTableSearchTest(unittest.TestCase):
+    """Check that the transposition table does not change search results"""
+
+    def test_deepening_with_table_finds_best_move(self):
+        for seed in range(5):
+            player = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score, tt_mb=1)
+            player.time_left = lambda: float("inf")
+            game = random_position(player, seed, 6)
+            player.new_search(game)
+            for depth in range(1, 5):
+                move = player.alphabeta(game, depth)
+                best = max(minimax_value(game.forecast_move(m), player, depth - 1)
+                           for m in game.get_legal_moves())
+                self.assertEqual(
+                    minimax_value(game.forecast_move(move), player, depth - 1),
+                    best)
+            self.assertGreater(player.tt.stats()["hits"], 0)
+
+    def test_table_is_cleared_when_switching_sides(self):
+        player = game_agent.AlphaBetaPlayer(tt_mb=1)
+        game = isolation.Board(player, "Player2")
+        game.apply_move((3, 3))
+        game.apply_move((2, 5))
+        player.new_search(game)
+        player.time_left = lambda: float("inf")
+        player.alphabeta(game, 3)
+        self.assertGreater(len(player.tt), 0)
+        game.apply_move(game.get_legal_moves()[0])
+        player.new_search(game)
+        self.assertEqual(len(player.tt), 0)
+
+
+class MoveOrderingSearchTest(unittest.TestCase):
+    """Check that move ordering only changes the number of nodes searched"""
+
+    def test_orderings_find_best_move(self):
+        nodes = {}
+        for ordering in ("none", "history"):
+            nodes[ordering] = 0
+            for seed in range(3):
+                player = game_agent.AlphaBetaPlayer(
+                    score_fn=sample_players.improved_score, tt_mb=1,
+                    ordering=ordering)
+                player.time_left = lambda: float("inf")
+                game = random_position(player, seed, 6)
+                random.seed(seed)
+                player.new_search(game)
+                for depth in range(1, 5):
+                    move = player.alphabeta(game, depth)
+                best = max(minimax_value(game.forecast_move(m), player, 3)
+                           for m in game.get_legal_moves())
+                self.assertEqual(
+                    minimax_value(game.forecast_move(move), player, 3), best)
+                nodes[ordering] += player.nodes
+        self.assertLess(nodes["history"], nodes["none"])
+
+
+class PrincipalVariationTest(unittest.TestCase):
+    """Check the principal variation and aspiration windows of the search"""
+
+    def deepen(self, player, seed, max_depth=4):
+        game = random_position(player, seed, 6)
+        player.time_left = lambda: float("inf")
+        player.new_search(game)
+        for depth in range(1, max_depth + 1):
+            move = player.aspiration_search(game, depth)
+            player.pv, player.pv_score = player.last_pv, player.last_score
+        return game, move
+
+    def test_pv_is_a_legal_line_with_the_root_score(self):
+        for seed in range(5):
+            player = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score)
+            game, move = self.deepen(player, seed)
+            self.assertEqual(player.pv[0], move)
+            line = game.copy()
+            for pv_move in player.pv:
+                self.assertIn(pv_move, line.get_legal_moves())
+                line.apply_move(pv_move)
+            self.assertEqual(player.pv_score, minimax_value(game, player, 4))
+            if len(player.pv) == 4:
+                self.assertEqual(player.pv_score,
+                                 sample_players.improved_score(line, player))
+
+    def test_aspiration_windows_keep_the_score(self):
+        researches = 0
+        for seed in range(5):
+            plain = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score, tt_mb=1)
+            narrow = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score, tt_mb=1,
+                aspiration=0.5)
+            self.deepen(plain, seed)
+            self.deepen(narrow, seed)
+            self.assertEqual(plain.pv_score, narrow.pv_score)
+            researches += narrow.research_count
+        self.assertGreater(researches, 0)
+
+
+class NegamaxSearchTest(unittest.TestCase):
+    """Check the negamax core, principal variation search and late move
+    reductions of AlphaBetaPlayer"""
+
+    def deepen(self, seed, max_depth=5, **options):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, **options)
+        game = random_position(player, seed, 6)
+        player.time_left = lambda: float("inf")
+        player.new_search(game)
+        random.seed(seed)
+        nodes = []
+        for depth in range(1, max_depth + 1):
+            move = player.alphabeta(game, depth)
+            player.pv, player.pv_score = player.last_pv, player.last_score
+            nodes.append(player.nodes)
+        return player, game, move, nodes
+
+    def test_negamax_searches_the_same_tree(self):
+        for seed in range(4):
+            for options in ({}, {"tt_mb": 1}):
+                plain = self.deepen(seed, **options)
+                core = self.deepen(seed, negamax=True, **options)
+                self.assertEqual(plain[2], core[2])
+                self.assertEqual(plain[3], core[3])
+                self.assertEqual(plain[0].pv, core[0].pv)
+                self.assertEqual(plain[0].pv_score, core[0].pv_score)
+
+    def test_pvs_keeps_the_score(self):
+        researches = 0
+        for seed in range(4):
+            player, game, move, _ = self.deepen(seed, pvs=True)
+            self.assertEqual(player.pv_score, minimax_value(game, player, 5))
+            self.assertEqual(player.pv[0], move)
+            researches += player.scout_researches
+        self.assertGreater(researches, 0)
+
+    def test_late_move_reductions(self):
+        for options in ({"lmr": 1}, {"lmr": 1, "pvs": True}):
+            nodes, reduced = 0, 0
+            for seed in range(4):
+                player, game, move, searched = self.deepen(seed, max_depth=6)
+                nodes += searched[-1]
+                player, game, move, searched = self.deepen(seed, max_depth=6,
+                                                           **options)
+                self.assertIn(move, game.get_legal_moves())
+                reduced += searched[-1]
+            self.assertLess(reduced, nodes)
+            self.assertTrue(player.negamax)
+
 
 if __name__ == '__main__':
     unittest.main()
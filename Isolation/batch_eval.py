@@ -0,0 +1,396 @@
+"""Vectorised evaluation of Isolation leaf positions with numpy.
+
+At the frontier of an alpha-beta search (one ply above the leaves) the
+scalar path applies every move, generates the legal moves of the child,
+calls the score function and takes the move back again. The children of a
+frontier node only differ from it by one cell and one player location, so
+their features can be computed together: `LeafEvaluator` turns a batch of
+positions into arrays (an open-cell matrix and the cell of each player) and
+computes the mobility and distance features of `improved_score`,
+`open_move_score`, `center_score` and `custom_score` in one vectorised pass.
+The scores are the same as the scalar ones, up to the rounding of the sums
+of distances of `custom_score`.
+
+`batch_version(score_fn)` returns the batch equivalent of a score function,
+`fn(game, moves, player)` returning the scores of the children reached by
+`moves` (cell indices) from `game`, or None when there is none or numpy is
+not installed. `AlphaBetaPlayer(batch_eval=True)` uses it at the frontier
+nodes with at least `BATCH_MIN` children.
+
+numpy has a fixed cost per call that a batch of 8 children (the most a
+knight has) does not always repay: run `python batch_eval.py` to measure
+the time per position of both paths for growing batch sizes and find the
+crossover point on a given machine, and to compare fixed-depth searches with
+and without batches. A batch scores every child of a node, while the scalar
+search stops at the first child that causes a cutoff, so the search gains
+less than the crossover tables suggest.
+"""
+import argparse
+import random
+import timeit
+
+try:
+    import numpy as np
+except ImportError:  # only the scalar score functions are available
+    np = None
+
+from isolation.isolation import neighbor_table
+
+# Fewest children of a frontier node for which the batch version of each
+# score function beats the scalar one, as measured by `python batch_eval.py`
+BATCH_MIN = {"custom_score": 4, "improved_score": 6, "open_move_score": 6,
+             "center_score": 6}
+BENCH_SIZES = [1, 2, 3, 4, 5, 6, 7, 8, 16, 32, 64, 128, 256, 512]
+BENCH_NODES = 1000  # frontier nodes of the crossover benchmark
+BENCH_MIN_SECONDS = .2  # shortest timing of one batch size
+SEARCH_DEPTH = 7  # iterative deepening depth of the search comparison
+SEARCH_PLIES = 6  # random moves played before the searched positions
+SEARCH_SEEDS = range(5)
+
+_EVALUATORS = {}
+
+
+class LeafEvaluator(object):
+    """Tables of one board size for the vectorised score functions.
+
+    Positions are given as arrays with one row per position:
+
+    open_cells : bool array (positions, cells + 1)
+        True for the open cells; the extra last column is always False and
+        pads the knight moves that leave the board.
+
+    own, opp : int arrays (positions,)
+        The cell indices of the player the position is scored for and of
+        the opponent; both players must be on the board.
+
+    own_to_move : bool or bool array
+        Whether the player the position is scored for is the one to move.
+    """
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.cells = width * height
+        table = neighbor_table(width, height)
+        # knight neighbors of every cell, padded with the always closed cell
+        self.neighbors = np.full((self.cells + 1, 8), self.cells, np.intp)
+        for idx, neighbors in enumerate(table):
+            self.neighbors[idx, :len(neighbors)] = neighbors
+        self.rows = np.array([idx % height for idx in range(self.cells)] +
+                             [0], float)
+        self.cols = np.array([idx // height for idx in range(self.cells)] +
+                             [0], float)
+        self.mask_bytes = self.cells // 8 + 1
+        # distance between every pair of cells, and from the centre as
+        # measured by center_score
+        self.dist = np.sqrt((self.rows[:, None] - self.rows[None, :])**2 +
+                            (self.cols[:, None] - self.cols[None, :])**2)
+        self.center = ((height / 2. - self.rows)**2 +
+                       (width / 2. - self.cols)**2)
+
+    def open_cells(self, masks):
+        """Return the open-cell rows of positions given their blocked masks
+        (see `Board.blocked_mask()`).
+        """
+        # the sentinel cell is blocked in every mask
+        sentinel = 1 << self.cells
+        raw = b"".join((mask | sentinel).to_bytes(self.mask_bytes, "little")
+                       for mask in masks)
+        bits = np.unpackbits(np.frombuffer(raw, np.uint8).reshape(
+            len(masks), self.mask_bytes), axis=1, bitorder="little")
+        return bits[:, :self.cells + 1] == 0
+
+    def _moves(self, open_cells, cells, rows):
+        """Return the knight neighbors of `cells` and which of them are open,
+        as two (positions, 8) arrays.
+        """
+        neighbors = self.neighbors[cells]
+        return neighbors, open_cells[rows, neighbors]
+
+    def _mean_distance(self, neighbors, is_open, counts, cells):
+        """Return the mean distance from the open neighbors of each position
+        to the matching cell of `cells`, or 0 when there are none.
+        """
+        dist = np.sqrt((self.rows[neighbors] - self.rows[cells][:, None])**2 +
+                       (self.cols[neighbors] - self.cols[cells][:, None])**2)
+        return (dist * is_open).sum(axis=1) / np.maximum(counts, 1)
+
+    def score(self, name, open_cells, own, opp, own_to_move):
+        """Return the scores of the positions for the score function `name`
+        ("improved_score", "open_move_score", "center_score" or
+        "custom_score") as a float array.
+        """
+        rows = np.arange(len(own))[:, None]
+        own_nb, own_open = self._moves(open_cells, own, rows)
+        own_moves = own_open.sum(axis=1)
+        opp_nb, opp_open = self._moves(open_cells, opp, rows)
+        opp_moves = opp_open.sum(axis=1)
+
+        if name == "improved_score":
+            scores = (own_moves - opp_moves).astype(float)
+        elif name == "open_move_score":
+            scores = own_moves.astype(float)
+        elif name == "center_score":
+            scores = self.center[own]
+        elif name == "custom_score":
+            scores = (self._mean_distance(own_nb, own_open, own_moves, opp) -
+                      self._mean_distance(opp_nb, opp_open, opp_moves, own))
+        else:
+            raise ValueError("No batch version of {}".format(name))
+
+        # the player to move loses when it has no move left
+        own_to_move = np.broadcast_to(own_to_move, own_moves.shape)
+        done = np.where(own_to_move, own_moves, opp_moves) == 0
+        scores[done] = np.where(own_to_move[done], float("-inf"),
+                                float("inf"))
+        return scores
+
+    def score_children(self, name, game, moves, player):
+        """Return the scores for `player` of the children of `game` reached
+        by the cell indices `moves`, as a float array. The player that is not
+        to move in `game` must already be on the board.
+
+        This computes the same scores as `score_nodes()` for a single node,
+        from the open cells of `game` alone: a child only blocks the cell
+        the player to move jumps to, so that player has the open neighbors
+        of the cell in `game`, and the waiting player loses the cell if it
+        was one of its moves.
+        """
+        open_cells = self.open_cells([game.blocked_mask()])[0]
+        children = np.array(moves, np.intp)
+        neighbors = self.neighbors[children]
+        is_open = open_cells[neighbors]
+        mover_moves = is_open.sum(axis=1)
+        waiting = game.move_to_index(
+            game.get_player_location(game.inactive_player))
+        waiting_cells = self.neighbors[waiting][open_cells[
+            self.neighbors[waiting]]]
+        is_waiting_cell = np.zeros(self.cells + 1, bool)
+        is_waiting_cell[waiting_cells] = True
+        waiting_moves = len(waiting_cells) - is_waiting_cell[children]
+        mover = game.active_player == player
+
+        if name == "improved_score":
+            scores = (mover_moves - waiting_moves if mover else
+                      waiting_moves - mover_moves).astype(float)
+        elif name == "open_move_score":
+            scores = (mover_moves if mover else waiting_moves).astype(float)
+        elif name == "center_score":
+            scores = (self.center[children] if mover else
+                      np.full(len(children), self.center[waiting]))
+        elif name == "custom_score":
+            # a child is at distance 0 from itself, so the sum over the
+            # moves of the waiting player needs no correction
+            mover_dist = ((self.dist[neighbors, waiting] * is_open)
+                          .sum(axis=1) / np.maximum(mover_moves, 1))
+            waiting_dist = (self.dist[children][:, waiting_cells].sum(axis=1) /
+                            np.maximum(waiting_moves, 1))
+            scores = (mover_dist - waiting_dist if mover else
+                      waiting_dist - mover_dist)
+        else:
+            raise ValueError("No batch version of {}".format(name))
+
+        # the waiting player is to move in the children
+        scores[waiting_moves == 0] = float("inf") if mover else float("-inf")
+        return scores
+
+    def score_nodes(self, name, nodes, player):
+        """Return the scores for `player` of the children of a list of
+        (game, moves) frontier nodes, where `moves` are the cell indices of
+        the children to score, as one float array in node order. The player
+        that is not to move in each game must already be on the board.
+        """
+        counts = [len(moves) for _, moves in nodes]
+        parents = self.open_cells([game.blocked_mask() for game, _ in nodes])
+        open_cells = np.repeat(parents, counts, axis=0)
+        children = np.fromiter((move for _, moves in nodes for move in moves),
+                               np.intp, sum(counts))
+        open_cells[np.arange(len(children)), children] = False
+        waiting = np.repeat([game.move_to_index(
+            game.get_player_location(game.inactive_player))
+            for game, _ in nodes], counts)
+        # in the children the player that waited is to move
+        to_move = np.repeat([game.active_player != player
+                             for game, _ in nodes], counts)
+        own = np.where(to_move, waiting, children)
+        opp = np.where(to_move, children, waiting)
+        return self.score(name, open_cells, own, opp, to_move)
+
+
+def evaluator(width, height):
+    """Return the `LeafEvaluator` of a board size, built on first use. """
+    key = (width, height)
+    leaf = _EVALUATORS.get(key)
+    if leaf is None:
+        leaf = _EVALUATORS[key] = LeafEvaluator(width, height)
+    return leaf
+
+
+# Score functions with a batch version, by module and name
+BATCH_SCORES = {("game_agent", "custom_score"): "custom_score",
+                ("sample_players", "improved_score"): "improved_score",
+                ("sample_players", "open_move_score"): "open_move_score",
+                ("sample_players", "center_score"): "center_score"}
+
+
+def batch_version(score_fn):
+    """Return the batch version `fn(game, moves, player)` of `score_fn`, or
+    None if numpy is not installed or `score_fn` has no batch version.
+    Positions whose waiting player is not on the board yet are scored with
+    `score_fn`.
+    """
+    name = BATCH_SCORES.get((getattr(score_fn, "__module__", None),
+                             getattr(score_fn, "__name__", None)))
+    if np is None or name is None:
+        return None
+
+    def batch_score(game, moves, player):
+        if game.get_player_location(game.inactive_player) is None:
+            return [score_fn(game.forecast_index(move), player)
+                    for move in moves]
+        return evaluator(game.width, game.height).score_children(
+            name, game, moves, player).tolist()
+    batch_score.__name__ = name
+    batch_score.batch_min = BATCH_MIN[name]
+    return batch_score
+
+
+def frontier_nodes(count, seed=0):
+    """Return `count` (game, moves) pairs of random positions on a 7x7 board
+    with the legal moves of the player to move.
+    """
+    from isolation import Board
+    rng = random.Random(seed)
+    nodes = []
+    while len(nodes) < count:
+        game = Board("Player1", "Player2")
+        for _ in range(rng.randint(2, 30)):
+            moves = game.get_legal_indices()
+            if not moves:
+                break
+            game.apply_index(rng.choice(moves))
+        moves = game.get_legal_indices()
+        if moves and game.move_count >= 2:
+            nodes.append((game, moves))
+    return nodes
+
+
+def crossover(score_fn, sizes=BENCH_SIZES, nodes=BENCH_NODES):
+    """Return a list of (batch size, scalar us, batch us) rows with the
+    microseconds spent per leaf by the scalar and the batch evaluation of
+    the same leaves. Batches of up to 8 leaves hold the children of one
+    frontier node with that many moves, the way the search uses them;
+    larger batches hold the children of consecutive frontier nodes.
+    """
+    name = batch_version(score_fn).__name__
+    leaf = evaluator(7, 7)
+    frontier = frontier_nodes(nodes)
+    rows = []
+    for size in sizes:
+        if size <= 8:
+            batches = [[node] for node in frontier if len(node[1]) == size]
+        else:
+            batches, batch, leaves = [], [], 0
+            for node in frontier:
+                batch.append(node)
+                leaves += len(node[1])
+                if leaves >= size:
+                    batches.append(batch)
+                    batch, leaves = [], 0
+        total = sum(len(moves) for batch in batches for _, moves in batch)
+        if not total:
+            continue
+
+        def scalar():
+            for batch in batches:
+                for game, moves in batch:
+                    for move in moves:
+                        game.apply_index(move)
+                        score_fn(game, "Player1")
+                        game.undo_move()
+
+        def vectorised():
+            for batch in batches:
+                if size <= 8:
+                    leaf.score_children(name, batch[0][0], batch[0][1],
+                                        "Player1")
+                else:
+                    leaf.score_nodes(name, batch, "Player1")
+
+        times = []
+        for fn in (scalar, vectorised):
+            calls, elapsed = 0, 0.
+            while elapsed < BENCH_MIN_SECONDS:
+                start = timeit.default_timer()
+                fn()
+                elapsed += timeit.default_timer() - start
+                calls += 1
+            times.append(1e6 * elapsed / calls / total)
+        rows.append((size, times[0], times[1]))
+    return rows
+
+
+def search_run(score_fn, batch_eval, depth=SEARCH_DEPTH, seeds=SEARCH_SEEDS):
+    """Return the nodes and seconds of iterative deepening alpha-beta
+    searches to `depth` of fixed midgame positions, with or without batch
+    evaluation at the frontier nodes, and the root scores found.
+    """
+    from isolation import Board
+    from game_agent import AlphaBetaPlayer
+    nodes, elapsed, scores = 0, 0., []
+    for seed in seeds:
+        player = AlphaBetaPlayer(score_fn=score_fn, batch_eval=batch_eval)
+        player.time_left = lambda: float("inf")
+        rng = random.Random(seed)
+        game = Board(player, "Opponent")
+        for _ in range(SEARCH_PLIES):
+            game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+        random.seed(seed)
+        start = timeit.default_timer()
+        player.new_search(game)
+        for d in range(1, depth + 1):
+            player.alphabeta(game, d)
+        elapsed += timeit.default_timer() - start
+        nodes += player.nodes
+        scores.append(player.last_score)
+    return nodes, elapsed, scores
+
+
+def main():
+    from game_agent import custom_score
+    from sample_players import improved_score, center_score
+    fns = {fn.__name__: fn for fn in (custom_score, improved_score,
+                                      center_score)}
+    parser = argparse.ArgumentParser(
+        description="Find the batch size from which the numpy evaluation "
+                    "of leaf positions beats the scalar score functions")
+    parser.add_argument("scores", nargs="*",
+                        help="score functions to time, among {} (default: "
+                             "all)".format(", ".join(sorted(fns))))
+    args = parser.parse_args()
+    unknown = sorted(set(args.scores) - set(fns))
+    if unknown:
+        parser.error("unknown score functions: {}".format(", ".join(unknown)))
+    if np is None:
+        parser.error("numpy is not installed")
+    for name in args.scores or sorted(fns):
+        print("\n[{}]".format(name))
+        print("{:>6}{:>14}{:>14}{:>10}".format(
+            "Batch", "Scalar us", "Batch us", "Speedup"))
+        print("-" * 44)
+        for size, scalar, batch in crossover(fns[name]):
+            print("{:>6}{:>14.2f}{:>14.2f}{:>9.2f}x".format(
+                size, scalar, batch, scalar / batch))
+        print("\nSearch to depth {} of {} positions".format(
+            SEARCH_DEPTH, len(SEARCH_SEEDS)))
+        print("{:>6}{:>10}{:>10}{:>12}".format(
+            "Batch", "Nodes", "Seconds", "Nodes/sec"))
+        print("-" * 38)
+        for batch_eval in (False, True):
+            nodes, elapsed, _ = search_run(fns[name], batch_eval)
+            print("{:>6}{:>10}{:>10.3f}{:>12.0f}".format(
+                "yes" if batch_eval else "no", nodes, elapsed,
+                nodes / elapsed))
+
+
+if __name__ == "__main__":
+    main()
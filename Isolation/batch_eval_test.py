@@ -0,0 +1,113 @@
+"""Unit tests for the vectorised evaluation of leaf positions."""
+
+import random
+import unittest
+
+import isolation
+import batch_eval
+
+from batch_eval import batch_version, evaluator, frontier_nodes, np
+from game_agent import AlphaBetaPlayer, custom_score, custom_score_2
+from sample_players import (improved_score, open_move_score, center_score)
+from testutils import random_position
+
+SCORE_FNS = [custom_score, improved_score, open_move_score, center_score]
+
+
+def scalar_scores(score_fn, game, moves, player):
+    scores = []
+    for move in moves:
+        game.apply_index(move)
+        scores.append(score_fn(game, player))
+        game.undo_move()
+    return scores
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class LeafEvaluatorTest(unittest.TestCase):
+
+    def assertScoresEqual(self, scores, expected):
+        self.assertEqual(len(scores), len(expected))
+        for score, value in zip(scores, expected):
+            # the sums of distances of custom_score are rounded differently
+            self.assertAlmostEqual(score, value, places=9)
+
+    def test_children_match_scalar_scores(self):
+        nodes = frontier_nodes(60, seed=1)
+        for score_fn in SCORE_FNS:
+            name = score_fn.__name__
+            leaf = evaluator(7, 7)
+            for player in ("Player1", "Player2"):
+                expected = [scalar_scores(score_fn, game, moves, player)
+                            for game, moves in nodes]
+                for (game, moves), values in zip(nodes, expected):
+                    self.assertScoresEqual(leaf.score_children(
+                        name, game, moves, player).tolist(), values)
+                self.assertScoresEqual(
+                    leaf.score_nodes(name, nodes, player).tolist(),
+                    [value for values in expected for value in values])
+
+    def test_other_board_sizes(self):
+        rng = random.Random(0)
+        for board_cls, width, height in [(isolation.Board, 5, 8),
+                                         (isolation.BitBoard, 9, 9)]:
+            game = board_cls("Player1", "Player2", width, height)
+            while game.get_legal_indices():
+                moves = game.get_legal_indices()
+                if game.move_count >= 1:
+                    for score_fn in SCORE_FNS:
+                        self.assertScoresEqual(
+                            batch_version(score_fn)(game, moves, "Player1"),
+                            scalar_scores(score_fn, game, moves, "Player1"))
+                game.apply_index(rng.choice(moves))
+
+    def test_batch_version(self):
+        self.assertIsNone(batch_version(custom_score_2))
+        self.assertIsNone(batch_version(lambda game, player: 0.))
+        batch_score = batch_version(improved_score)
+        self.assertEqual(batch_score.batch_min,
+                         batch_eval.BATCH_MIN["improved_score"])
+        # the waiting player is not on the board on the first move
+        game = isolation.Board("Player1", "Player2", 5, 5)
+        moves = game.get_legal_indices()
+        self.assertEqual(batch_score(game, moves, "Player1"),
+                         scalar_scores(improved_score, game, moves,
+                                       "Player1"))
+
+    def test_search_scores_are_unchanged(self):
+        for score_fn in (custom_score, improved_score):
+            for seed in range(3):
+                scores = []
+                for batch_eval_on in (False, True):
+                    player = AlphaBetaPlayer(score_fn=score_fn,
+                                             batch_eval=batch_eval_on,
+                                             batch_min=1)
+                    player.time_left = lambda: 1000.
+                    game = random_position(player, seed, 6)
+                    for depth in range(1, 6):
+                        player.alphabeta(game, depth)
+                        scores.append(player.last_score)
+                self.assertScoresEqual(scores[:5], scores[5:])
+
+    def test_every_scored_child_is_counted(self):
+        for seed in range(3):
+            nodes = []
+            for batch_eval_on in (False, True):
+                player = AlphaBetaPlayer(score_fn=improved_score,
+                                         batch_eval=batch_eval_on,
+                                         batch_min=1)
+                player.time_left = lambda: 1000.
+                game = random_position(player, seed, 6)
+                random.seed(seed)
+                player.alphabeta(game, 2)
+                nodes.append(player.nodes)
+            # the scalar search skips the children after a cutoff
+            children = sum(len(game.forecast_move(move).get_legal_moves())
+                           for move in game.get_legal_moves())
+            self.assertEqual(nodes[1], 1 + len(game.get_legal_moves()) +
+                             children)
+            self.assertLessEqual(nodes[0], nodes[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,685 @@
+"""Measure the speed of the Isolation engine.
+
+Usage: python benchmark.py [section ...]   (all sections by default)
+
+boards
+    Every board class plays through the same fixed set of positions, reached
+    by seeded random openings, and reports:
+
+    - tree walk : nodes/second of a full-width walk of the game tree using
+                  `get_legal_moves()` and `forecast_move()`
+    - index walk: the same walk in place, with cell-index moves through
+                  `get_legal_indices()`, `apply_index()` and `undo_move()`
+    - minimax   : leaf evaluations/second of a fixed-depth `MinimaxPlayer`
+                  search using `improved_score` and `forecast_move()`
+    - in place  : the same minimax search walking a single board with
+                  `apply_move()`/`undo_move()` instead of `forecast_move()`
+    - alphabeta : nodes/second of an `AlphaBetaPlayer` iterative deepening
+                  to a fixed depth using `forecast_move()`
+    - ab in place: the same alpha-beta search with `in_place=True`
+
+    The positions are identical across board classes, so the node counts of
+    each row must match (except the alpha-beta rows, whose move order depends
+    on the move generator of the board); only the rates should differ. Each
+    time is the best of BOARDS_REPEAT runs.
+
+tt
+    Plays the same scripted game lines with an `AlphaBetaPlayer` that deepens
+    to a fixed depth on every turn, with and without a transposition table,
+    and reports the nodes searched and the table counters. The player only
+    uses the "hash" move ordering, so the table is the only source of gains.
+
+ordering
+    Plays the same scripted game lines with each named move ordering of
+    `move_ordering.ORDERINGS` (and a transposition table, so the hash move is
+    available) and reports the nodes searched at the same fixed depth.
+
+cache
+    Plays the same scripted game lines with an `AlphaBetaPlayer` using the
+    "history" ordering and a transposition table, with `improved_score`
+    plain and wrapped in `eval_cache.EvalCache` caches of several sizes, and
+    reports the time, node rate and hit rate of each.
+
+records
+    Writes a fixed set of random games to a temporary game record file (see
+    game_records.py) and reports the games/second of writing, reading,
+    filtering on the record headers and replaying the games onto a `Board`
+    (with and without checking the moves), with the size of the file per game against the JSON of the same games.
+
+search
+    Searches the positions of the boards section with every combination of
+    the search enhancements of `AlphaBetaPlayer` in SEARCH_VARIANTS (the
+    min/max recursion, the negamax core, principal variation search and late
+    move reductions) and reports the nodes searched by each iteration of an
+    iterative deepening to depth SEARCH_REPORT_DEPTH, and the average and
+    maximum depth completed by `get_move()` within `tournament.TIME_LIMIT`
+    milliseconds per move (a timed measure, so it depends on the machine).
+
+suite
+    Runs the regression suite over a fixed corpus of opening, midgame and
+    endgame positions on several board sizes (see `make_corpus()`), and
+    reports the rate of each operation per game phase:
+
+    - get_legal_moves/<board>, forecast_move/<board> : calls/second
+    - score/<name> : evaluations/second of every score function of
+                     game_agent.py and sample_players.py
+    - minimax, alphabeta : nodes/second of fixed-depth searches
+
+    Each measure is the best of --repeat runs. With --json FILE the results
+    are written to FILE as JSON; with --baseline FILE they are compared to
+    the results stored in FILE by an earlier run on the same machine, and the
+    script exits with an error if any rate dropped by more than --tolerance
+    or any operation count changed (a count only changes when the corpus or
+    the searched trees do, which invalidates the comparison).
+
+    python benchmark.py suite --json baseline.json      # before a change
+    python benchmark.py suite --baseline baseline.json  # after it
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import timeit
+
+from eval_cache import EvalCache
+from game_records import GameRecord, RecordReader, RecordWriter, replay
+from isolation import Board, BitBoard
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
+                        custom_score_2, custom_score_3)
+from move_ordering import ORDERINGS, make_ordering
+from sample_players import (null_score, open_move_score, improved_score,
+                            center_score)
+from tournament import TIME_LIMIT
+
+BOARDS = [("Board", Board), ("BitBoard", BitBoard)]
+SEEDS = range(5)  # one position per seed
+BOARD_SEEDS = range(20)  # positions of the boards section
+BOARDS_REPEAT = 3  # runs of each boards measure, the fastest one is kept
+OPENING_PLIES = 6  # number of random moves applied to reach each position
+TREE_DEPTH = 5  # plies walked by the tree walk benchmark
+SEARCH_DEPTH = 5  # search depth used by the minimax benchmark
+ALPHABETA_DEPTH = 8  # iterative deepening depth of the alphabeta benchmark
+TT_DEPTH = 5  # iterative deepening depth reached on every turn
+TT_TURNS = 6  # turns searched along each scripted game line
+TT_SIZES = [0, 1, 16]  # transposition table budgets in MB (0 = no table)
+CACHE_SIZES = [0, .1, 4]  # evaluation cache budgets in MB (0 = no cache)
+RECORD_GAMES = 5000  # random games written by the records benchmark
+SEARCH_REPORT_DEPTH = 7  # iterative deepening depth of the search section
+SEARCH_VARIANTS = [("minimax", {}), ("negamax", {"negamax": True}),
+                   ("pvs", {"pvs": True}), ("lmr", {"lmr": 1}),
+                   ("pvs+lmr", {"pvs": True, "lmr": 1})]
+
+# Regression suite corpus: the fraction of the cells filled in each phase,
+# the board sizes and the positions per size and phase
+CORPUS_PHASES = [("opening", .1), ("midgame", .35), ("endgame", .6)]
+CORPUS_SIZES = [(5, 5), (7, 7), (9, 9)]
+CORPUS_SEEDS = range(3)
+CALL_LOOPS = 200  # calls per position of the move generation and score timings
+SUITE_MINIMAX_DEPTH = 4
+SUITE_ALPHABETA_DEPTH = 6
+SUITE_REPEAT = 3  # runs of each measure, the fastest one is kept
+SUITE_MIN_SECONDS = .1  # shortest run of a measure
+SUITE_TOLERANCE = .2  # slowdown against the baseline that fails the suite
+SCORE_FNS = [custom_score, custom_score_2, custom_score_3, null_score,
+             open_move_score, improved_score, center_score]
+
+
+def make_position(board_cls, player_1, player_2, plies, seed,
+                  width=7, height=7):
+    """Return a board of class `board_cls` advanced `plies` random moves from
+    the empty board. The moves depend only on `seed`, not on the board class.
+    """
+    rng = random.Random(seed)
+    game = board_cls(player_1, player_2, width=width, height=height)
+    for _ in range(plies):
+        moves = sorted(game.get_legal_moves())
+        if not moves:
+            break
+        game.apply_move(rng.choice(moves))
+    return game
+
+
+def count_nodes(game, depth):
+    """Return the number of nodes in the game tree rooted at `game`, expanded
+    to a fixed number of plies.
+    """
+    if depth == 0:
+        return 1
+    return 1 + sum(count_nodes(game.forecast_move(move), depth - 1)
+                   for move in game.get_legal_moves())
+
+
+def count_index_nodes(game, depth):
+    """Return the same count as `count_nodes()`, walking a single board in
+    place with cell-index moves.
+    """
+    if depth == 0:
+        return 1
+    nodes = 1
+    for idx in game.get_legal_indices():
+        game.apply_index(idx)
+        nodes += count_index_nodes(game, depth - 1)
+        game.undo_move()
+    return nodes
+
+
+def time_call(fn):
+    """Return the result of `fn()` and the wall time it took in seconds. """
+    start = timeit.default_timer()
+    result = fn()
+    return result, timeit.default_timer() - start
+
+
+def best_of(bench, repeat=BOARDS_REPEAT):
+    """Return the count and the shortest time of `repeat` runs of `bench()`,
+    which returns a count and a time.
+    """
+    runs = [bench() for _ in range(repeat)]
+    return runs[0][0], min(elapsed for _, elapsed in runs)
+
+
+def bench_tree_walk(board_cls, counter=count_nodes):
+    nodes, elapsed = 0, 0.
+    for seed in BOARD_SEEDS:
+        game = make_position(board_cls, "Player1", "Player2", OPENING_PLIES, seed)
+        n, t = time_call(lambda: counter(game, TREE_DEPTH))
+        nodes += n
+        elapsed += t
+    return nodes, elapsed
+
+
+def bench_minimax(board_cls, in_place=False):
+    leaves = [0]
+
+    def counting_score(game, player):
+        leaves[0] += 1
+        return improved_score(game, player)
+
+    elapsed = 0.
+    for seed in BOARD_SEEDS:
+        player_1 = MinimaxPlayer(search_depth=SEARCH_DEPTH,
+                                 score_fn=counting_score, in_place=in_place)
+        player_2 = MinimaxPlayer(search_depth=SEARCH_DEPTH,
+                                 score_fn=counting_score, in_place=in_place)
+        player_1.time_left = player_2.time_left = lambda: float("inf")
+        game = make_position(board_cls, player_1, player_2, OPENING_PLIES, seed)
+        _, t = time_call(lambda: game.active_player.minimax(game, SEARCH_DEPTH))
+        elapsed += t
+    return leaves[0], elapsed
+
+
+def deepen(player, game, depth):
+    """Search `game` with iterative deepening up to a fixed `depth`, the way
+    `AlphaBetaPlayer.get_move()` does without a time limit.
+    """
+    player.time_left = lambda: float("inf")
+    player.new_search(game)
+    for d in range(1, depth + 1):
+        move = player.alphabeta(game, d)
+    return move
+
+
+def bench_alphabeta(board_cls, in_place=False):
+    nodes, elapsed = 0, 0.
+    for seed in BOARD_SEEDS:
+        player = AlphaBetaPlayer(score_fn=improved_score, in_place=in_place)
+        game = make_position(board_cls, player, "Opponent", OPENING_PLIES,
+                             seed)
+        random.seed(seed)
+        _, t = time_call(lambda: deepen(player, game, ALPHABETA_DEPTH))
+        nodes += player.nodes
+        elapsed += t
+    return nodes, elapsed
+
+
+def bench_lines(make_player):
+    """Return the total nodes, table counters and time used to search each
+    turn of the scripted game lines with players built by `make_player()`.
+    """
+    nodes, elapsed = 0, 0.
+    totals = {"hits": 0, "misses": 0, "collisions": 0}
+    for seed in SEEDS:
+        player = make_player()
+        game = make_position(Board, player, "Opponent", OPENING_PLIES, seed)
+        rng = random.Random(seed)
+        random.seed(seed)
+        for _ in range(TT_TURNS):
+            if game.active_player != player and game.get_legal_moves():
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            if game.active_player != player or not game.get_legal_moves():
+                break
+            _, t = time_call(lambda: deepen(player, game, TT_DEPTH))
+            nodes += player.nodes
+            elapsed += t
+            if player.tt is not None:
+                for counter in totals:
+                    totals[counter] += player.tt.stats()[counter]
+            game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+    return nodes, totals, elapsed
+
+
+def run_boards():
+    benchmarks = [("tree walk", bench_tree_walk),
+                  ("index walk",
+                   lambda cls: bench_tree_walk(cls, count_index_nodes)),
+                  ("minimax", bench_minimax),
+                  ("in place", lambda cls: bench_minimax(cls, in_place=True)),
+                  ("alphabeta", bench_alphabeta),
+                  ("ab in place",
+                   lambda cls: bench_alphabeta(cls, in_place=True))]
+
+    print("{:^12}{:^12}{:>12}{:>12}{:>14}".format(
+        "Benchmark", "Board", "Nodes", "Seconds", "Nodes/sec"))
+    print("-" * 62)
+    for bench_name, bench in benchmarks:
+        for board_name, board_cls in BOARDS:
+            nodes, elapsed = best_of(lambda: bench(board_cls))
+            print("{:^12}{:^12}{:>12}{:>12.3f}{:>14.0f}".format(
+                bench_name, board_name, nodes, elapsed, nodes / elapsed))
+
+
+def run_tt():
+    print("Iterative deepening to depth {} on a 7x7 board, {} turns x {} lines"
+          .format(TT_DEPTH, TT_TURNS, len(SEEDS)))
+    print("{:>8}{:>10}{:>10}{:>10}{:>10}{:>12}{:>10}".format(
+        "TT (MB)", "Nodes", "Saved", "Hits", "Misses", "Collisions", "Seconds"))
+    print("-" * 70)
+    baseline = None
+    for tt_mb in TT_SIZES:
+        nodes, totals, elapsed = bench_lines(
+            lambda: AlphaBetaPlayer(score_fn=improved_score, tt_mb=tt_mb,
+                                    ordering="hash"))
+        if baseline is None:
+            baseline = nodes
+        print("{:>8}{:>10}{:>10.1%}{:>10}{:>10}{:>12}{:>10.3f}".format(
+            tt_mb, nodes, 1 - nodes / baseline, totals["hits"],
+            totals["misses"], totals["collisions"], elapsed))
+
+
+def run_ordering():
+    print("Iterative deepening to depth {} on a 7x7 board, {} turns x {} lines"
+          .format(TT_DEPTH, TT_TURNS, len(SEEDS)))
+    print("{:>10}{:>10}{:>10}{:>10}".format("Ordering", "Nodes", "Saved",
+                                            "Seconds"))
+    print("-" * 40)
+    baseline = None
+    for ordering in ORDERINGS:
+        nodes, _, elapsed = bench_lines(
+            lambda: AlphaBetaPlayer(score_fn=improved_score, tt_mb=16,
+                                    ordering=ordering))
+        if baseline is None:
+            baseline = nodes
+        print("{:>10}{:>10}{:>10.1%}{:>10.3f}".format(
+            ordering, nodes, 1 - nodes / baseline, elapsed))
+
+
+def run_cache():
+    print("Iterative deepening to depth {} on a 7x7 board, {} turns x {} lines"
+          .format(TT_DEPTH, TT_TURNS, len(SEEDS)))
+    print("{:>10}{:>10}{:>12}{:>10}{:>10}{:>10}".format(
+        "Cache (MB)", "Nodes", "Nodes/sec", "Hit rate", "Evictions",
+        "Seconds"))
+    print("-" * 62)
+    for cache_mb in CACHE_SIZES:
+        caches = []
+
+        def make_player():
+            score_fn = improved_score
+            if cache_mb:
+                score_fn = EvalCache(improved_score, cache_mb)
+                caches.append(score_fn)
+            return AlphaBetaPlayer(score_fn=score_fn, tt_mb=16)
+
+        nodes, _, elapsed = bench_lines(make_player)
+        hits = sum(cache.hits for cache in caches)
+        lookups = hits + sum(cache.misses for cache in caches)
+        print("{:>10}{:>10}{:>12.0f}{:>10.1%}{:>10}{:>10.3f}".format(
+            cache_mb, nodes, nodes / elapsed,
+            hits / lookups if lookups else 0.,
+            sum(cache.evictions for cache in caches), elapsed))
+
+
+def search_run(options):
+    """Return the total nodes searched by each iteration of an iterative
+    deepening to SEARCH_REPORT_DEPTH over the positions, the nodes scouted
+    again, and the depths completed by `get_move()` within TIME_LIMIT in
+    each position, with players built with the keyword `options`.
+    """
+    iteration_nodes = [0] * SEARCH_REPORT_DEPTH
+    researches, depths = 0, []
+    for seed in SEEDS:
+        player = AlphaBetaPlayer(score_fn=improved_score, **options)
+        game = make_position(Board, player, "Opponent", OPENING_PLIES, seed)
+        random.seed(seed)
+        player.time_left = lambda: float("inf")
+        player.new_search(game)
+        for depth in range(1, SEARCH_REPORT_DEPTH + 1):
+            searched = player.nodes
+            player.alphabeta(game, depth)
+            iteration_nodes[depth - 1] += player.nodes - searched
+        researches += player.scout_researches
+
+        random.seed(seed)
+        start = timeit.default_timer()
+        player.get_move(game, lambda: TIME_LIMIT - 1000 * (
+            timeit.default_timer() - start))
+        depths.append(player.depth_reached)
+    return iteration_nodes, researches, depths
+
+
+def run_search():
+    print("Nodes per iteration of a deepening to depth {} on a 7x7 board, "
+          "{} positions".format(SEARCH_REPORT_DEPTH, len(SEEDS)))
+    print("{:>10}".format("Search") + "".join(
+        "{:>9}".format("d{}".format(depth))
+        for depth in range(1, SEARCH_REPORT_DEPTH + 1)) +
+        "{:>10}{:>11}{:>11}".format("Scouted", "Avg depth", "Max depth"))
+    print("-" * (41 + 9 * SEARCH_REPORT_DEPTH))
+    for name, options in SEARCH_VARIANTS:
+        iteration_nodes, researches, depths = search_run(options)
+        print("{:>10}".format(name) + "".join(
+            "{:>9}".format(nodes) for nodes in iteration_nodes) +
+            "{:>10}{:>11.2f}{:>11}".format(
+                researches, sum(depths) / len(depths), max(depths)))
+    print("(depths completed by get_move() within {} ms per move)".format(
+        TIME_LIMIT))
+
+
+def random_records(count):
+    """Return the records of `count` games of random moves on a 7x7 board,
+    with random move times.
+    """
+    rng = random.Random(0)
+    records = []
+    for _ in range(count):
+        game = Board("Player1", "Player2")
+        line = []
+        while True:
+            moves = game.get_legal_indices()
+            if not moves:
+                break
+            line.append(rng.choice(moves))
+            game.apply_index(line[-1])
+        records.append(GameRecord(7, 7, bytes(line[:2]), bytes(line[2:]),
+                                  1 - game.move_count % 2, "illegal move",
+                                  tuple(rng.uniform(0, 150) for _ in line)))
+    return records
+
+
+def run_records():
+    records = random_records(RECORD_GAMES)
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "games.isog")
+    try:
+        def write():
+            with RecordWriter(path) as writer:
+                for record in records:
+                    writer.write(record)
+
+        reader = RecordReader(path)
+        _, write_time = time_call(write)
+        _, read_time = time_call(lambda: sum(1 for _ in reader))
+        kept, filter_time = time_call(lambda: sum(
+            1 for _ in reader.records(winner=0, min_moves=20)))
+        positions, replay_time = time_call(lambda: sum(
+            replay(record).move_count for record in reader))
+        _, unchecked_time = time_call(lambda: sum(
+            replay(record, check=False).move_count for record in reader))
+        size = os.path.getsize(path)
+    finally:
+        shutil.rmtree(tmpdir)
+    json_size = sum(len(json.dumps({"opening": r.move_list()[:2],
+                                    "moves": r.move_list()[2:],
+                                    "think_ms": [round(t, 3)
+                                                 for t in r.think_ms]}))
+                    for r in records)
+
+    print("{} random games on a 7x7 board, {:.1f} moves/game".format(
+        len(records), positions / len(records)))
+    print("{:<10}{:>12}{:>14}".format("Operation", "Games/sec", "Moves/sec"))
+    print("-" * 36)
+    for name, elapsed in [("write", write_time), ("read", read_time),
+                          ("replay", replay_time),
+                          ("unchecked", unchecked_time)]:
+        print("{:<10}{:>12.0f}{:>14.0f}".format(
+            name, len(records) / elapsed, positions / elapsed))
+    print("{:<10}{:>12.0f}{:>14}".format(
+        "filter", len(records) / filter_time,
+        "({} kept)".format(kept)))
+    print("\nFile size: {:.1f} bytes/game ({:.1f} as JSON)".format(
+        size / len(records), json_size / len(records)))
+
+
+def playable_position(board_cls, player_1, player_2, plies, seed, width,
+                      height):
+    """Return the first position advanced `plies` random moves from the empty
+    board, by the seeds following `seed`, in which the player to move still
+    has a legal move.
+    """
+    while True:
+        game = make_position(board_cls, player_1, player_2, plies, seed,
+                             width, height)
+        if game.move_count == plies and game.get_legal_moves():
+            return game
+        seed += len(CORPUS_SEEDS)
+
+
+def make_corpus(board_cls, player_1="Player1", player_2="Player2"):
+    """Return the suite corpus for `board_cls` as a list of (phase, game)
+    pairs: `CORPUS_SEEDS` positions of every phase of `CORPUS_PHASES` on
+    every board size of `CORPUS_SIZES`. The positions are the same for every
+    board class.
+    """
+    corpus = []
+    for width, height in CORPUS_SIZES:
+        for phase, fraction in CORPUS_PHASES:
+            plies = max(2, int(fraction * width * height))
+            for seed in CORPUS_SEEDS:
+                corpus.append((phase, playable_position(
+                    board_cls, player_1, player_2, plies, seed, width,
+                    height)))
+    return corpus
+
+
+def time_run(fn):
+    """Return the wall time in seconds of one call of `fn()`, averaged over
+    as many calls as fit in `SUITE_MIN_SECONDS`. The shuffle of the move
+    generators is reseeded before each call so that every call does the
+    same work.
+    """
+    calls, elapsed = 0, 0.
+    while elapsed < SUITE_MIN_SECONDS:
+        random.seed(0)
+        elapsed += time_call(fn)[1]
+        calls += 1
+    return elapsed / calls
+
+
+def calls_run(fn, games):
+    """Return a function that calls `fn(game)` `CALL_LOOPS` times for each
+    of `games` and returns the number of calls.
+    """
+    def run():
+        for game in games:
+            for _ in range(CALL_LOOPS):
+                fn(game)
+        return CALL_LOOPS * len(games)
+    return run
+
+
+def forecast_all(game):
+    for move in game.get_legal_moves():
+        game.forecast_move(move)
+
+
+def minimax_run(games):
+    """Return a function that searches each of `games` with a fixed-depth
+    minimax search and returns the nodes searched, counted by a separate
+    walk of the same trees.
+    """
+    nodes = sum(count_index_nodes(game.copy(), SUITE_MINIMAX_DEPTH)
+                for game in games)
+
+    def run():
+        for game in games:
+            player = game.active_player
+            player.time_left = lambda: float("inf")
+            player.minimax(game, SUITE_MINIMAX_DEPTH)
+        return nodes
+    return run
+
+
+def alphabeta_run(games):
+    """Return a function that searches each of `games` with a fixed-depth
+    alpha-beta search, started with an empty move ordering history, and
+    returns the nodes searched.
+    """
+    def run():
+        nodes = 0
+        for game in games:
+            player = game.active_player
+            player.time_left = lambda: float("inf")
+            player.ordering = make_ordering("history")
+            player.new_search(game)
+            player.alphabeta(game, SUITE_ALPHABETA_DEPTH)
+            nodes += player.nodes
+        return nodes
+    return run
+
+
+def suite_metrics(repeat=SUITE_REPEAT):
+    """Run the regression suite and return a dict mapping each metric name
+    to a dict of its operation count, best time in seconds and rate.
+
+    Every metric is timed once per round, and the fastest of `repeat` rounds
+    is kept, so that a slow spell of the machine does not hit every run of
+    the same metric.
+    """
+    runs = []
+    for board_name, board_cls in BOARDS:
+        corpus = make_corpus(board_cls)
+        runs.append(("get_legal_moves/" + board_name, corpus,
+                     lambda games: calls_run(
+                         lambda game: game.get_legal_moves(), games)))
+        runs.append(("forecast_move/" + board_name, corpus,
+                     lambda games: calls_run(forecast_all, games)))
+    corpus = make_corpus(Board)
+    for score_fn in SCORE_FNS:
+        runs.append(("score/" + score_fn.__name__, corpus,
+                     lambda games, score_fn=score_fn: calls_run(
+                         lambda game: score_fn(game, "Player1"), games)))
+    players = [MinimaxPlayer(score_fn=improved_score) for _ in range(2)]
+    runs.append(("minimax", make_corpus(Board, *players), minimax_run))
+    players = [AlphaBetaPlayer(score_fn=improved_score) for _ in range(2)]
+    runs.append(("alphabeta", make_corpus(Board, *players), alphabeta_run))
+
+    measures = []
+    for run_name, corpus, make_run in runs:
+        for phase, _ in CORPUS_PHASES:
+            run = make_run([game for game_phase, game in corpus
+                            if game_phase == phase])
+            random.seed(0)
+            measures.append(("{}/{}".format(run_name, phase), run(), run))
+
+    best = {}
+    for _ in range(repeat):
+        for name, _, run in measures:
+            elapsed = time_run(run)
+            best[name] = min(best.get(name, elapsed), elapsed)
+    return {name: {"ops": ops, "seconds": round(best[name], 6),
+                   "rate": round(ops / best[name], 1)}
+            for name, ops, _ in measures}
+
+
+def compare_metrics(metrics, baseline, tolerance=SUITE_TOLERANCE):
+    """Return a list of messages describing the regressions of `metrics`
+    against the `baseline` metrics: missing metrics, changed operation
+    counts, and rates more than `tolerance` (a fraction) below the baseline.
+    """
+    regressions = []
+    for name, base in sorted(baseline.items()):
+        current = metrics.get(name)
+        if current is None:
+            regressions.append("{}: missing".format(name))
+        elif current["ops"] != base["ops"]:
+            regressions.append("{}: {} operations instead of {}".format(
+                name, current["ops"], base["ops"]))
+        elif current["rate"] < base["rate"] * (1 - tolerance):
+            regressions.append("{}: {:.0f}/s is {:.1%} slower than {:.0f}/s"
+                               .format(name, current["rate"],
+                                       1 - current["rate"] / base["rate"],
+                                       base["rate"]))
+    return regressions
+
+
+def run_suite(args):
+    metrics = suite_metrics(args.repeat)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metrics"]
+
+    print("{:<34}{:>10}{:>14}{:>10}".format("Metric", "Ops", "Ops/sec",
+                                            "Baseline"))
+    print("-" * 68)
+    for name, metric in sorted(metrics.items()):
+        ratio = ""
+        if baseline is not None and name in baseline:
+            ratio = "{:.2f}x".format(metric["rate"] / baseline[name]["rate"])
+        print("{:<34}{:>10}{:>14.0f}{:>10}".format(name, metric["ops"],
+                                                   metric["rate"], ratio))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": platform.python_version(),
+                       "machine": platform.machine(), "repeat": args.repeat,
+                       "metrics": metrics}, f, indent=1, sort_keys=True)
+            f.write("\n")
+    if baseline is not None:
+        regressions = compare_metrics(metrics, baseline, args.tolerance)
+        if regressions:
+            sys.exit("\nRegressions against {}:\n  {}".format(
+                args.baseline, "\n  ".join(regressions)))
+        print("\nNo regressions against {}".format(args.baseline))
+
+
+SECTIONS = {"boards": run_boards, "tt": run_tt, "ordering": run_ordering,
+            "cache": run_cache, "records": run_records, "search": run_search,
+            "suite": run_suite}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Isolation engine benchmarks")
+    parser.add_argument("sections", nargs="*",
+                        help="benchmark sections to run, among {} (default: "
+                             "all)".format(", ".join(sorted(SECTIONS))))
+    parser.add_argument("--json", default=None,
+                        help="write the suite results to this file")
+    parser.add_argument("--baseline", default=None,
+                        help="compare the suite results to those stored in "
+                             "this file and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=SUITE_TOLERANCE,
+                        help="largest slowdown of a suite rate against the "
+                             "baseline, as a fraction (default: {})".format(
+                                 SUITE_TOLERANCE))
+    parser.add_argument("--repeat", type=int, default=SUITE_REPEAT,
+                        help="runs of each suite measure, the fastest is kept "
+                             "(default: {})".format(SUITE_REPEAT))
+    args = parser.parse_args()
+    unknown = sorted(set(args.sections) - set(SECTIONS))
+    if unknown:
+        parser.error("unknown sections: {}".format(", ".join(unknown)))
+    for section in args.sections or sorted(SECTIONS):
+        print("\n[{}]".format(section))
+        if section == "suite":
+            run_suite(args)
+        else:
+            SECTIONS[section]()
+
+
+if __name__ == "__main__":
+    main()
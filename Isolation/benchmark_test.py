@@ -0,0 +1,56 @@
+"""Unit tests for the benchmark regression suite."""
+
+import unittest
+
+import benchmark
+
+from isolation import Board, BitBoard
+
+
+class CorpusTest(unittest.TestCase):
+
+    def test_corpus_is_fixed_and_playable(self):
+        corpus = benchmark.make_corpus(Board)
+        self.assertEqual(len(corpus), len(benchmark.CORPUS_PHASES) *
+                         len(benchmark.CORPUS_SIZES) *
+                         len(benchmark.CORPUS_SEEDS))
+        self.assertEqual({phase for phase, _ in corpus},
+                         {phase for phase, _ in benchmark.CORPUS_PHASES})
+        for _, game in corpus:
+            self.assertTrue(game.get_legal_moves())
+        # the same positions for every board class
+        for (_, game), (_, bit_game) in zip(
+                corpus, benchmark.make_corpus(BitBoard)):
+            self.assertEqual(game.hash(), bit_game.hash())
+
+
+class CompareTest(unittest.TestCase):
+
+    def setUp(self):
+        self.baseline = {"minimax/opening": {"ops": 100, "rate": 1000.},
+                         "score/null_score/opening": {"ops": 10,
+                                                      "rate": 500.}}
+
+    def test_no_regression_within_tolerance(self):
+        metrics = {"minimax/opening": {"ops": 100, "rate": 850.},
+                   "score/null_score/opening": {"ops": 10, "rate": 900.}}
+        self.assertEqual(benchmark.compare_metrics(metrics, self.baseline,
+                                                   .2), [])
+
+    def test_regressions(self):
+        metrics = {"minimax/opening": {"ops": 100, "rate": 700.}}
+        regressions = benchmark.compare_metrics(metrics, self.baseline, .2)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("30.0% slower", regressions[0])
+        self.assertIn("missing", regressions[1])
+
+    def test_changed_operation_count(self):
+        metrics = {"minimax/opening": {"ops": 90, "rate": 2000.},
+                   "score/null_score/opening": {"ops": 10, "rate": 500.}}
+        regressions = benchmark.compare_metrics(metrics, self.baseline)
+        self.assertEqual(regressions,
+                         ["minimax/opening: 90 operations instead of 100"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Build an opening book for the Isolation agents (see opening_book.py).
+
+Usage: python build_book.py BOOK [--plies N] [--depth D] [--width W]
+                                 [--height H]
+
+Every position reachable in fewer than N plies is enumerated once per
+symmetry class and searched by an `AlphaBetaPlayer` with iterative deepening
+to a fixed depth D, without a time limit; the best move of each position is
+written to the book file BOOK. Pass the file to `AlphaBetaPlayer(book=BOOK)`
+or `competition_agent.CustomPlayer(book=BOOK)` to play from it.
+"""
+import argparse
+import timeit
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer
+from opening_book import canonical_key, write_book
+from sample_players import improved_score
+
+BOOK_PLIES = 3  # positions with fewer moves played are stored
+BOOK_DEPTH = 6  # search depth of every book position
+BOOK_TT_MB = 16
+
+
+def book_positions(width, height, plies):
+    """Return a dict mapping the canonical key of every position reachable
+    in fewer than `plies` plies to the cell indices of the moves that reach
+    one representative of the position.
+    """
+    positions = {}
+    frontier = [()]
+    for ply in range(plies):
+        children = []
+        for line in frontier:
+            game = Board("Player1", "Player2", width, height)
+            for idx in line:
+                game.apply_index(idx)
+            key, _ = canonical_key(game)
+            if key in positions:
+                continue
+            positions[key] = line
+            if ply + 1 < plies:
+                children.extend(line + (idx,)
+                                for idx in sorted(game.get_legal_indices()))
+        frontier = children
+    return positions
+
+
+def search_position(line, width, height, depth, score_fn=improved_score):
+    """Return the cell index of the best move found by a search of `depth`
+    plies from the position reached by `line`, or None if the player to move
+    has no legal moves.
+    """
+    player = AlphaBetaPlayer(score_fn=score_fn, tt_mb=BOOK_TT_MB)
+    player.time_left = lambda: float("inf")
+    if len(line) % 2 == 0:
+        game = Board(player, "Opponent", width, height)
+    else:
+        game = Board("Opponent", player, width, height)
+    for idx in line:
+        game.apply_index(idx)
+    if not game.get_legal_indices():
+        return None
+    player.new_search(game)
+    for d in range(1, min(depth, len(game.get_blank_spaces())) + 1):
+        move = player.alphabeta(game, d)
+        player.pv, player.pv_score = player.last_pv, player.last_score
+    return game.move_to_index(move)
+
+
+def build_book(path, width=7, height=7, plies=BOOK_PLIES, depth=BOOK_DEPTH,
+               verbose=False):
+    """Search every book position and write the book to `path`. Returns the
+    number of positions stored.
+    """
+    positions = book_positions(width, height, plies)
+    entries = {}
+    start = timeit.default_timer()
+    for count, (key, line) in enumerate(sorted(positions.items(),
+                                               key=lambda kv: len(kv[1]))):
+        move = search_position(line, width, height, depth)
+        if move is not None:
+            game = Board("Player1", "Player2", width, height)
+            for idx in line:
+                game.apply_index(idx)
+            # the search ran on the representative line; store the move in
+            # the canonical frame of the position
+            _, perm = canonical_key(game)
+            entries[key] = perm[move]
+        if verbose and (count + 1) % 50 == 0:
+            print("{}/{} positions  {:.1f}s".format(
+                count + 1, len(positions), timeit.default_timer() - start))
+    write_book(path, width, height, plies, depth, entries)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an Isolation opening "
+                                                 "book")
+    parser.add_argument("book", help="the book file to write")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES,
+                        help="store the positions with fewer moves played")
+    parser.add_argument("--depth", type=int, default=BOOK_DEPTH,
+                        help="search depth of every position")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    args = parser.parse_args()
+
+    start = timeit.default_timer()
+    count = build_book(args.book, args.width, args.height, args.plies,
+                       args.depth, verbose=True)
+    print("Wrote {} positions to {} in {:.1f}s".format(
+        count, args.book, timeit.default_timer() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Streaming columnar file of fixed-width samples.
+
+A columnar file holds a table with a fixed set of typed columns, written as
+a sequence of blocks so that a generator can stream rows to disk as they are
+produced and a reader can load whole columns at once:
+
+    file header : the magic bytes b"ISOC", the format version (1 byte), the
+                  length of the schema (uint32) and the schema, a JSON list
+                  of [name, type] pairs
+    block       : the number of rows (uint32), then the values of every
+                  column in schema order, little-endian
+
+The types are the numpy type names of COLUMN_TYPES. When numpy is installed
+`ColumnReader.columns()` returns numpy arrays built straight from the
+memory-mapped file, ready for vectorised evaluation; without numpy it returns
+`array.array` columns holding the same values.
+
+    with ColumnWriter("samples.isoc", [("ply", "u1"), ("score", "f8")]) as w:
+        w.append((10, .5))
+    columns = ColumnReader("samples.isoc").columns()
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # columns are read into array.array instead
+    np = None
+
+MAGIC = b"ISOC"
+VERSION = 1
+SCHEMA_LENGTH = struct.Struct("<I")
+BLOCK_HEADER = struct.Struct("<I")
+BLOCK_ROWS = 4096  # rows buffered by a writer before a block is written
+
+# array typecode of every column type; each has the same size on every
+# platform that numpy supports
+COLUMN_TYPES = {"i1": "b", "u1": "B", "i2": "h", "u2": "H", "i4": "i",
+                "u4": "I", "u8": "Q", "f4": "f", "f8": "d"}
+
+
+def _file_header(schema):
+    text = json.dumps([list(column) for column in schema]).encode()
+    return MAGIC + bytes([VERSION]) + SCHEMA_LENGTH.pack(len(text)) + text
+
+
+def _read_schema(data, path):
+    """Return the schema of the mapped file `data` and the offset of its
+    first block.
+    """
+    start = len(MAGIC) + 1
+    if data[:start] != MAGIC + bytes([VERSION]):
+        raise ValueError("{} is not a version {} columnar file".format(
+            path, VERSION))
+    length, = SCHEMA_LENGTH.unpack_from(data, start)
+    start += SCHEMA_LENGTH.size
+    schema = [tuple(column)
+              for column in json.loads(data[start:start + length].decode())]
+    return schema, start + length
+
+
+def read_schema(path):
+    """Return the schema of the columnar file `path` as a list of
+    (name, type) pairs.
+    """
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return _read_schema(data, path)[0]
+        finally:
+            data.close()
+
+
+class ColumnWriter(object):
+    """Streaming writer of the rows of a columnar file.
+
+    Parameters
+    ----------
+    path : str
+        The columnar file. A new file is created with `schema`; rows are
+        appended to an existing file, which must have the same schema, after
+        removing the block truncated by a crash in the middle of a write.
+
+    schema : list of (str, str)
+        The name and the type (a key of COLUMN_TYPES) of every column.
+
+    block_rows : int (optional)
+        The number of rows buffered before they are written as a block.
+    """
+
+    def __init__(self, path, schema, block_rows=BLOCK_ROWS):
+        self.path = path
+        self.schema = [tuple(column) for column in schema]
+        for name, kind in self.schema:
+            if kind not in COLUMN_TYPES:
+                raise ValueError("Unknown type {} of column {}".format(
+                    kind, name))
+        self.block_rows = block_rows
+        if os.path.exists(path) and os.path.getsize(path):
+            reader = ColumnReader(path)
+            if reader.schema != self.schema:
+                raise ValueError("{} has a different schema".format(path))
+            end = reader._complete_size()
+            if os.path.getsize(path) != end:
+                os.truncate(path, end)
+            self._file = open(path, "ab")
+        else:
+            self._file = open(path, "wb")
+            self._file.write(_file_header(self.schema))
+        self._new_block()
+
+    def _new_block(self):
+        self._columns = [array(COLUMN_TYPES[kind]) for _, kind in self.schema]
+        self._rows = 0
+
+    def append(self, row):
+        """Add one row, a sequence of values in schema order. """
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self._rows += 1
+        if self._rows >= self.block_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as a block. """
+        if not self._rows:
+            return
+        parts = [BLOCK_HEADER.pack(self._rows)]
+        for column in self._columns:
+            if sys.byteorder == "big":
+                column.byteswap()
+            parts.append(column.tobytes())
+        self._file.write(b"".join(parts))
+        self._file.flush()
+        self._new_block()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnReader(object):
+    """Reader of the columns of a columnar file through a memory map.
+
+    Parameters
+    ----------
+    path : str
+        The columnar file. A block truncated by a crash in the middle of a
+        write is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.schema = read_schema(path)
+
+    def _row_bytes(self):
+        return sum(array(COLUMN_TYPES[kind]).itemsize
+                   for _, kind in self.schema)
+
+    def _scan(self, data):
+        """Yield the number of rows and the offset of the column values of
+        every complete block of the mapped file `data`.
+        """
+        row_bytes = self._row_bytes()
+        pos = _read_schema(data, self.path)[1]
+        while pos + BLOCK_HEADER.size <= len(data):
+            rows, = BLOCK_HEADER.unpack_from(data, pos)
+            pos += BLOCK_HEADER.size
+            if pos + rows * row_bytes > len(data):
+                return
+            yield rows, pos
+            pos += rows * row_bytes
+
+    def _map(self):
+        with open(self.path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def blocks(self, names=None):
+        """Yield every complete block as a dict mapping the name of each of
+        `names` (every column if None) to its values in the block, as numpy
+        arrays if numpy is installed and as `array.array` otherwise.
+        """
+        names = set(name for name, _ in self.schema) if names is None \
+            else set(names)
+        data = self._map()
+        try:
+            for rows, pos in self._scan(data):
+                block = {}
+                for name, kind in self.schema:
+                    if name in names:
+                        block[name] = _column(data, pos, rows, kind)
+                    pos += rows * array(COLUMN_TYPES[kind]).itemsize
+                yield block
+        finally:
+            data.close()
+
+    def columns(self, names=None):
+        """Return a dict mapping the name of each of `names` (every column if
+        None) to all its values in the file; see `blocks()`.
+        """
+        names = [name for name, _ in self.schema] if names is None else names
+        kinds = dict(self.schema)
+        parts = {name: [] for name in names}
+        for block in self.blocks(names):
+            for name in names:
+                parts[name].append(block[name])
+        if np is not None:
+            return {name: np.concatenate(parts[name]) if parts[name]
+                    else np.zeros(0, "<" + kinds[name]) for name in names}
+        columns = {}
+        for name in names:
+            columns[name] = array(COLUMN_TYPES[kinds[name]])
+            for part in parts[name]:
+                columns[name].extend(part)
+        return columns
+
+    def _complete_size(self):
+        """Return the size of the file without a truncated last block. """
+        data = self._map()
+        try:
+            end = _read_schema(data, self.path)[1]
+            for rows, pos in self._scan(data):
+                end = pos + rows * self._row_bytes()
+            return end
+        finally:
+            data.close()
+
+    def __len__(self):
+        data = self._map()
+        try:
+            return sum(rows for rows, _ in self._scan(data))
+        finally:
+            data.close()
+
+
+def _column(data, pos, rows, kind):
+    """Return `rows` values of type `kind` read from `data` at `pos`. The
+    values are copied out of the memory map, which is closed when the reader
+    is done.
+    """
+    if np is not None:
+        return np.frombuffer(data, "<" + kind, rows, pos).copy()
+    column = array(COLUMN_TYPES[kind])
+    column.frombytes(data[pos:pos + rows * column.itemsize])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
@@ -0,0 +1,73 @@
+"""Unit tests for the streaming columnar file."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from columnar import ColumnReader, ColumnWriter, read_schema
+
+SCHEMA = [("game", "u4"), ("blocked", "u8"), ("outcome", "i1"),
+          ("score", "f8")]
+
+
+def rows(count):
+    return [(i, (1 << 48) + i, 1 if i % 3 else -1, i / 4 - 5.)
+            for i in range(count)]
+
+
+class ColumnarTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "samples.isoc")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, data, block_rows=4):
+        with ColumnWriter(self.path, SCHEMA, block_rows) as writer:
+            for row in data:
+                writer.append(row)
+
+    def test_round_trip(self):
+        data = rows(11)
+        self.write(data[:6])
+        self.write(data[6:])  # appends to the same file
+        reader = ColumnReader(self.path)
+        self.assertEqual(read_schema(self.path), SCHEMA)
+        self.assertEqual(len(reader), 11)
+        columns = reader.columns()
+        for i, (name, _) in enumerate(SCHEMA):
+            self.assertEqual(list(columns[name]), [row[i] for row in data])
+        self.assertEqual(sorted(reader.columns(["score"])), ["score"])
+        # two blocks of 4 rows and one of 2 for each writer
+        self.assertEqual([len(b["game"]) for b in reader.blocks()],
+                         [4, 2, 4, 1])
+
+    def test_truncated_block_is_ignored(self):
+        self.write(rows(6))
+        with open(self.path, "ab") as f:
+            f.write(b"\x04\x00\x00\x00\x01")
+        self.assertEqual(len(ColumnReader(self.path)), 6)
+
+    def test_append_after_truncation(self):
+        data = rows(8)
+        self.write(data[:6])
+        os.truncate(self.path, os.path.getsize(self.path) - 3)
+        self.write(data[6:])
+        columns = ColumnReader(self.path).columns()
+        self.assertEqual(list(columns["game"]), [0, 1, 2, 3, 6, 7])
+        self.assertEqual(list(columns["score"]),
+                         [row[3] for row in data[:4] + data[6:]])
+
+    def test_schema_mismatch(self):
+        self.write(rows(1))
+        with self.assertRaises(ValueError):
+            ColumnWriter(self.path, SCHEMA[:2])
+        with self.assertRaises(ValueError):
+            ColumnWriter(os.path.join(self.tmpdir, "x"), [("a", "object")])
+
+
+if __name__ == '__main__':
+    unittest.main()
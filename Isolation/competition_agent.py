@@ -6,6 +6,10 @@ champions) in a tournament.
 """
 import random
 
+import game_agent
+from game_agent import AlphaBetaPlayer
+from mcts import MCTSPlayer
+
 
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
@@ -33,10 +37,10 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    raise NotImplementedError
+    return game_agent.custom_score(game, player)
 
 
-class CustomPlayer:
+class CustomPlayer(AlphaBetaPlayer):
     """Game-playing agent to use in the optional player vs player Isolation
     competition.
 
@@ -52,19 +56,31 @@ class CustomPlayer:
     Parameters
     ----------
     data : string
-        The name of the search method to use in get_move().
+        The name of the search method to use in get_move(): "alphabeta"
+        (the default) for iterative deepening alpha-beta search, or "mcts"
+        for Monte Carlo Tree Search (see `mcts.MCTSPlayer`).
 
     timeout : float (optional)
         Time remaining (in milliseconds) when search is aborted.  Note that
         the PvP competition uses more accurate timers that are not cross-
         platform compatible, so a limit of 1ms (vs 10ms for the other classes)
         is generally sufficient.
-    """
 
-    def __init__(self, data=None, timeout=1.):
-        self.score = custom_score
-        self.time_left = None
-        self.TIMER_THRESHOLD = timeout
+    book : str or `opening_book.OpeningBook` (optional)
+        An opening book (see build_book.py), or the path of one, consulted
+        before searching.
+    """
+    SEARCH_METHODS = ("alphabeta", "mcts")
+
+    def __init__(self, data=None, timeout=1., book=None):
+        data = data or "alphabeta"
+        if data not in self.SEARCH_METHODS:
+            raise ValueError("Unknown search method {!r}; expected one of {}"
+                             .format(data, ", ".join(self.SEARCH_METHODS)))
+        super().__init__(score_fn=custom_score, timeout=timeout, tt_mb=16,
+                         book=book)
+        self.data = data
+        self.mcts = MCTSPlayer(timeout=timeout) if data == "mcts" else None
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -93,5 +109,11 @@ class CustomPlayer:
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        # OPTIONAL: Finish this function!
-        raise NotImplementedError
+        if self.mcts is None:
+            return super().get_move(game, time_left)
+        if self.book is not None:
+            book_move = self.book.lookup(game)
+            if book_move is not None:
+                self.book_hits += 1
+                return book_move
+        return self.mcts.get_move(game, time_left)
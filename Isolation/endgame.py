@@ -0,0 +1,201 @@
+"""Exact endgame solver for separated Isolation positions.
+
+Once no blank cell can be reached by both players, the players can no
+longer interfere with each other: each of them can make at most as many
+moves as the longest knight path through its own region, and can always
+make that many by following the path. The player to move wins if and only
+if its longest path is strictly longer than the opponent's, and following
+its longest path is an optimal strategy either way.
+
+`is_separated()` detects such positions with a flood fill over the blank
+cells, and `solve()` computes both longest paths exactly with a depth-first
+search that memoises (cell, region) pairs and stops as soon as a path
+reaches an upper bound derived from the size and colours of the region.
+"""
+from isolation.bitboard import knight_masks
+
+_COLOUR_MASKS = {}
+POLL_NODES = 256  # solver nodes between two polls of the clock
+MEMO_LIMIT = 2**20  # memo entries kept across calls to solve()
+
+
+class SolverTimeout(Exception):
+    """Raised when the solver runs out of the time it was given. """
+    pass
+
+
+def colour_mask(width, height):
+    """Return the bitmask of the cells where row + column is even. Knight
+    moves always change the colour of the cell.
+    """
+    key = (width, height)
+    mask = _COLOUR_MASKS.get(key)
+    if mask is None:
+        mask = _COLOUR_MASKS[key] = sum(
+            1 << idx for idx in range(width * height)
+            if (idx % height + idx // height) % 2 == 0)
+    return mask
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def region_mask(start, free, masks):
+    """Return the bitmask of the cells of `free` that a knight on the cell
+    `start` can reach by moving through cells of `free` only.
+    """
+    region = frontier = masks[start] & free
+    while frontier:
+        reach = 0
+        while frontier:
+            low = frontier & -frontier
+            reach |= masks[low.bit_length() - 1]
+            frontier ^= low
+        frontier = reach & free & ~region
+        region |= frontier
+    return region
+
+
+def path_bound(start, region, masks, colours):
+    """Return an upper bound on the length of a knight path from `start`
+    through `region`: the path alternates colours, starting with the colour
+    opposite to `start`, and can only end on one of the cells that have a
+    single neighbour in the region (dead ends).
+    """
+    same = colours if colours >> start & 1 else ~colours
+    n_same = popcount(region & same)
+    n_other = popcount(region) - n_same
+    bound = min(n_other, n_same + 1) + min(n_other, n_same)
+
+    cells = region | 1 << start
+    dead_ends = 0
+    mask = region
+    while mask:
+        low = mask & -mask
+        if popcount(masks[low.bit_length() - 1] & cells) == 1:
+            dead_ends += 1
+        mask ^= low
+    return min(bound, popcount(region) - max(0, dead_ends - 1))
+
+
+class EndgameSolver(object):
+    """Longest knight path search with a memo shared across calls, so that
+    the positions of later turns of the same endgame are mostly cached.
+
+    Parameters
+    ----------
+    width, height : int
+        The size of the boards solved.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.masks = knight_masks(width, height)
+        self.colours = colour_mask(width, height)
+        self.memo = {}
+        self.nodes = 0
+        self._poll = None
+
+    def longest_path(self, start, free):
+        """Return the number of moves of the longest knight path from the
+        cell `start` through the cells of the bitmask `free`.
+        """
+        masks = self.masks
+        region = region_mask(start, free, masks)
+        key = (start, region)
+        length = self.memo.get(key)
+        if length is not None:
+            return length
+
+        self.nodes += 1
+        if self._poll is not None and self.nodes % POLL_NODES == 0:
+            self._poll()
+        bound = path_bound(start, region, masks, self.colours)
+        # try the cells with the fewest onward moves first (Warnsdorff's
+        # rule), which finds long paths early and lets the bound cut in
+        moves = []
+        mask = masks[start] & region
+        while mask:
+            low = mask & -mask
+            cell = low.bit_length() - 1
+            moves.append((popcount(masks[cell] & region), cell))
+            mask ^= low
+        best = 0
+        for _, cell in sorted(moves):
+            best = max(best, 1 + self.longest_path(cell, region & ~(1 << cell)))
+            if best >= bound:
+                break
+        self.memo[key] = best
+        return best
+
+    def solve(self, game, time_left=None, stop_at=0.):
+        """Solve the position of `game` if the players are separated.
+
+        Returns None if they are not, or (move, own_length, opp_length): the
+        optimal move of the player to move as a (row, column) pair, and the
+        number of moves each player can still make. The player to move wins
+        if own_length > opp_length.
+
+        The optimal move only depends on the region of the player to move, so
+        it is solved first: `SolverTimeout` is raised if `time_left()` drops
+        below `stop_at` before the move is known, while a timeout during the
+        opponent's path only leaves `opp_length` as None.
+        """
+        separation = separated_regions(game)
+        if separation is None:
+            return None
+        own, opp, free = separation
+        if len(self.memo) > MEMO_LIMIT:
+            self.memo.clear()
+        if time_left is not None:
+            def poll():
+                if time_left() < stop_at:
+                    raise SolverTimeout()
+            self._poll = poll
+        try:
+            bound = path_bound(own, region_mask(own, free, self.masks),
+                               self.masks, self.colours)
+            best_move, own_length = None, 0
+            for cell in sorted(game.get_legal_indices()):
+                length = 1 + self.longest_path(cell, free & ~(1 << cell))
+                if length > own_length:
+                    best_move, own_length = cell, length
+                if own_length >= bound:
+                    break
+            if best_move is None:
+                return None
+            try:
+                opp_length = self.longest_path(opp, free)
+            except SolverTimeout:
+                opp_length = None
+        finally:
+            self._poll = None
+        return game.index_to_move(best_move), own_length, opp_length
+
+
+def separated_regions(game):
+    """Return (own, opp, free) if no blank cell of `game` can be reached by
+    both players, where `own` and `opp` are the cell indices of the player to
+    move and of its opponent and `free` the bitmask of blank cells; return
+    None otherwise.
+    """
+    own = game.get_player_location(game.active_player)
+    opp = game.get_player_location(game.inactive_player)
+    if own is None or opp is None:
+        return None
+    own, opp = game.move_to_index(own), game.move_to_index(opp)
+    free = 0
+    for move in game.get_blank_spaces():
+        free |= 1 << game.move_to_index(move)
+    masks = knight_masks(game.width, game.height)
+    if region_mask(own, free, masks) & region_mask(opp, free, masks):
+        return None
+    return own, opp, free
+
+
+def is_separated(game):
+    """Return True if no blank cell of `game` can be reached by both players.
+    """
+    return separated_regions(game) is not None
@@ -0,0 +1,106 @@
+"""Unit tests for the separated-position detector and endgame solver."""
+
+import random
+import unittest
+from unittest import mock
+
+import isolation
+import endgame
+import game_agent
+import sample_players
+
+
+def separated_positions(width, height, seeds, board_cls=isolation.Board,
+                        players=("Player1", "Player2")):
+    """Yield every separated position of seeded random games. """
+    for seed in seeds:
+        rng = random.Random(seed)
+        game = board_cls(players[0], players[1], width, height)
+        while game.get_legal_moves():
+            if endgame.is_separated(game):
+                yield game.copy()
+            game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+
+
+def brute_force_path(game, cell, free):
+    """Longest knight path from `cell` through the cell indices in `free`. """
+    table = isolation.isolation.neighbor_table(game.width, game.height)
+    return max([1 + brute_force_path(game, n, free - {n})
+                for n in table[cell] if n in free] or [0])
+
+
+def active_player_wins(game):
+    """Exhaustively solve the game for the player to move. """
+    return any(not active_player_wins(game.forecast_move(move))
+               for move in game.get_legal_moves())
+
+
+class SeparationTest(unittest.TestCase):
+
+    def test_detects_shared_regions(self):
+        game = isolation.Board("Player1", "Player2")
+        self.assertFalse(endgame.is_separated(game))
+        game.apply_move((0, 0))
+        game.apply_move((6, 6))
+        self.assertFalse(endgame.is_separated(game))
+
+    def test_random_games_separate(self):
+        positions = list(separated_positions(5, 5, range(10)))
+        self.assertTrue(positions)
+        for game in positions:
+            own, opp, free = endgame.separated_regions(game)
+            masks = isolation.bitboard.knight_masks(game.width, game.height)
+            self.assertFalse(endgame.region_mask(own, free, masks) &
+                             endgame.region_mask(opp, free, masks))
+
+
+class SolverTest(unittest.TestCase):
+
+    def test_path_lengths_are_exact(self):
+        for width, height in [(5, 5), (4, 6)]:
+            for game in separated_positions(width, height, range(15)):
+                solver = endgame.EndgameSolver(width, height)
+                move, own_length, opp_length = solver.solve(game)
+                own, opp, free = endgame.separated_regions(game)
+                cells = {idx for idx in range(width * height) if free >> idx & 1}
+                self.assertEqual(own_length,
+                                 brute_force_path(game, own, cells))
+                self.assertEqual(opp_length,
+                                 brute_force_path(game, opp, cells))
+                # the move starts a longest path
+                idx = game.move_to_index(move)
+                self.assertEqual(1 + brute_force_path(game, idx, cells - {idx}),
+                                 own_length)
+
+    def test_outcome_matches_game_tree(self):
+        for game in separated_positions(5, 5, range(15), isolation.BitBoard):
+            move, own_length, opp_length = \
+                endgame.EndgameSolver(5, 5).solve(game)
+            wins = active_player_wins(game)
+            self.assertEqual(own_length > opp_length, wins)
+            if wins:
+                self.assertFalse(active_player_wins(game.forecast_move(move)))
+
+    def test_timeout(self):
+        game = next(separated_positions(7, 7, range(5)))
+        solver = endgame.EndgameSolver(7, 7)
+        with mock.patch.object(endgame, "POLL_NODES", 1):
+            self.assertRaises(endgame.SolverTimeout, solver.solve, game,
+                              lambda: -1., 0.)
+        self.assertIsNotNone(solver.solve(game))
+
+    def test_player_plays_solver_move(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score)
+        games = [game for game in separated_positions(
+                     7, 7, range(5), players=(player, "Player2"))
+                 if game.active_player == player]
+        self.assertTrue(games)
+        for game in games:
+            move = player.get_move(game, lambda: 150.)
+            self.assertEqual(move, endgame.EndgameSolver(7, 7).solve(game)[0])
+        self.assertEqual(player.endgame_solves, len(games))
+
+
+if __name__ == '__main__':
+    unittest.main()
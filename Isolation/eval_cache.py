@@ -0,0 +1,97 @@
+"""Evaluation cache for the score functions of the search agents.
+
+Every leaf of a search calls the score function, which typically generates
+the legal moves of both players again (and `is_winner()`/`is_loser()`
+generate them once more). The same positions come back many times: through
+transpositions inside one pass, in every pass of iterative deepening, and on
+the next turns. Wrapping the score function in an `EvalCache` turns those
+repeated evaluations into a dictionary lookup:
+
+    player = AlphaBetaPlayer(score_fn=EvalCache(improved_score, size_mb=4))
+
+The cache is keyed on the Zobrist key of the position (`Board.hash()`) and
+the side the position is scored for, so it is only valid for score functions
+that depend on nothing else -- which holds for every score function in
+game_agent.py and sample_players.py. All of them but `center_score` (whose
+centre is off by half a cell) also score the reflections and rotations of a
+position alike, so with `symmetric=True` the cache can use the canonical key
+of the position (`Board.canonical_hash()`) and store every symmetry class
+once.
+"""
+from collections import OrderedDict
+
+# Memory cost of one cached score as measured with tracemalloc on CPython 3
+# (64-bit): the entry of the ordered dict with its links, a 64-bit key (36
+# bytes) and a float score (24).
+ENTRY_BYTES = 165
+
+
+class EvalCache(object):
+    """Bounded least recently used cache of the values of `score_fn`.
+
+    An `EvalCache` is called like the score function it wraps, and can be
+    passed as the `score_fn` of any `IsolationPlayer`.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The score function to cache, called as `score_fn(game, player)`.
+
+    size_mb : float (optional)
+        The memory budget of the cache in megabytes, turned into a number of
+        entries using the measured size of one entry. When the cache is full
+        the least recently used score is evicted.
+
+    symmetric : bool (optional)
+        If True, positions that are symmetric images of each other share one
+        entry. Only valid for score functions that are invariant under the
+        board symmetries.
+
+    Attributes
+    ----------
+    hits, misses, evictions : int
+        The counters since the cache was created or last cleared; see
+        `stats()`.
+    """
+
+    def __init__(self, score_fn, size_mb=4., symmetric=False):
+        self.score_fn = score_fn
+        self.symmetric = symmetric
+        self.capacity = max(1, int(size_mb * 2**20) // ENTRY_BYTES)
+        self.__name__ = getattr(score_fn, "__name__", type(self).__name__)
+        self.clear()
+
+    def clear(self):
+        """Remove every score from the cache and reset the counters. """
+        self._scores = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def __call__(self, game, player):
+        if self.symmetric:
+            key = 2 * game.canonical_hash()[0]
+        else:
+            key = 2 * game.hash()
+        key += player == game.active_player
+        scores = self._scores
+        score = scores.get(key)
+        if score is not None:
+            scores.move_to_end(key)
+            self.hits += 1
+            return score
+        self.misses += 1
+        score = self.score_fn(game, player)
+        scores[key] = score
+        if len(scores) > self.capacity:
+            scores.popitem(last=False)
+            self.evictions += 1
+        return score
+
+    def stats(self):
+        """Return a dict with the counters and the hit rate of the cache. """
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "size": len(self._scores),
+                "hit_rate": self.hits / lookups if lookups else 0.}
+
+    def __len__(self):
+        return len(self._scores)
@@ -0,0 +1,98 @@
+"""Unit tests for the evaluation cache."""
+
+import unittest
+
+import isolation
+import game_agent
+import sample_players
+
+from eval_cache import EvalCache, ENTRY_BYTES
+
+
+class CountingScore(object):
+    """improved_score that counts its calls. """
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, game, player):
+        self.calls += 1
+        return sample_players.improved_score(game, player)
+
+
+def positions(count):
+    """Return `count` distinct positions of a game between Player1 and
+    Player2.
+    """
+    game = isolation.Board("Player1", "Player2")
+    game.apply_move((3, 3))
+    return [game.forecast_move(move) for move in game.get_legal_moves()][:count]
+
+
+class EvalCacheTest(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        score = CountingScore()
+        cache = EvalCache(score)
+        game = positions(1)[0]
+        value = cache(game, "Player1")
+        self.assertEqual(cache(game, "Player1"), value)
+        self.assertEqual(cache(game.copy(), "Player1"), value)
+        self.assertEqual(score.calls, 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertAlmostEqual(cache.stats()["hit_rate"], 2 / 3)
+
+    def test_scores_each_side_separately(self):
+        score = CountingScore()
+        cache = EvalCache(score)
+        game = positions(1)[0]
+        self.assertEqual(cache(game, "Player1"),
+                         sample_players.improved_score(game, "Player1"))
+        self.assertEqual(cache(game, "Player2"),
+                         sample_players.improved_score(game, "Player2"))
+        self.assertEqual(score.calls, 2)
+
+    def test_least_recently_used_is_evicted(self):
+        score = CountingScore()
+        cache = EvalCache(score, size_mb=2 * ENTRY_BYTES / 2**20)
+        self.assertEqual(cache.capacity, 2)
+        first, second, third = positions(3)
+        cache(first, "Player1")
+        cache(second, "Player1")
+        cache(first, "Player1")  # second is now the least recently used
+        cache(third, "Player1")
+        self.assertEqual((len(cache), cache.evictions), (2, 1))
+        cache(first, "Player1")
+        self.assertEqual(score.calls, 3)
+        cache(second, "Player1")
+        self.assertEqual(score.calls, 4)
+
+    def test_symmetric_positions_share_an_entry(self):
+        score = CountingScore()
+        cache = EvalCache(score, symmetric=True)
+        game = isolation.Board("Player1", "Player2")
+        mirror = isolation.Board("Player1", "Player2")
+        for (row, col) in [(3, 3), (0, 0), (1, 2)]:
+            game.apply_move((row, col))
+            mirror.apply_move((col, row))
+        self.assertNotEqual(game.hash(), mirror.hash())
+        self.assertEqual(cache(game, "Player1"), cache(mirror, "Player1"))
+        self.assertEqual(score.calls, 1)
+
+    def test_search_scores_are_unchanged(self):
+        scores = []
+        for score_fn in (sample_players.improved_score,
+                         EvalCache(sample_players.improved_score)):
+            player = game_agent.AlphaBetaPlayer(score_fn=score_fn)
+            player.time_left = lambda: 1000.
+            game = isolation.Board(player, "Opponent")
+            for move in [(3, 3), (0, 0), (1, 2), (2, 2)]:
+                game.apply_move(move)
+            for depth in range(1, 6):
+                player.alphabeta(game, depth)
+                scores.append(player.last_score)
+        self.assertEqual(scores[:5], scores[5:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,19 @@ and include the results in your report.
 import random
 import math
 
+from batch_eval import batch_version
+from endgame import EndgameSolver, SolverTimeout
+from move_ordering import MoveOrdering, make_ordering
+from opening_book import OpeningBook
+from search_stats import SearchStats
+from time_manager import TimeManager
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Late move reductions: the moves of a node searched at full depth before
+# the later ones are reduced, and the fewest plies left for a reduction
+LMR_MOVES = 3
+LMR_DEPTH = 3
+
 
 class SearchTimeout(Exception):
     """Subclass base exception for code clarity. """
@@ -19,6 +32,80 @@ def time_check(self):
     if self.time_left() < self.TIMER_THRESHOLD:
         raise SearchTimeout()
 
+def forecast(self, game, move):
+    '''
+        Returns the successor of game after move, given as a cell index.
+        When the player searches in place the move is applied to game
+        itself, and the caller must take it back with retract() once the
+        child has been searched
+    '''
+    if self.in_place:
+        game.apply_index(move)
+        return game
+    return game.forecast_index(move)
+
+def retract(self, game):
+    '''
+        Takes back the move applied by the matching call to forecast()
+    '''
+    if self.in_place:
+        game.undo_move()
+
+def search_functions(self, game):
+    '''
+        Returns the move generator and the evaluation function used by the
+        search: the plain ones, or timed ones if statistics are collected
+    '''
+    if self.stats is None:
+        return type(game).get_legal_indices, self.score
+    return self.stats.legal_moves, self.stats.timed_score(self.score)
+
+def report_stats(self, depth):
+    '''
+        Finishes the statistics of the move, if they are collected, and
+        passes their record to the stats sink
+    '''
+    if self.stats is None:
+        return
+    self.stats.finish(self.time_left(), depth)
+    if self.stats_sink is not None:
+        self.stats_sink(self.stats.to_dict())
+
+def probe_table(self, game, depth, alpha, beta):
+    '''
+        Looks the position up in the transposition table. Returns a pair
+        (stored, hash_move): stored is the (score, move) of an entry that was
+        searched deep enough and whose bound settles the node within
+        (alpha, beta), or None; hash_move is the best move of the entry, if
+        any, to be searched first
+    '''
+    if self.tt is None:
+        return None, None
+    entry = self.tt.probe(game.hash())
+    if entry is None:
+        return None, None
+    _, e_depth, score, bound, move, _ = entry
+    if e_depth >= depth and (bound == EXACT or
+                             (bound == LOWER and score >= beta) or
+                             (bound == UPPER and score <= alpha)):
+        return (score, move), move
+    return None, move
+
+def store_table(self, game, depth, alpha, beta, score, move):
+    '''
+        Records a searched node in the transposition table, classifying
+        the score against the window (alpha, beta) it was searched with
+    '''
+    if self.tt is None:
+        return
+    if score <= alpha:
+        bound = UPPER
+    elif score >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    self.tt.store(game.hash(), depth, score, bound, move)
+
 def custom_score(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -239,7 +326,26 @@ class MinimaxPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using depth-limited minimax
     search. You must finish and test this player to make sure it properly uses
     minimax to return a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        If True, search by applying and undoing moves on a single copy of the
+        board instead of calling `forecast_move()` at every node. Both modes
+        visit exactly the same nodes; `python benchmark.py boards` compares
+        their speed, which is no better in place.
+
+    collect_stats : bool (optional)
+        If True, every call to get_move() leaves a `search_stats.SearchStats`
+        in `self.stats` and passes its record to `self.stats_sink`, if set.
     """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, collect_stats=False):
+        super().__init__(search_depth, score_fn, timeout)
+        self.in_place = in_place
+        self.collect_stats = collect_stats
+        self.stats = None
+        self.stats_sink = None
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -270,6 +376,7 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        self.stats = SearchStats(time_left()) if self.collect_stats else None
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -278,15 +385,18 @@ class MinimaxPlayer(IsolationPlayer):
             best_move = (-1,-1)
         else:
             best_move = legal_moves[random.randint(0, len(legal_moves))-1]
+        depth = 0
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
             
             best_move = self.minimax(game, self.search_depth)
+            depth = self.search_depth
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
 
+        report_stats(self, depth)
         # Return the best move from the last completed search iteration
         return best_move
 
@@ -332,15 +442,16 @@ class MinimaxPlayer(IsolationPlayer):
         def min_value(game, depth):
             #Check the time
             time_check(self)
-            moves = game.get_legal_moves()
+            moves = get_moves(game)
             # No moves or at root, return the derived score
             if not moves or depth == 0:
-                return self.score(game, self)
+                return score_fn(game, self)
             # Set the upper bound for the score
             best_score = float('inf')
             for move in moves:
                 # Forecast the next move
-                score = max_value(game.forecast_move(move), depth-1)
+                score = max_value(forecast(self, game, move), depth-1)
+                retract(self, game)
                 if score < best_score:
                     best_score = score
             return best_score
@@ -348,16 +459,17 @@ class MinimaxPlayer(IsolationPlayer):
         def max_value(game, depth):
             # Check the time
             time_check(self)
-            moves = game.get_legal_moves()
+            moves = get_moves(game)
             # No moves or at root, return the derived score
             if not moves or depth == 0:
-                return self.score(game, self)
+                return score_fn(game, self)
             # Set the lower bound for the score
             best_score = float('-inf')
             #Iterate through available moves
             for move in moves:
                 # Forecast gameplay from the move
-                score = min_value(game.forecast_move(move), depth-1)
+                score = min_value(forecast(self, game, move), depth-1)
+                retract(self, game)
                 if score > best_score:
                     best_score = score
             return best_score
@@ -369,7 +481,7 @@ class MinimaxPlayer(IsolationPlayer):
                 forecasted by stepping through min_value and max_value
             '''
             time_check(self)
-            player_moves = game.get_legal_moves()
+            player_moves = get_moves(game)
             best_move = (-1,-1)
             if not player_moves or depth == 0:
                 return best_move
@@ -378,13 +490,19 @@ class MinimaxPlayer(IsolationPlayer):
             # iterate through the available moves, find the one with
             # the best potential for a win
             for move in player_moves:
-                score = min_value(game.forecast_move(move), depth-1)            
+                score = min_value(forecast(self, game, move), depth-1)
+                retract(self, game)
                 if score > best_score:
-                    best_move = move
+                    best_move = game.index_to_move(move)
                     best_score = score 
             # Return the best value at depth == self.search_depth     
             return best_move
 
+        get_moves, score_fn = search_functions(self, game)
+        # Searching in place mutates the board, so work on a private copy
+        # that is left in an arbitrary state if the search times out
+        if self.in_place:
+            game = game.copy()
         if len(game.get_legal_moves()) == (game.width*game.height):
             best_move = (math.ceil(game.width/2), math.ceil(game.height/2))
         else:
@@ -398,7 +516,163 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        If True, search by applying and undoing moves on a single copy of the
+        board instead of calling `forecast_move()` at every node. Both modes
+        visit exactly the same nodes; `python benchmark.py boards` compares
+        their speed, which is no better in place.
+
+    tt_mb : float (optional)
+        Approximate memory budget in megabytes of the transposition table
+        kept across searches; 0 disables the table. `self.tt.stats()` reports
+        the table counters of the last call to get_move() only, while
+        `self.tt.stats(cumulative=True)` covers every turn since the table
+        was last cleared.
+
+    ordering : str or `move_ordering.MoveOrdering` (optional)
+        The move ordering used at every node: one of "none" (generation
+        order), "hash", "killers" or "history" (each adds to the previous
+        one), or a configured `MoveOrdering` instance.
+
+    pv_reuse : bool (optional)
+        If True, search the principal variation of the previous iterative
+        deepening pass first on the next pass.
+
+    aspiration : float (optional)
+        Half-width of the aspiration window centred on the score of the
+        previous pass, in `score_fn` units; a search that fails high or low
+        is repeated with that side of the window opened. None disables
+        aspiration windows.
+
+    book : str or `opening_book.OpeningBook` (optional)
+        An opening book (see build_book.py), or the path of one; positions
+        found in the book are played without searching, and counted in
+        `self.book_hits`. Without a book move, the first move of the game is
+        played in the centre.
+
+    endgame : bool (optional)
+        If True, positions where the players can no longer reach a common
+        cell are solved exactly with `endgame.EndgameSolver` instead of
+        searched, using up to half of the time of the move; moves played by
+        the solver are counted in `self.endgame_solves`.
+
+    time_manager : bool or `time_manager.TimeManager` (optional)
+        If True (the default), a `TimeManager` with the default settings
+        decides whether each iteration of iterative deepening can finish in
+        time, and the clock is only read every `poll_nodes` nodes; a
+        configured `TimeManager` can be passed instead. If False, the player
+        deepens until the time runs out and reads the clock at every node.
+        Iterations not started because they were predicted not to finish
+        are counted in `self.skipped_iterations`.
+
+    collect_stats : bool (optional)
+        If True, every call to get_move() leaves a `search_stats.SearchStats`
+        in `self.stats` and passes its record to `self.stats_sink`, if set.
+
+    batch_eval : bool (optional)
+        If True and `score_fn` has a vectorised version (see batch_eval.py,
+        which needs numpy), the children of the nodes one ply above the
+        leaves are scored in one batch when there are at least `batch_min`
+        of them, and the node takes the value of the best child, as if the
+        children had been searched best first. Every scored child counts as
+        a node searched, even when the best one causes a cutoff. Batch
+        scoring is disabled while `collect_stats` is True, since the
+        statistics record the cutoffs of the children searched one by one.
+
+    batch_min : int (optional)
+        The fewest children scored as a batch; by default the crossover
+        point measured by `python batch_eval.py` for `score_fn`.
+
+    negamax : bool (optional)
+        If True, search with a single negamax recursion instead of separate
+        max and min levels. On its own it visits exactly the same nodes;
+        `pvs` and `lmr` imply it.
+
+    pvs : bool (optional)
+        If True, use principal variation search: the first move of every
+        node is searched with the full window, and the others with a null
+        window that only tells whether they beat it, searching them again
+        with the full window when they do.
+
+    lmr : int (optional)
+        Late move reductions: the plies by which the moves after the first
+        `lmr_moves` of a node with at least `lmr_depth` plies left are
+        searched less deep; a reduced move that beats the best score is
+        searched again at full depth. 0 (the default) disables reductions.
+        Reductions make the search inexact, in exchange for more depth.
+
+    lmr_moves, lmr_depth : int (optional)
+        See `lmr`.
+
+    Setting `self.root_moves` to a set of cell indices restricts the moves
+    searched at the root to that set, so that several players can share the
+    root moves of one search (see parallel.py).
+
+    After every call to get_move(), `self.nodes` holds the number of nodes
+    searched, `self.scout_researches` the number of moves searched again
+    after a null window or a reduced search, `self.depth_reached` the
+    deepest completed iteration, and `self.pv` and `self.pv_score` the
+    principal variation and score of that iteration (from the point of view
+    of this player);
+    `self.total_nodes`, `self.total_depth` and `self.total_moves` accumulate
+    them over every call so tournaments can report averages.
+    `self.wasted_ms` holds the milliseconds spent in the iteration aborted by
+    the timeout, if any, and `self.total_wasted_ms` their sum over every
+    call.
     """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, tt_mb=0, ordering="history", pv_reuse=True,
+                 aspiration=None, book=None, endgame=True,
+                 time_manager=True, collect_stats=False, batch_eval=False,
+                 batch_min=None, negamax=False, pvs=False, lmr=0,
+                 lmr_moves=LMR_MOVES, lmr_depth=LMR_DEPTH):
+        super().__init__(search_depth, score_fn, timeout)
+        self.in_place = in_place
+        self.pvs = pvs
+        self.lmr = lmr
+        self.lmr_moves = lmr_moves
+        self.lmr_depth = lmr_depth
+        self.negamax = negamax or pvs or bool(lmr)
+        self.scout_researches = 0
+        self.batch_score = batch_version(score_fn) if batch_eval else None
+        if batch_min is None and self.batch_score is not None:
+            batch_min = self.batch_score.batch_min
+        self.batch_min = batch_min
+        self.collect_stats = collect_stats
+        self.stats = None
+        self.stats_sink = None
+        self.tt = TranspositionTable(tt_mb) if tt_mb else None
+        if not isinstance(ordering, MoveOrdering):
+            ordering = make_ordering(ordering)
+        self.ordering = ordering
+        self.pv_reuse = pv_reuse
+        self.aspiration = aspiration
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        self.book_hits = 0
+        self.endgame = endgame
+        self.endgame_solves = 0
+        self._solver = None
+        if time_manager is True:
+            time_manager = TimeManager()
+        self.time_manager = time_manager or None
+        self.wasted_ms = 0.
+        self.total_wasted_ms = 0.
+        self.skipped_iterations = 0
+        self.pv = ()
+        self.pv_score = None
+        self.last_pv = ()
+        self.last_score = None
+        self.research_count = 0
+        self.nodes = 0
+        self.depth_reached = 0
+        self.total_nodes = 0
+        self.total_depth = 0
+        self.total_moves = 0
+        self._tt_side = None
+        self.root_moves = None
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -431,6 +705,8 @@ class AlphaBetaPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        self.new_search(game)
+        self.stats = SearchStats(time_left()) if self.collect_stats else None
 
         #Implement the iterative deepening search
         '''
@@ -445,20 +721,135 @@ class AlphaBetaPlayer(IsolationPlayer):
             best_move = (-1,-1)
         else:
             best_move = legal_moves[random.randint(0, len(legal_moves))-1]
+
+        # Play from the opening book when it knows the position
+        if self.book is not None:
+            book_move = self.book.lookup(game)
+            if book_move is not None:
+                self.book_hits += 1
+                report_stats(self, 0)
+                return book_move
+        #If the game is unplayed, play the center move
+        if len(legal_moves) == (game.width*game.height):
+            best_move = (math.ceil(game.width/2), math.ceil(game.height/2))
+            self.pv, self.pv_score = (best_move,), 0.
+            report_stats(self, 0)
+            return best_move
+        # Separated positions are solved exactly
+        if self.endgame and legal_moves:
+            solved = self.solve_endgame(game, time_left)
+            if solved is not None:
+                self.endgame_solves += 1
+                report_stats(self, 0)
+                return solved
+
         depth = 0
+        # No game can last longer than the number of open cells, so deeper
+        # passes would only repeat the last exhaustive search
+        max_depth = len(game.get_blank_spaces())
+        manager = self.time_manager
+        search_start = time_left()
+        if manager is not None:
+            manager.start(game, search_start, self.TIMER_THRESHOLD)
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            while time_left() > self.TIMER_THRESHOLD:
+            while time_left() > self.TIMER_THRESHOLD and depth < max_depth:
+                if manager is not None and not manager.next_iteration_fits(
+                        search_start - time_left()):
+                    self.skipped_iterations += 1
+                    break
                 depth += 1
-                best_move = self.alphabeta(game, depth)   
+                iteration_start, iteration_nodes = time_left(), self.nodes
+                best_move = self.aspiration_search(game, depth)
+                self.depth_reached = depth
+                self.pv, self.pv_score = self.last_pv, self.last_score
+                if manager is not None:
+                    manager.iteration_done(self.nodes - iteration_nodes,
+                                           iteration_start - time_left())
+                if self.stats is not None:
+                    self.stats.iteration_nodes.append(self.nodes -
+                                                      iteration_nodes)
 
         except SearchTimeout:
-            pass  # Handle any actions required after timeout as needed
-        
+            # The partial iteration is thrown away
+            self.wasted_ms = iteration_start - time_left()
+
+        self.total_wasted_ms += self.wasted_ms
+        self.total_nodes += self.nodes
+        self.total_depth += self.depth_reached
+        self.total_moves += 1
+        report_stats(self, self.depth_reached)
         return best_move
 
-        
+    def solve_endgame(self, game, time_left):
+        """Return the optimal move of `game` if the players are separated and
+        the solver finishes within half of the remaining time, else None.
+        The solver memo is kept while the game stays separated.
+        """
+        if self._solver is None or \
+                (self._solver.width, self._solver.height) != (game.width,
+                                                              game.height):
+            self._solver = EndgameSolver(game.width, game.height)
+        stop_at = max(self.TIMER_THRESHOLD, time_left() / 2)
+        try:
+            solved = self._solver.solve(game, time_left, stop_at)
+        except SolverTimeout:
+            return None
+        if solved is None:
+            self._solver.memo.clear()
+            return None
+        move, own_length, opp_length = solved
+        self.pv = (move,)
+        if opp_length is None:
+            self.pv_score = None
+        elif own_length > opp_length:
+            self.pv_score = float("inf")
+        else:
+            self.pv_score = float("-inf")
+        return move
+
+    def new_search(self, game):
+        """Reset the per-search counters before searching for a move in
+        `game`. Entries of the transposition table score positions from the
+        point of view of this player, so the table is cleared when the player
+        starts searching for the other side of the board.
+        """
+        self.nodes = 0
+        self.depth_reached = 0
+        self.wasted_ms = 0.
+        self.pv = ()
+        self.pv_score = None
+        self.research_count = 0
+        self.scout_researches = 0
+        self.ordering.new_search()
+        if self.tt is not None:
+            side = game.move_count % 2
+            if side != self._tt_side:
+                self.tt.clear()
+                self._tt_side = side
+            self.tt.new_search()
+
+    def aspiration_search(self, game, depth):
+        """Search `game` to `depth` plies inside an aspiration window around
+        the score of the previous iteration, widening the failing side of the
+        window and searching again whenever the score falls outside it.
+        Returns the best move, like alphabeta().
+        """
+        if self.aspiration is None or self.pv_score is None or \
+                math.isinf(self.pv_score):
+            return self.alphabeta(game, depth)
+        alpha = self.pv_score - self.aspiration
+        beta = self.pv_score + self.aspiration
+        while True:
+            best_move = self.alphabeta(game, depth, alpha, beta)
+            if self.last_score <= alpha and alpha > float("-inf"):
+                alpha = float("-inf")
+            elif self.last_score >= beta and beta < float("inf"):
+                beta = float("inf")
+            else:
+                return best_move
+            self.research_count += 1
 
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf"), maximizingPlayer=True):
         """Implement depth-limited minimax search with alpha-beta pruning as
@@ -492,7 +883,9 @@ class AlphaBetaPlayer(IsolationPlayer):
         -------
         (int, int)
             The board coordinates of the best move found in the current search;
-            (-1, -1) if there are no legal moves
+            (-1, -1) if there are no legal moves. The score of the root and the
+            principal variation found are left in `self.last_score` and
+            `self.last_pv`.
 
         Notes
         -----
@@ -505,43 +898,212 @@ class AlphaBetaPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
+        # The search works on cell indices (see `Board.get_legal_indices()`)
+        # and only converts the result back to a (row, column) pair.
+        # pv_table[ply] holds the best line found below the node at ply;
+        # prev_pv is the principal variation of the previous pass
+        pv_table = [()] * (depth + 2)
+        # the clock is read at every node unless a time manager says otherwise
+        poll = self.time_manager.poll_nodes if self.time_manager else 1
+        prev_pv = (tuple(game.move_to_index(move) for move in self.pv)
+                   if self.pv_reuse else ())
+        get_moves, score_fn = search_functions(self, game)
+        stats = self.stats
+        batch_score = self.batch_score if stats is None else None
+
+        def frontier(game, moves, ply, bound, maximizing):
+            '''
+                Scores the children of a node one ply above the leaves in one
+                batch. Searched best first, the best child either causes the
+                cutoff (beta at a max node, alpha at a min node) on its own
+                or every child is searched, and the node takes the score of
+                the best child
+            '''
+            scores = batch_score(game, moves, self)
+            pick = max if maximizing else min
+            best = pick(range(len(moves)), key=scores.__getitem__)
+            best_score, best_move = scores[best], moves[best]
+            if best_score >= bound if maximizing else best_score <= bound:
+                self.ordering.record_cutoff(best_move, ply, 1)
+            # every child was scored, as a scalar search without a cutoff
+            self.nodes += len(moves)
+            pv_table[ply] = (best_move,)
+            return best_score, best_move
 
-        def min_value(game, m_depth, alpha, beta):
-            time_check(self)
-            moves = game.get_legal_moves()
-            best_move = (-1,-1)
+        def order_moves(moves, ply, hash_move, on_pv):
+            '''
+                Orders the moves of a node, searching the move of the previous
+                principal variation first while the path still follows it
+            '''
+            moves = self.ordering.order(moves, ply, hash_move)
+            pv_move = prev_pv[ply] if on_pv and ply < len(prev_pv) else None
+            if pv_move is not None and pv_move in moves:
+                moves = [pv_move] + [m for m in moves if m != pv_move]
+            return moves, pv_move
+
+        def min_value(game, m_depth, alpha, beta, on_pv=False):
+            if self.nodes % poll == 0:
+                time_check(self)
+            self.nodes += 1
+            ply = depth - m_depth
+            pv_table[ply] = ()
+            moves = get_moves(game)
+            best_move = None
             if not moves or m_depth == 0:
-                return self.score(game, self), best_move
+                return score_fn(game, self), best_move
+            # Reuse a stored result for this position if it is good enough
+            stored, hash_move = probe_table(self, game, m_depth, alpha, beta)
+            if stored is not None:
+                return stored
+            if m_depth == 1 and batch_score is not None and \
+                    len(moves) >= self.batch_min:
+                best_score, best_move = frontier(game, moves, ply, alpha,
+                                                 False)
+                store_table(self, game, m_depth, alpha, beta, best_score,
+                            best_move)
+                return best_score, best_move
+            moves, pv_move = order_moves(moves, ply, hash_move, on_pv)
+            alpha_orig, beta_orig = alpha, beta
             # Set the upper bound
             best_score = float('inf')
             for move in moves:
-                score, c_move = max_value(game.forecast_move(move), m_depth-1, alpha, beta)
+                score, c_move = max_value(forecast(self, game, move), m_depth-1,
+                                          alpha, beta, on_pv and move == pv_move)
+                retract(self, game)
                 if score < best_score:
                     best_score = score
                     best_move = move
+                    pv_table[ply] = (move,) + pv_table[ply + 1]
                 if best_score <= alpha:
-                    return best_score, best_move
+                    self.ordering.record_cutoff(move, ply, m_depth)
+                    if stats is not None:
+                        stats.cutoff(moves.index(move))
+                    break
                 # Update beta if needed
                 beta = min(beta, best_score)
+            store_table(self, game, m_depth, alpha_orig, beta_orig, best_score, best_move)
             return best_score, best_move
 
-        def max_value(game, m_depth, alpha, beta):
-            time_check(self)
-            moves = game.get_legal_moves()
-            best_move = (-1,-1)
+        def max_value(game, m_depth, alpha, beta, on_pv=False):
+            if self.nodes % poll == 0:
+                time_check(self)
+            self.nodes += 1
+            ply = depth - m_depth
+            pv_table[ply] = ()
+            moves = get_moves(game)
+            best_move = None
             if not moves or m_depth == 0:
-                return self.score(game, self), best_move
+                return score_fn(game, self), best_move
+            # Reuse a stored result for this position if it is good enough
+            stored, hash_move = probe_table(self, game, m_depth, alpha, beta)
+            if ply == 0 and self.root_moves is not None:
+                # a split root only searches its share of the moves, so the
+                # stored result of another share does not apply
+                moves = [move for move in moves if move in self.root_moves]
+                stored = None
+            if stored is not None:
+                return stored
+            if m_depth == 1 and batch_score is not None and \
+                    len(moves) >= self.batch_min:
+                best_score, best_move = frontier(game, moves, ply, beta, True)
+                store_table(self, game, m_depth, alpha, beta, best_score,
+                            best_move)
+                return best_score, best_move
+            moves, pv_move = order_moves(moves, ply, hash_move, on_pv)
+            alpha_orig, beta_orig = alpha, beta
             # Set the lower bound
             best_score = float('-inf')
             for move in moves:
-                score,c_move = min_value(game.forecast_move(move), m_depth-1, alpha, beta)
+                score,c_move = min_value(forecast(self, game, move), m_depth-1,
+                                         alpha, beta, on_pv and move == pv_move)
+                retract(self, game)
                 if score > best_score:
                     best_score = score
                     best_move = move
+                    pv_table[ply] = (move,) + pv_table[ply + 1]
                 if best_score >= beta:
-                    return best_score, best_move
+                    self.ordering.record_cutoff(move, ply, m_depth)
+                    if stats is not None:
+                        stats.cutoff(moves.index(move))
+                    break
                 # Update alpha if needed
                 alpha = max(alpha, best_score)
+            store_table(self, game, m_depth, alpha_orig, beta_orig, best_score, best_move)
+            return best_score, best_move
+
+        def negamax(game, m_depth, alpha, beta, color, ply, on_pv=False):
+            '''
+                Searches game with the scores negated for the opponent of
+                this player (color -1), so every node maximizes; the table
+                and the score function still score positions for this player
+            '''
+            if self.nodes % poll == 0:
+                time_check(self)
+            self.nodes += 1
+            pv_table[ply] = ()
+            moves = get_moves(game)
+            best_move = None
+            if not moves or m_depth <= 0:
+                return color * score_fn(game, self), best_move
+            # The window of this player matching (alpha, beta)
+            if color == 1:
+                own_alpha, own_beta = alpha, beta
+            else:
+                own_alpha, own_beta = -beta, -alpha
+            stored, hash_move = probe_table(self, game, m_depth, own_alpha,
+                                            own_beta)
+            if ply == 0 and self.root_moves is not None:
+                moves = [move for move in moves if move in self.root_moves]
+                stored = None
+            if stored is not None:
+                return color * stored[0], stored[1]
+            if m_depth == 1 and batch_score is not None and \
+                    len(moves) >= self.batch_min:
+                best_score, best_move = frontier(
+                    game, moves, ply, own_beta if color == 1 else own_alpha,
+                    color == 1)
+                store_table(self, game, m_depth, own_alpha, own_beta,
+                            best_score, best_move)
+                return color * best_score, best_move
+            moves, pv_move = order_moves(moves, ply, hash_move, on_pv)
+            best_score = float('-inf')
+            for i, move in enumerate(moves):
+                child = forecast(self, game, move)
+                child_pv = on_pv and move == pv_move
+                if i == 0:
+                    score = -negamax(child, m_depth - 1, -beta, -alpha,
+                                     -color, ply + 1, child_pv)[0]
+                else:
+                    reduction = 0
+                    if self.lmr and i >= self.lmr_moves and \
+                            m_depth >= self.lmr_depth:
+                        reduction = self.lmr
+                    # A null window only tells whether the move beats alpha
+                    scout = math.nextafter(alpha, float("inf")) \
+                        if self.pvs else beta
+                    score = -negamax(child, m_depth - 1 - reduction, -scout,
+                                     -alpha, -color, ply + 1, child_pv)[0]
+                    if reduction and score > alpha:
+                        self.scout_researches += 1
+                        score = -negamax(child, m_depth - 1, -scout, -alpha,
+                                         -color, ply + 1, child_pv)[0]
+                    if self.pvs and alpha < score < beta:
+                        self.scout_researches += 1
+                        score = -negamax(child, m_depth - 1, -beta, -alpha,
+                                         -color, ply + 1, child_pv)[0]
+                retract(self, game)
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+                    pv_table[ply] = (move,) + pv_table[ply + 1]
+                if best_score >= beta:
+                    self.ordering.record_cutoff(move, ply, m_depth)
+                    if stats is not None:
+                        stats.cutoff(i)
+                    break
+                alpha = max(alpha, best_score)
+            store_table(self, game, m_depth, own_alpha, own_beta,
+                        color * best_score, best_move)
             return best_score, best_move
 
         def AlphaBetaSearch(game, depth, alpha, beta):
@@ -556,18 +1118,32 @@ class AlphaBetaPlayer(IsolationPlayer):
                 is the one returned. 
             '''
             time_check(self)
-            best_score, best_move = max_value(game, depth, alpha, beta)
-            return best_move
-        
-        #If the game is unplayed, play the center move
-        if len(game.get_legal_moves()) == (game.width*game.height):
-            best_move = (math.ceil(game.width/2), math.ceil(game.height/2))
-        else:
-            # Perform AlphaBeta to determine the next best move
-            best_move = AlphaBetaSearch(game, depth, alpha, beta)
+            if self.negamax:
+                best_score, best_move = negamax(game, depth, alpha, beta, 1, 0,
+                                                True)
+            else:
+                best_score, best_move = max_value(game, depth, alpha, beta,
+                                                  True)
+            self.last_score = best_score
+            if best_move is None:
+                self.last_pv = ((-1, -1),)
+                return (-1, -1)
+            # a transposition table cutoff at the root leaves no line behind
+            self.last_pv = tuple(game.index_to_move(move)
+                                 for move in pv_table[0] or (best_move,))
+            return game.index_to_move(best_move)
+
+        # Searching in place mutates the board, so work on a private copy
+        # that is left in an arbitrary state if the search times out
+        if self.in_place:
+            game = game.copy()
+        # Perform AlphaBeta to determine the next best move
+        best_move = AlphaBetaSearch(game, depth, alpha, beta)
         legal_moves = game.get_legal_moves()
         # If there is no best move, check to see if there are any legal
-        # moves left to avoid a forfeit
-        if best_move == (-1,-1) and len(legal_moves) > 0:
+        # moves left to avoid a forfeit; a search restricted to some root
+        # moves leaves the choice to its caller (see parallel.py)
+        if best_move == (-1,-1) and len(legal_moves) > 0 and \
+                self.root_moves is None:
             best_move = legal_moves[random.randint(0, len(legal_moves))-1]
         return best_move
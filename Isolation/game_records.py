@@ -0,0 +1,339 @@
+"""Compact binary archive of Isolation games.
+
+`Board.play()` returns the move history as a list of [row, column] lists and
+the tournament results files store it as JSON, which takes 10-20 bytes per
+move. A game record file stores the same games in 8 bytes plus one byte per
+move (and four per move time when the times are kept):
+
+    file header : the magic bytes b"ISOG" and the format version (1 byte)
+    record      : header  "<BBBHHB" width, height, opening plies, moves,
+                          move times and result, 8 bytes
+                  opening one cell index (`row + column * height`) per ply
+                  moves   one cell index per move played after the opening
+                  times   one float32 per move time, in milliseconds
+
+The result byte holds the winner (0 for the first player, 1 for the second)
+in bit 0 and the termination code (an index into TERMINATIONS) in the bits
+above. Records are only ever appended, and every record starts with a fixed
+size header, so a reader can filter games on the header without decoding
+the rest, and skips the truncated last record left by a crash in the middle
+of a write; a writer drops that record before appending new ones.
+
+    with RecordWriter("games.isog") as writer:
+        writer.write(GameRecord.from_game(7, 7, opening, moves, winner=0,
+                                          termination="illegal move"))
+    for record in RecordReader("games.isog").records(min_moves=20):
+        game = replay(record)
+
+Usage: python game_records.py FILE [--import RESULTS ...] [--json OUT]
+
+appends the games of the tournament results files RESULTS to FILE, prints
+the number of games and moves in FILE, and with --json writes every game to
+OUT as one JSON list of [row, column] moves per line, the format pasted into
+isoviz/display.html.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+
+from collections import namedtuple
+
+from isolation import Board
+from results import ResultsStore
+
+MAGIC = b"ISOG"
+VERSION = 1
+FILE_HEADER = MAGIC + bytes([VERSION])
+RECORD_HEADER = struct.Struct("<BBBHHB")
+TIME_FORMAT = "<{}f"
+TIME_BYTES = 4
+
+# Why the loser lost, as returned by `Board.play()`; "" when unknown
+TERMINATIONS = ["", "illegal move", "forfeit", "timeout"]
+
+# A cell index must fit in one byte
+MAX_CELLS = 256
+
+
+class GameRecord(namedtuple("GameRecord", ["width", "height", "opening",
+                                           "moves", "winner", "termination",
+                                           "think_ms"])):
+    """One archived game.
+
+    Attributes
+    ----------
+    width, height : int
+        The size of the board.
+
+    opening, moves : bytes
+        The cell indices of the moves of the opening and of the moves played
+        after it (iterating over a bytes object yields ints).
+
+    winner : int
+        0 if the first player won, 1 if the second player won.
+
+    termination : str
+        Why the loser lost; one of TERMINATIONS.
+
+    think_ms : tuple of float
+        The milliseconds spent on each move, or an empty tuple.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_game(cls, width, height, opening, moves, winner,
+                  termination="", think_ms=()):
+        """Return the record of a game given its (row, column) moves. """
+        def indices(line):
+            return bytes(row + col * height for row, col in line)
+        return cls(width, height, indices(opening), indices(moves), winner,
+                   termination, tuple(think_ms))
+
+    @classmethod
+    def from_result(cls, result, width=7, height=7):
+        """Return the record of a game stored by tournament.py in a results
+        file (see results.py).
+        """
+        return cls.from_game(width, height, result["opening"],
+                             result["moves"],
+                             int(result["winner"] != result["player_1"]),
+                             result["termination"], result["think_ms"])
+
+    def move_list(self):
+        """Return every move of the game, opening included, as a list of
+        [row, column] lists like the move history of `Board.play()`.
+        """
+        return [[idx % self.height, idx // self.height]
+                for line in (self.opening, self.moves) for idx in line]
+
+
+def encode(record):
+    """Return the bytes of a record. """
+    if record.width * record.height > MAX_CELLS:
+        raise ValueError("Boards of more than {} cells cannot be recorded"
+                         .format(MAX_CELLS))
+    result = record.winner | TERMINATIONS.index(record.termination) << 1
+    header = RECORD_HEADER.pack(record.width, record.height,
+                                len(record.opening), len(record.moves),
+                                len(record.think_ms), result)
+    times = struct.pack(TIME_FORMAT.format(len(record.think_ms)),
+                        *record.think_ms)
+    return b"".join((header, record.opening, record.moves, times))
+
+
+def _scan(data, size):
+    """Yield the header fields, the offset of the cell indices, the offset
+    of the move times and the end of every complete record of the mapped
+    record file `data` of `size` bytes.
+    """
+    unpack_header = RECORD_HEADER.unpack_from
+    header_size = RECORD_HEADER.size
+    pos = len(FILE_HEADER)
+    while pos + header_size <= size:
+        header = unpack_header(data, pos)
+        start = pos + header_size
+        moves_end = start + header[2] + header[3]
+        pos = moves_end + header[4] * TIME_BYTES
+        if pos > size:
+            return
+        yield header, start, moves_end, pos
+
+
+def _map(path):
+    """Return a read-only memory map of the record file `path`, or None if
+    it is missing or empty; raise ValueError if it is not a record file.
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return None
+    if size == 0:
+        return None
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(FILE_HEADER)] != FILE_HEADER[:size]:
+        data.close()
+        raise ValueError("{} is not a version {} game record file"
+                         .format(path, VERSION))
+    return data
+
+
+def _complete_size(path):
+    """Return the size of the complete records of the record file `path`
+    with its file header, i.e. the file size without a truncated last
+    record; 0 if the file is missing or its header is incomplete.
+    """
+    data = _map(path)
+    if data is None:
+        return 0
+    try:
+        if len(data) < len(FILE_HEADER):
+            return 0
+        end = len(FILE_HEADER)
+        for _, _, _, end in _scan(data, len(data)):
+            pass
+        return end
+    finally:
+        data.close()
+
+
+class RecordWriter(object):
+    """Streaming writer of game records, appending to a record file.
+
+    Parameters
+    ----------
+    path : str
+        The record file; it is created with its file header if needed. The
+        truncated last record left by a crash in the middle of a write is
+        removed before new records are appended.
+
+    Records are buffered by the file object; `flush()` (or `close()`) writes
+    them to disk. Use the writer as a context manager to close it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        end = _complete_size(path)
+        if os.path.exists(path) and os.path.getsize(path) != end:
+            os.truncate(path, end)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER)
+
+    def write(self, record):
+        """Append one `GameRecord`. """
+        self._file.write(encode(record))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordReader(object):
+    """Streaming reader of a game record file through a memory map.
+
+    Parameters
+    ----------
+    path : str
+        The record file. A missing or empty file holds no games.
+
+    The file is mapped rather than read, so scanning an archive only touches
+    the pages of the records that are decoded, and the operating system can
+    share the pages between processes reading the same file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def records(self, width=None, height=None, winner=None, termination=None,
+                min_moves=0, max_moves=None):
+        """Yield the `GameRecord` of every complete game in the file that
+        matches all the given criteria. The criteria only use the record
+        headers, so the games they reject are skipped without being decoded.
+        """
+        data = _map(self.path)
+        if data is None:
+            return
+        try:
+            if len(data) < len(FILE_HEADER):
+                raise ValueError("{} is not a version {} game record file"
+                                 .format(self.path, VERSION))
+            code = (None if termination is None
+                    else TERMINATIONS.index(termination))
+            for header, start, moves_end, _ in _scan(data, len(data)):
+                w, h, n_opening, n_moves, n_times, result = header
+                if ((width is not None and w != width) or
+                        (height is not None and h != height) or
+                        (winner is not None and result & 1 != winner) or
+                        (code is not None and result >> 1 != code) or
+                        n_moves < min_moves or
+                        (max_moves is not None and n_moves > max_moves)):
+                    continue
+                think_ms = struct.unpack_from(TIME_FORMAT.format(n_times),
+                                              data, moves_end)
+                yield GameRecord(w, h, data[start:start + n_opening],
+                                 data[start + n_opening:moves_end],
+                                 result & 1, TERMINATIONS[result >> 1],
+                                 think_ms)
+        finally:
+            data.close()
+
+    def __iter__(self):
+        return self.records()
+
+
+def positions(record, player_1="Player1", player_2="Player2",
+              board_cls=Board, check=True):
+    """Replay a record on a new board and yield the board after the opening
+    and after every later move. The same board is yielded every time and
+    changed in place by the next move; copy it to keep a position.
+
+    With `check` every move after the opening is checked to be legal, which
+    generates the legal moves of every position, and a ValueError is raised
+    for an illegal move. Archives written by trusted code can be replayed
+    two to three times as fast without the check.
+    """
+    game = board_cls(player_1, player_2, record.width, record.height)
+    for idx in record.opening:
+        game.apply_index(idx)
+    yield game
+    for idx in record.moves:
+        if check and idx not in game.get_legal_indices():
+            raise ValueError("Illegal move {} after {} moves".format(
+                game.index_to_move(idx), game.move_count))
+        game.apply_index(idx)
+        yield game
+
+
+def replay(record, player_1="Player1", player_2="Player2", board_cls=Board,
+           check=True):
+    """Return the board reached at the end of the game of a record. """
+    for game in positions(record, player_1, player_2, board_cls, check):
+        pass
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize or export a game record file")
+    parser.add_argument("path", help="the game record file")
+    parser.add_argument("--json", default=None,
+                        help="write the moves of every game to this file as "
+                             "JSON lines")
+    parser.add_argument("--import", dest="results", nargs="+", default=[],
+                        help="append the games of these tournament results "
+                             "files")
+    args = parser.parse_args()
+
+    if args.results:
+        with RecordWriter(args.path) as writer:
+            for path in args.results:
+                for result in ResultsStore(path).records():
+                    writer.write(GameRecord.from_result(result))
+
+    games = moves = 0
+    out = open(args.json, "w") if args.json else None
+    try:
+        for record in RecordReader(args.path):
+            games += 1
+            moves += len(record.opening) + len(record.moves)
+            if out:
+                out.write(json.dumps(record.move_list()) + "\n")
+    finally:
+        if out:
+            out.close()
+    print("{} games, {} moves".format(games, moves))
+
+
+if __name__ == "__main__":
+    main()
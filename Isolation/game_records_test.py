@@ -0,0 +1,138 @@
+"""Unit tests for the binary game record format."""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import isolation
+import tournament
+
+from game_records import (GameRecord, RecordReader, RecordWriter, encode,
+                          positions, replay, FILE_HEADER)
+from results import ResultsStore
+from sample_players import GreedyPlayer, RandomPlayer
+
+
+def random_record(seed, width=7, height=7):
+    """Return the record of a game of random moves. """
+    rng = random.Random(seed)
+    game = isolation.Board("Player1", "Player2", width, height)
+    moves = []
+    while True:
+        legal = sorted(game.get_legal_moves())
+        if not legal:
+            break
+        moves.append(rng.choice(legal))
+        game.apply_move(moves[-1])
+    winner = 1 if game.active_player == "Player1" else 0
+    return GameRecord.from_game(width, height, moves[:2], moves[2:], winner,
+                                "illegal move",
+                                # quarter milliseconds are exact in float32
+                                [rng.randint(0, 600) / 4
+                                 for _ in range(len(moves) - 1)])
+
+
+class GameRecordsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "games.isog")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, records):
+        with RecordWriter(self.path) as writer:
+            for record in records:
+                writer.write(record)
+
+    def test_round_trip(self):
+        records = [random_record(seed, *size) for seed, size in
+                   enumerate([(7, 7), (5, 8), (9, 9), (7, 7)])]
+        records.append(records[0]._replace(think_ms=(), termination=""))
+        self.write(records[:2])
+        self.write(records[2:])  # appending keeps a single file header
+        self.assertEqual(list(RecordReader(self.path)), records)
+        self.assertEqual(os.path.getsize(self.path), len(FILE_HEADER) +
+                         sum(len(encode(r)) for r in records))
+
+    def test_missing_and_truncated_files(self):
+        self.assertEqual(list(RecordReader(self.path)), [])
+        records = [random_record(seed) for seed in range(3)]
+        self.write(records)
+        with open(self.path, "ab") as f:
+            f.write(encode(random_record(3))[:-1])
+        self.assertEqual(len(list(RecordReader(self.path))), 3)
+        with open(self.path, "r+b") as f:
+            f.write(b"JSON")
+        with self.assertRaises(ValueError):
+            list(RecordReader(self.path))
+
+    def test_append_after_truncation(self):
+        records = [random_record(seed) for seed in range(4)]
+        self.write(records[:2])
+        size = os.path.getsize(self.path)
+        os.truncate(self.path, size - 5)  # a crash in the last record
+        self.write(records[2:])
+        self.assertEqual(list(RecordReader(self.path)),
+                         records[:1] + records[2:])
+        # a crash in the file header
+        os.truncate(self.path, 2)
+        self.write(records[:1])
+        self.assertEqual(list(RecordReader(self.path)), records[:1])
+        with open(self.path, "r+b") as f:
+            f.write(b"JSON")
+        with self.assertRaises(ValueError):
+            RecordWriter(self.path)
+
+    def test_filters(self):
+        records = [random_record(seed, *size) for seed in range(10)
+                   for size in [(7, 7), (5, 5)]]
+        self.write(records)
+        reader = RecordReader(self.path)
+        for criteria, keep in [
+                (dict(width=5), lambda r: r.width == 5),
+                (dict(winner=0), lambda r: r.winner == 0),
+                (dict(min_moves=15, max_moves=20),
+                 lambda r: 15 <= len(r.moves) <= 20),
+                (dict(termination="timeout"), lambda r: False)]:
+            self.assertEqual(list(reader.records(**criteria)),
+                             [r for r in records if keep(r)])
+
+    def test_replay(self):
+        record = random_record(4)
+        game = replay(record)
+        self.assertEqual(game.move_count,
+                         len(record.opening) + len(record.moves))
+        self.assertFalse(game.get_legal_moves())
+        line = [game.hash() for game in positions(
+            record, board_cls=isolation.BitBoard)]
+        self.assertEqual(line[-1], game.hash())
+        self.assertEqual(len(line), len(record.moves) + 1)
+        illegal = record._replace(moves=record.moves[:1] * 2)
+        with self.assertRaises(ValueError):
+            replay(illegal)
+
+    def test_tournament_results(self):
+        cpu_agents = [tournament.Agent(RandomPlayer(), "Random")]
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        games = tournament.schedule_games(1, 1, 2, seed=5)
+        store = ResultsStore(os.path.join(self.tmpdir, "results.jsonl"))
+        list(tournament.resume_games(cpu_agents, test_agents, games, 5,
+                                     store))
+        results = list(store.records())
+        self.write([GameRecord.from_result(r) for r in results])
+        for record, result in zip(RecordReader(self.path), results):
+            self.assertEqual(record.move_list(),
+                             [list(m) for m in result["opening"]] +
+                             result["moves"])
+            self.assertEqual(record.termination, result["termination"])
+            game = replay(record, result["player_1"], result["player_2"])
+            # the loser is the player to move
+            self.assertNotEqual(game.active_player, result["winner"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,293 @@
+"""
+This file contains the `BitBoard` class, an alternative implementation of
+`isolation.Board` that stores the blocked cells and the player locations as
+integer bitmasks instead of a Python list.
+
+Cells are indexed exactly like `Board` (index = row + column * height), so a
+cell index has the same meaning on both boards. The knight-move mask of every
+cell is precomputed once per board size, which reduces move generation to a
+single AND-NOT of two integers.
+"""
+from .isolation import Board, cell_coords, neighbor_table, zobrist_keys
+
+_KNIGHT_MASKS = {}
+
+
+def knight_masks(width, height):
+    """Return a tuple with the knight-move bitmask of every cell on a board
+    of the given size. The tables are built on first use and cached.
+    """
+    key = (width, height)
+    masks = _KNIGHT_MASKS.get(key)
+    if masks is None:
+        masks = _KNIGHT_MASKS[key] = tuple(
+            sum(1 << n for n in neighbors)
+            for neighbors in neighbor_table(width, height))
+    return masks
+
+
+class BitBoard(Board):
+    """Implement the Isolation rules of `Board` on top of integer bitmasks.
+
+    The public API (including `play()`) is identical to `Board`, so agents
+    written against `Board` run on a `BitBoard` unchanged. Unlike `Board`,
+    legal moves are returned in ascending cell-index order rather than being
+    shuffled.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        # _side is the index (0 for player 1, 1 for player 2) of the player
+        # holding initiative; _locations holds the cell index of each player
+        self._side = 0
+        self._blocked = 0
+        self._locations = [Board.NOT_MOVED, Board.NOT_MOVED]
+        self._move_stack = []
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._zobrist = 0
+        self._image_keys = None
+        self._full = (1 << (width * height)) - 1
+        self._masks = knight_masks(width, height)
+        self._coords = cell_coords(width, height)
+
+    def hash(self):
+        """Return the Zobrist key of the current state; see `Board.hash()`.
+        BitBoard and Board produce the same key for the same position.
+        """
+        return self._zobrist
+
+    def _player_side(self, player):
+        if player == self._player_1:
+            return 0
+        elif player == self._player_2:
+            return 1
+        raise RuntimeError(
+            "`player` must be a registered player: {}".format(player))
+
+    def _open_mask(self, side):
+        """Return the bitmask of cells the player on `side` can move to. """
+        loc = self._locations[side]
+        if loc is Board.NOT_MOVED:
+            return self._full & ~self._blocked
+        return self._masks[loc] & ~self._blocked
+
+    def copy(self):
+        """ Return a deep copy of the current board with an empty move
+        history; see `Board.copy()`.
+        """
+        new_board = self.__class__.__new__(self.__class__)
+        new_board.__dict__.update(self.__dict__)
+        new_board._locations = self._locations[:]
+        new_board._move_stack = []
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not self._blocked >> (move[0] + move[1] * self.height) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return self._mask_to_moves(self._full & ~self._blocked)
+
+    def blocked_mask(self):
+        """Return the blocked cells, player locations included, as an int
+        with the bit of every blocked cell index set.
+        """
+        return self._blocked
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        loc = self._locations[self._player_side(player)]
+        if loc is Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._coords[loc]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        side = self._side if player is None else self._player_side(player)
+        return self._mask_to_moves(self._open_mask(side))
+
+    def get_legal_indices(self, player=None):
+        """Return the cell indices of all legal moves for the specified player
+        (the active player if None), in ascending order.
+        """
+        side = self._side if player is None else self._player_side(player)
+        mask = self._open_mask(side)
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(low.bit_length() - 1)
+            mask ^= low
+        return moves
+
+    def count_moves(self, player=None):
+        """Return the number of legal moves of the specified player (the
+        active player if None); see `Board.count_moves()`.
+        """
+        side = self._side if player is None else self._player_side(player)
+        return bin(self._open_mask(side)).count("1")
+
+    def open_neighbors(self, idx):
+        """Return the number of open cells a knight on the cell index `idx`
+        could jump to; see `Board.open_neighbors()`.
+        """
+        return bin(self._masks[idx] & ~self._blocked).count("1")
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        self.apply_index(move[0] + move[1] * self.height)
+
+    def apply_index(self, idx):
+        """Move the active player to the cell index `idx`; see apply_move().
+        """
+        self._move_stack.append(self._locations[self._side])
+        self._toggle_zobrist(self._side, idx, self._locations[self._side])
+        self._blocked |= 1 << idx
+        self._locations[self._side] = idx
+        self._side ^= 1
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def undo_move(self):
+        """Take back the last move applied to the board; see
+        `Board.undo_move()`.
+        """
+        if not self._move_stack:
+            raise RuntimeError("There are no moves to undo on this board.")
+        self._side ^= 1
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        idx = self._locations[self._side]
+        prev_idx = self._move_stack.pop()
+        self._toggle_zobrist(self._side, idx, prev_idx)
+        self._blocked &= ~(1 << idx)
+        self._locations[self._side] = prev_idx
+        self.move_count -= 1
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self._inactive_player and not self._open_mask(self._side)
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self._active_player and not self._open_mask(self._side)
+
+    def utility(self, player):
+        """Returns the utility of the current game state from the perspective
+        of the specified player; see `Board.utility()`.
+        """
+        if not self._open_mask(self._side):
+
+            if player == self._inactive_player:
+                return float("inf")
+
+            if player == self._active_player:
+                return float("-inf")
+
+        return 0.
+
+    def _mask_to_moves(self, mask):
+        """Convert a bitmask of cells into a list of (row, column) pairs. """
+        coords = self._coords
+        moves = []
+        while mask:
+            low = mask & -mask
+            moves.append(coords[low.bit_length() - 1])
+            mask ^= low
+        return moves
+
+    def to_string(self, symbols=['1', '2']):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        p1_loc, p2_loc = self._locations
+
+        col_margin = len(str(self.height - 1)) + 1
+        prefix = "{:<" + "{}".format(col_margin) + "}"
+        offset = " " * (col_margin + 3)
+        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        for i in range(self.height):
+            out += prefix.format(i) + ' | '
+            for j in range(self.width):
+                idx = i + j * self.height
+                if not self._blocked >> idx & 1:
+                    out += ' '
+                elif p1_loc == idx:
+                    out += symbols[0]
+                elif p2_loc == idx:
+                    out += symbols[1]
+                else:
+                    out += '-'
+                out += ' | '
+            out += '\n\r'
+
+        return out
@@ -11,13 +11,96 @@ import random
 import timeit
 from copy import copy
 
+from .symmetry import cell_symmetries, image_keys, symmetric_zobrist_keys
+
 TIME_LIMIT_MILLIS = 150
 
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+_ZOBRIST_KEYS = {}
+_NEIGHBORS = {}
+_CELL_COORDS = {}
+_OPEN_COUNTS = {}
+
+
+def neighbor_table(width, height):
+    """Return a tuple holding, for every cell index of a board of the given
+    size, the tuple of cell indices a knight on that cell can jump to, in the
+    order of `DIRECTIONS`. The tables are built on first use and cached.
+    """
+    key = (width, height)
+    table = _NEIGHBORS.get(key)
+    if table is None:
+        table = []
+        for idx in range(width * height):
+            r, c = idx % height, idx // height
+            table.append(tuple(r + dr + (c + dc) * height
+                               for dr, dc in DIRECTIONS
+                               if 0 <= r + dr < height and 0 <= c + dc < width))
+        table = _NEIGHBORS[key] = tuple(table)
+    return table
+
+
+def open_counts(width, height):
+    """Return a tuple with the number of knight neighbors of every cell index
+    of an empty board of the given size, built on first use and cached.
+    """
+    key = (width, height)
+    counts = _OPEN_COUNTS.get(key)
+    if counts is None:
+        counts = _OPEN_COUNTS[key] = tuple(
+            len(neighbors) for neighbors in neighbor_table(width, height))
+    return counts
+
+
+def cell_coords(width, height):
+    """Return a tuple mapping each cell index to its (row, column) pair. """
+    key = (width, height)
+    coords = _CELL_COORDS.get(key)
+    if coords is None:
+        coords = _CELL_COORDS[key] = tuple(
+            (idx % height, idx // height) for idx in range(width * height))
+    return coords
+
+
+def zobrist_keys(width, height):
+    """Return the Zobrist keys used to hash positions on a board of the given
+    size as a tuple (blocked, locations, side_to_move), where `blocked` holds
+    one 64-bit key per cell, `locations` holds one such tuple per player, and
+    `side_to_move` is toggled every ply.
+
+    The keys are drawn from a generator seeded with the board size, so every
+    process derives the same hash for the same position.
+    """
+    key = (width, height)
+    keys = _ZOBRIST_KEYS.get(key)
+    if keys is None:
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        cells = width * height
+        blocked = tuple(rng.getrandbits(64) for _ in range(cells))
+        locations = (tuple(rng.getrandbits(64) for _ in range(cells)),
+                     tuple(rng.getrandbits(64) for _ in range(cells)))
+        keys = _ZOBRIST_KEYS[key] = (blocked, locations, rng.getrandbits(64))
+    return keys
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
     a knight in chess.
 
+    Besides the (row, column) move API, the board accepts moves given as cell
+    indices (index = row + column * height) through `get_legal_indices()`,
+    `apply_index()` and `forecast_index()`, which search agents use to avoid
+    converting moves at every node; `move_to_index()` and `index_to_move()`
+    convert between the two forms.
+
+    The board also keeps the number of open knight neighbors of every cell,
+    updated incrementally by `apply_move()` and `undo_move()`, so that
+    `count_moves()` and `open_neighbors()` answer in constant time; score
+    functions that only need the number of moves should use them instead of
+    building move lists.
+
     Parameters
     ----------
     player_1 : object
@@ -52,8 +135,81 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # Previous location of the player that made each applied move, used
+        # by undo_move() to take moves back in place
+        self._move_stack = []
+
+        # Zobrist key of the current state, updated incrementally by
+        # apply_move() and undo_move()
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._zobrist = 0
+
+        # Zobrist keys of the images of the position under every symmetry,
+        # only kept once canonical_hash() has been called
+        self._image_keys = None
+
+        # Per-size lookup tables shared by every board of the same size
+        self._neighbors = neighbor_table(width, height)
+        self._coords = cell_coords(width, height)
+
+        # Number of open knight neighbors of each cell
+        self._open_counts = list(open_counts(width, height))
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return the Zobrist key of the current state, which covers the
+        blocked cells, both player locations and the player with initiative.
+        """
+        return self._zobrist
+
+    def canonical_hash(self):
+        """Return (key, perm): the smallest Zobrist key among the images of
+        the current state under the symmetries of the board, and the cell
+        permutation that produces that image (see isolation/symmetry.py).
+        The move to cell index `idx` in this position is the move to
+        `perm[idx]` in the canonical image, so caches keyed on the canonical
+        key can store moves as `perm[idx]` and map them back with
+        `symmetry.inverse(perm)`.
+
+        The first call computes the keys of the images from scratch; from
+        then on they are updated by every move, on this board and on its
+        copies, and the call costs one comparison per symmetry.
+        """
+        if self._image_keys is None:
+            self._image_keys = self._compute_image_keys()
+        keys = self._image_keys
+        key = min(keys)
+        return key, cell_symmetries(self.width, self.height)[keys.index(key)]
+
+    def _compute_image_keys(self):
+        blank = set(self.move_to_index(move)
+                    for move in self.get_blank_spaces())
+        blocked = [idx for idx in range(self.width * self.height)
+                   if idx not in blank]
+        locations = []
+        for player in (self._player_1, self._player_2):
+            loc = self.get_player_location(player)
+            locations.append(None if loc is None else self.move_to_index(loc))
+        return image_keys(self.width, self.height, self._zobrist_keys,
+                          blocked, locations, self.move_count % 2)
+
+    def _toggle_zobrist(self, side, idx, prev_idx):
+        """Update the Zobrist key for the player at index `side` (0 for player
+        1) moving from `prev_idx` to `idx`. Applying the same toggle twice
+        restores the key, so it serves both apply_move() and undo_move().
+        """
+        blocked, locations, side_to_move = self._zobrist_keys
+        self._zobrist ^= blocked[idx] ^ locations[side][idx] ^ side_to_move
+        if prev_idx is not Board.NOT_MOVED:
+            self._zobrist ^= locations[side][prev_idx]
+        if self._image_keys is not None:
+            _, locations, moves = symmetric_zobrist_keys(
+                self.width, self.height, self._zobrist_keys)
+            keys = [key ^ delta for key, delta in
+                    zip(self._image_keys, moves[side][idx])]
+            if prev_idx is not Board.NOT_MOVED:
+                keys = [key ^ delta for key, delta in
+                        zip(keys, locations[side][prev_idx])]
+            self._image_keys = tuple(keys)
 
     @property
     def active_player(self):
@@ -91,14 +247,27 @@ class Board(object):
         raise RuntimeError("`player` must be an object registered as a player in the current game.")
 
     def copy(self):
-        """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
-        new_board.move_count = self.move_count
-        new_board._active_player = self._active_player
-        new_board._inactive_player = self._inactive_player
+        """ Return a deep copy of the current board. The copy starts with an
+        empty move history, so undo_move() can only take back moves applied
+        to the copy itself.
+        """
+        # Share the attributes, then replace the mutable ones, instead of
+        # building the lists of a new board only to overwrite them
+        new_board = self.__class__.__new__(self.__class__)
+        new_board.__dict__.update(self.__dict__)
         new_board._board_state = copy(self._board_state)
+        new_board._open_counts = copy(self._open_counts)
+        new_board._move_stack = []
         return new_board
 
+    def move_to_index(self, move):
+        """Return the cell index of the (row, column) pair `move`. """
+        return move[0] + move[1] * self.height
+
+    def index_to_move(self, idx):
+        """Return the (row, column) pair of the cell index `idx`. """
+        return self._coords[idx]
+
     def forecast_move(self, move):
         """Return a deep copy of the current game with an input move applied to
         advance the game one ply.
@@ -114,8 +283,14 @@ class Board(object):
         isolation.Board
             A deep copy of the board with the input move applied.
         """
+        return self.forecast_index(move[0] + move[1] * self.height)
+
+    def forecast_index(self, idx):
+        """Return a deep copy of the current game with the move to the cell
+        index `idx` applied; see `forecast_move()`.
+        """
         new_board = self.copy()
-        new_board.apply_move(move)
+        new_board.apply_index(idx)
         return new_board
 
     def move_is_legal(self, move):
@@ -142,6 +317,14 @@ class Board(object):
         return [(i, j) for j in range(self.width) for i in range(self.height)
                 if self._board_state[i + j * self.height] == Board.BLANK]
 
+    def blocked_mask(self):
+        """Return the blocked cells, player locations included, as an int
+        with the bit of every blocked cell index set.
+        """
+        state = self._board_state
+        return sum(1 << idx for idx in range(self.width * self.height)
+                   if state[idx] != Board.BLANK)
+
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
 
@@ -186,9 +369,47 @@ class Board(object):
             The list of coordinate pairs (row, column) of all legal moves
             for the player constrained by the current game state.
         """
+        coords = self._coords
+        return [coords[idx] for idx in self.get_legal_indices(player)]
+
+    def get_legal_indices(self, player=None):
+        """Return the cell indices of all legal moves for the specified player
+        (the active player if None), in the same order as get_legal_moves().
+        """
         if player is None:
-            player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+            player = self._active_player
+        if player == self._player_1:
+            loc = self._board_state[-1]
+        elif player == self._player_2:
+            loc = self._board_state[-2]
+        else:
+            raise RuntimeError(
+                "Invalid player in get_legal_indices: {}".format(player))
+        return self.__get_moves(loc)
+
+    def count_moves(self, player=None):
+        """Return the number of legal moves of the specified player (the
+        active player if None) in constant time, without generating them.
+        """
+        if player is None:
+            player = self._active_player
+        if player == self._player_1:
+            loc = self._board_state[-1]
+        elif player == self._player_2:
+            loc = self._board_state[-2]
+        else:
+            raise RuntimeError(
+                "Invalid player in count_moves: {}".format(player))
+        if loc == Board.NOT_MOVED:
+            # every move blocks one cell
+            return self.width * self.height - self.move_count
+        return self._open_counts[loc]
+
+    def open_neighbors(self, idx):
+        """Return the number of open cells a knight on the cell index `idx`
+        could jump to, in constant time.
+        """
+        return self._open_counts[idx]
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -199,21 +420,51 @@ class Board(object):
             A coordinate pair (row, column) indicating the next position for
             the active player on the board.
         """
-        idx = move[0] + move[1] * self.height
+        self.apply_index(move[0] + move[1] * self.height)
+
+    def apply_index(self, idx):
+        """Move the active player to the cell index `idx`; see apply_move().
+        """
         last_move_idx = int(self.active_player == self._player_2) + 1
+        self._move_stack.append(self._board_state[-last_move_idx])
+        self._toggle_zobrist(last_move_idx - 1, idx, self._board_state[-last_move_idx])
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
+        counts = self._open_counts
+        for neighbor in self._neighbors[idx]:
+            counts[neighbor] -= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def undo_move(self):
+        """Take back the last move applied to the board, restoring the game
+        to the exact state it was in before the matching call to apply_move().
+        Together with apply_move() this lets a search walk the game tree on a
+        single board instance instead of copying it at every node.
+        """
+        if not self._move_stack:
+            raise RuntimeError("There are no moves to undo on this board.")
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self._board_state[-3] ^= 1
+        last_move_idx = int(self.active_player == self._player_2) + 1
+        idx = self._board_state[-last_move_idx]
+        prev_idx = self._move_stack.pop()
+        self._toggle_zobrist(last_move_idx - 1, idx, prev_idx)
+        self._board_state[idx] = Board.BLANK
+        self._board_state[-last_move_idx] = prev_idx
+        counts = self._open_counts
+        for neighbor in self._neighbors[idx]:
+            counts[neighbor] += 1
+        self.move_count -= 1
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self.count_moves(self._active_player)
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self.count_moves(self._active_player)
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +488,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self.count_moves(self._active_player):
 
             if player == self._inactive_player:
                 return float("inf")
@@ -248,17 +499,16 @@ class Board(object):
         return 0.
 
     def __get_moves(self, loc):
-        """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        """Generate the list of cell indices reachable from the cell index
+        `loc` with an L-shaped motion (like a knight in chess).
         """
+        state = self._board_state
         if loc == Board.NOT_MOVED:
-            return self.get_blank_spaces()
+            return [idx for idx in range(self.width * self.height)
+                    if state[idx] == Board.BLANK]
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
+        valid_moves = [idx for idx in self._neighbors[loc]
+                       if state[idx] == Board.BLANK]
         random.shuffle(valid_moves)
         return valid_moves
 
@@ -310,9 +560,20 @@ class Board(object):
         (player, list<[(int, int),]>, str)
             Return multiple including the winning player, the complete game
             move history, and a string indicating the reason for losing
-            (e.g., timeout or invalid move).
+            (e.g., timeout or invalid move). The milliseconds each player
+            spent in get_move() are left in `self.move_times`, one entry per
+            call including the final losing one.
+
+        After every move is applied, each player that has a
+        `move_played(game, move)` method is called with a copy of the new
+        game state and the move, outside of the time of both players.
         """
         move_history = []
+        self.move_times = []
+        observers = [player for player in (self._player_1, self._player_2)
+                     if hasattr(player, "move_played")]
+        if len(observers) == 2 and observers[0] is observers[1]:
+            observers.pop()
 
         time_millis = lambda: 1000 * timeit.default_timer()
 
@@ -326,6 +587,7 @@ class Board(object):
             curr_move = self._active_player.get_move(game_copy, time_left)
             #print('curr_move: ', curr_move)
             move_end = time_left()
+            self.move_times.append(time_limit - move_end)
 
             if curr_move is None:
                 curr_move = Board.NOT_MOVED
@@ -342,3 +604,7 @@ class Board(object):
             move_history.append(list(curr_move))
 
             self.apply_move(curr_move)
+            # Players that define move_played() are told about every move,
+            # e.g. to search on the opponent's time (see ponder.py)
+            for player in observers:
+                player.move_played(self.copy(), curr_move)
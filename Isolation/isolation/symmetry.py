@@ -0,0 +1,109 @@
+"""
+This file contains the symmetries of the Isolation board. Knight moves are
+preserved by every reflection and rotation that maps the board onto itself:
+the 8 symmetries of the square on square boards, and the identity, the two
+reflections and the half turn on other boards.
+
+A symmetry is represented as a permutation of the cell indices (index = row +
+column * height): `perm[idx]` is the index of the cell that `idx` maps to.
+
+Positions that are images of each other under a symmetry have the same value
+and mirrored best moves, so caches can store them once under a canonical key:
+the smallest Zobrist key among the images of the position. `Board` keeps the
+Zobrist key of every image up to date in O(symmetries) per move once
+`Board.canonical_hash()` has been called, using the tables of
+`symmetric_zobrist_keys()`; the permutation it returns maps moves of the
+position into the canonical frame, and `inverse()` maps them back.
+"""
+
+_SYMMETRIES = {}
+_SYMMETRIC_KEYS = {}
+
+
+def cell_symmetries(width, height):
+    """Return a tuple of cell permutations, one per symmetry of a board of the
+    given size, starting with the identity. The tables are built on first use
+    and cached.
+    """
+    key = (width, height)
+    perms = _SYMMETRIES.get(key)
+    if perms is None:
+        h, w = height - 1, width - 1
+        maps = [lambda r, c: (r, c),
+                lambda r, c: (h - r, c),
+                lambda r, c: (r, w - c),
+                lambda r, c: (h - r, w - c)]
+        if width == height:
+            maps += [lambda r, c: (c, r),
+                     lambda r, c: (w - c, h - r),
+                     lambda r, c: (c, h - r),
+                     lambda r, c: (w - c, r)]
+        perms = []
+        for fn in maps:
+            perm = []
+            for idx in range(width * height):
+                r, c = fn(idx % height, idx // height)
+                perm.append(r + c * height)
+            perms.append(tuple(perm))
+        perms = _SYMMETRIES[key] = tuple(perms)
+    return perms
+
+
+def inverse(perm):
+    """Return the inverse of the cell permutation `perm`. """
+    inv = [0] * len(perm)
+    for idx, target in enumerate(perm):
+        inv[target] = idx
+    return tuple(inv)
+
+
+def symmetric_zobrist_keys(width, height, keys):
+    """Return the Zobrist keys `keys` (see `isolation.zobrist_keys()`) of a
+    board of the given size seen through every symmetry, as a tuple
+    (blocked, locations, moves) in which each entry is a tuple holding one
+    key per symmetry of `cell_symmetries()`:
+
+        blocked[idx]           the key of blocking cell `idx`
+        locations[side][idx]   the key of player `side` standing on `idx`
+        moves[side][idx]       the change of key when player `side` moves to
+                               `idx`: the blocked and location keys of `idx`
+                               and the side to move key
+
+    The tables are built on first use and cached.
+    """
+    size = (width, height)
+    tables = _SYMMETRIC_KEYS.get(size)
+    if tables is None:
+        perms = cell_symmetries(width, height)
+        blocked_keys, location_keys, side_key = keys
+        cells = range(width * height)
+        blocked = tuple(tuple(blocked_keys[perm[idx]] for perm in perms)
+                        for idx in cells)
+        locations = tuple(tuple(tuple(side_keys[perm[idx]] for perm in perms)
+                                for idx in cells)
+                          for side_keys in location_keys)
+        moves = tuple(tuple(tuple(b ^ l ^ side_key
+                                  for b, l in zip(blocked[idx],
+                                                  side_locations[idx]))
+                            for idx in cells)
+                      for side_locations in locations)
+        tables = _SYMMETRIC_KEYS[size] = (blocked, locations, moves)
+    return tables
+
+
+def image_keys(width, height, keys, blocked, locations, side):
+    """Return the tuple of the Zobrist keys of the images of a position under
+    every symmetry, computed from scratch: `blocked` is the list of blocked
+    cell indices, `locations` the cell index (or None) of player 1 and player
+    2, and `side` the index of the player to move.
+    """
+    blocked_keys, location_keys, _ = symmetric_zobrist_keys(width, height,
+                                                            keys)
+    images = [keys[2] if side else 0] * len(cell_symmetries(width, height))
+    for idx in blocked:
+        images = [key ^ delta for key, delta in zip(images, blocked_keys[idx])]
+    for player, loc in enumerate(locations):
+        if loc is not None:
+            images = [key ^ delta for key, delta in
+                      zip(images, location_keys[player][loc])]
+    return tuple(images)
@@ -0,0 +1,311 @@
+"""Unit tests for the isolation.Board and isolation.BitBoard game models."""
+
+import random
+import unittest
+
+import isolation
+import game_agent
+import sample_players
+
+from testutils import random_game
+
+
+class BitBoardTest(unittest.TestCase):
+    """Check that BitBoard follows the same rules as Board"""
+
+    def assertSameState(self, board, bitboard):
+        for player in ("Player1", "Player2"):
+            self.assertEqual(sorted(board.get_legal_moves(player)),
+                             sorted(bitboard.get_legal_moves(player)))
+            self.assertEqual(board.get_player_location(player),
+                             bitboard.get_player_location(player))
+            self.assertEqual(board.is_winner(player), bitboard.is_winner(player))
+            self.assertEqual(board.is_loser(player), bitboard.is_loser(player))
+            self.assertEqual(board.utility(player), bitboard.utility(player))
+        self.assertEqual(board.active_player, bitboard.active_player)
+        self.assertEqual(board.move_count, bitboard.move_count)
+        self.assertEqual(sorted(board.get_blank_spaces()),
+                         sorted(bitboard.get_blank_spaces()))
+        self.assertEqual(board.to_string(), bitboard.to_string())
+
+    def test_random_games_match_board(self):
+        for width, height in [(7, 7), (5, 8), (9, 6)]:
+            for seed in range(10):
+                rng = random.Random(seed)
+                board = isolation.Board("Player1", "Player2", width, height)
+                bitboard = isolation.BitBoard("Player1", "Player2", width, height)
+                self.assertSameState(board, bitboard)
+                while True:
+                    moves = sorted(board.get_legal_moves())
+                    if not moves:
+                        break
+                    move = rng.choice(moves)
+                    board.apply_move(move)
+                    bitboard.apply_move(move)
+                    self.assertSameState(board, bitboard)
+
+    def test_move_is_legal(self):
+        board = random_game(isolation.Board, 3, 8)
+        bitboard = random_game(isolation.BitBoard, 3, 8)
+        for r in range(-2, 9):
+            for c in range(-2, 9):
+                self.assertEqual(board.move_is_legal((r, c)),
+                                 bitboard.move_is_legal((r, c)))
+
+    def test_forecast_does_not_modify_original(self):
+        bitboard = random_game(isolation.BitBoard, 1, 4)
+        before = bitboard.to_string()
+        child = bitboard.forecast_move(bitboard.get_legal_moves()[0])
+        self.assertEqual(bitboard.to_string(), before)
+        self.assertNotEqual(child.to_string(), before)
+        self.assertNotEqual(child.active_player, bitboard.active_player)
+
+    def test_play_with_agents(self):
+        player1 = game_agent.AlphaBetaPlayer(score_fn=sample_players.improved_score)
+        player2 = sample_players.GreedyPlayer()
+        game = isolation.BitBoard(player1, player2)
+        winner, history, outcome = game.play(time_limit=50)
+        self.assertIn(winner, (player1, player2))
+        self.assertTrue(history)
+
+
+class UndoMoveTest(unittest.TestCase):
+    """Check that undo_move() exactly reverses apply_move()"""
+
+    def check_undo(self, board_cls):
+        for seed in range(10):
+            game = board_cls("Player1", "Player2")
+            rng = random.Random(seed)
+            states = []
+            while game.get_legal_moves():
+                states.append((game.to_string(), game.hash(), game.move_count,
+                               game.active_player,
+                               sorted(game.get_legal_moves())))
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            while states:
+                game.undo_move()
+                self.assertEqual((game.to_string(), game.hash(), game.move_count,
+                                  game.active_player,
+                                  sorted(game.get_legal_moves())),
+                                 states.pop())
+            self.assertRaises(RuntimeError, game.undo_move)
+
+    def test_board_undo(self):
+        self.check_undo(isolation.Board)
+
+    def test_bitboard_undo(self):
+        self.check_undo(isolation.BitBoard)
+
+    def test_copy_starts_with_empty_history(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            game = random_game(board_cls, 2, 5)
+            clone = game.copy()
+            self.assertRaises(RuntimeError, clone.undo_move)
+            before = clone.to_string()
+            child = clone.forecast_move(clone.get_legal_moves()[0])
+            child.undo_move()
+            self.assertEqual(child.to_string(), before)
+            self.assertEqual(child.hash(), clone.hash())
+
+
+class IndexMoveTest(unittest.TestCase):
+    """Check the neighbor tables and the cell-index move API"""
+
+    def test_neighbor_table(self):
+        for width, height in [(7, 7), (5, 8), (9, 6), (15, 15)]:
+            table = isolation.isolation.neighbor_table(width, height)
+            self.assertIs(table, isolation.isolation.neighbor_table(width,
+                                                                    height))
+            self.assertEqual(len(table), width * height)
+            for idx, neighbors in enumerate(table):
+                r, c = idx % height, idx // height
+                expected = {(r + dr) + (c + dc) * height
+                            for dr, dc in isolation.isolation.DIRECTIONS
+                            if 0 <= r + dr < height and 0 <= c + dc < width}
+                self.assertEqual(set(neighbors), expected)
+                for n in neighbors:
+                    self.assertIn(idx, table[n])
+
+    def test_indices_match_moves(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for width, height in [(7, 7), (5, 8), (12, 9)]:
+                for seed in range(5):
+                    game = random_game(board_cls, seed, 0, width, height)
+                    other = random_game(board_cls, seed, 0, width, height)
+                    rng = random.Random(seed)
+                    while True:
+                        for player in ("Player1", "Player2"):
+                            state = random.getstate()
+                            moves = game.get_legal_moves(player)
+                            random.setstate(state)
+                            indices = game.get_legal_indices(player)
+                            self.assertEqual(
+                                [game.index_to_move(i) for i in indices], moves)
+                            self.assertEqual(
+                                [game.move_to_index(m) for m in moves], indices)
+                        indices = sorted(game.get_legal_indices())
+                        if not indices:
+                            break
+                        idx = rng.choice(indices)
+                        self.assertEqual(game.forecast_index(idx).to_string(),
+                                         game.forecast_move(
+                                             game.index_to_move(idx)).to_string())
+                        game.apply_index(idx)
+                        other.apply_move(game.index_to_move(idx))
+                        self.assertEqual(game.to_string(), other.to_string())
+                        self.assertEqual(game.hash(), other.hash())
+
+
+class ZobristHashTest(unittest.TestCase):
+    """Check the incrementally maintained Zobrist key returned by hash()"""
+
+    # Player 1 walks the knight cycle (2, 2) - (3, 0) - (4, 2) - (3, 4) in
+    # two different orders, which blocks the same cells and ends on the same
+    # square, while player 2 makes the same moves in both games
+    P1_PATHS = [[(2, 2), (3, 0), (4, 2), (3, 4)],
+                [(4, 2), (3, 0), (2, 2), (3, 4)]]
+    P2_PATH = [(6, 6), (4, 5), (2, 6), (0, 5)]
+
+    def play_paths(self, board_cls, p1_path, p2_path):
+        game = board_cls("Player1", "Player2")
+        for p1_move, p2_move in zip(p1_path, p2_path):
+            self.assertTrue(game.move_is_legal(p1_move))
+            game.apply_move(p1_move)
+            self.assertTrue(game.move_is_legal(p2_move))
+            game.apply_move(p2_move)
+        return game
+
+    def test_transpositions_share_key(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            first, second = [self.play_paths(board_cls, path, self.P2_PATH)
+                             for path in self.P1_PATHS]
+            self.assertEqual(first.to_string(), second.to_string())
+            self.assertEqual(first.hash(), second.hash())
+
+            # the same blocked cells reached by swapping the players' roles
+            # leave the players on different squares and must not collide
+            swapped = self.play_paths(board_cls, self.P2_PATH, self.P1_PATHS[0])
+            self.assertNotEqual(first.hash(), swapped.hash())
+
+    def test_board_and_bitboard_agree(self):
+        for seed in range(10):
+            board = random_game(isolation.Board, seed, 20)
+            bitboard = random_game(isolation.BitBoard, seed, 20)
+            self.assertEqual(board.hash(), bitboard.hash())
+            self.assertEqual(board.hash(), board.copy().hash())
+
+    def test_keys_distinguish_positions(self):
+        keys = {}
+        for seed in range(20):
+            game = isolation.Board("Player1", "Player2")
+            rng = random.Random(seed)
+            while game.get_legal_moves():
+                state = game.to_string() + str(game.move_count)
+                self.assertEqual(keys.setdefault(game.hash(), state), state)
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+
+
+class MobilityTest(unittest.TestCase):
+    """Check the incremental move counts against generated moves"""
+
+    def assertCounts(self, game):
+        for player in ("Player1", "Player2"):
+            self.assertEqual(game.count_moves(player),
+                             len(game.get_legal_moves(player)))
+        self.assertEqual(game.count_moves(), len(game.get_legal_moves()))
+        state = [game.move_is_legal(game.index_to_move(idx))
+                 for idx in range(game.width * game.height)]
+        for idx, neighbors in enumerate(
+                isolation.isolation.neighbor_table(game.width, game.height)):
+            self.assertEqual(game.open_neighbors(idx),
+                             sum(state[n] for n in neighbors))
+
+    def check_counts(self, board_cls):
+        for seed, (width, height) in enumerate([(7, 7), (5, 8), (9, 6)]):
+            game = board_cls("Player1", "Player2", width, height)
+            rng = random.Random(seed)
+            self.assertCounts(game)
+            while game.get_legal_moves():
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+                self.assertCounts(game)
+                self.assertCounts(game.copy())
+            while game.move_count:
+                game.undo_move()
+                self.assertCounts(game)
+
+    def test_board_counts(self):
+        self.check_counts(isolation.Board)
+
+    def test_bitboard_counts(self):
+        self.check_counts(isolation.BitBoard)
+
+    def test_sample_scores_do_not_build_move_lists(self):
+        class CountingBoard(isolation.Board):
+            generated = 0
+
+            def get_legal_indices(self, player=None):
+                CountingBoard.generated += 1
+                return super().get_legal_indices(player)
+
+        game = random_game(CountingBoard, 3, 10)
+        CountingBoard.generated = 0
+        for score in (sample_players.null_score,
+                      sample_players.open_move_score,
+                      sample_players.improved_score,
+                      sample_players.center_score):
+            self.assertEqual(score(game, "Player1"),
+                             score(random_game(isolation.Board, 3, 10),
+                                   "Player1"))
+        self.assertEqual(CountingBoard.generated, 0)
+
+
+class CanonicalHashTest(unittest.TestCase):
+    """Check the incremental keys of the symmetric images of a position"""
+
+    def check_incremental(self, board_cls, width, height):
+        for seed in range(3):
+            game = board_cls("Player1", "Player2", width, height)
+            game.canonical_hash()
+            rng = random.Random(seed)
+            while game.get_legal_moves():
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+                self.assertEqual(game._image_keys,
+                                 game.copy()._compute_image_keys())
+                # the identity image is the position itself
+                self.assertEqual(game._image_keys[0], game.hash())
+            while game.move_count:
+                game.undo_move()
+                self.assertEqual(game._image_keys,
+                                 game._compute_image_keys())
+
+    def test_board_keys(self):
+        self.check_incremental(isolation.Board, 7, 7)
+        self.check_incremental(isolation.Board, 5, 8)
+
+    def test_bitboard_keys(self):
+        self.check_incremental(isolation.BitBoard, 7, 7)
+        self.check_incremental(isolation.BitBoard, 5, 8)
+
+    def test_transform_maps_moves(self):
+        symmetries = isolation.symmetry.cell_symmetries(7, 7)
+        for seed in range(5):
+            rng = random.Random(seed)
+            game = isolation.Board("Player1", "Player2")
+            line = []
+            for _ in range(8):
+                line.append(rng.choice(sorted(game.get_legal_indices())))
+                game.apply_index(line[-1])
+            key, perm = game.canonical_hash()
+            for sym in symmetries:
+                image = isolation.Board("Player1", "Player2")
+                for idx in line:
+                    image.apply_index(sym[idx])
+                image_key, image_perm = image.canonical_hash()
+                self.assertEqual(image_key, key)
+                # a move and its image reach the same canonical move
+                for idx in game.get_legal_indices():
+                    self.assertEqual(perm[idx], image_perm[sym[idx]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,291 @@
+"""Monte Carlo Tree Search player for Isolation.
+
+`MCTSPlayer` grows a UCT search tree for as long as the turn allows and
+plays the most visited move. Playouts run on bare integers -- a bitmask of
+blocked cells, the cell index of each player and the side to move, using the
+knight masks of `isolation.BitBoard` -- rather than on board objects.
+
+The tree is kept between turns: after playing a move the player keeps the
+subtree below it, and on its next turn re-roots the tree on the child that
+matches the move the opponent actually played, so the playouts spent on
+that line during the previous turn are not lost.
+
+After every call to get_move(), `self.playouts` holds the number of playouts
+of the turn, `self.playouts_per_sec` their rate, `self.tree_size` the number
+of nodes in the tree (including reused ones), `self.memory_bytes` an
+estimate of the memory held by the tree and `self.reused` whether the tree
+of the previous turn was reused.
+"""
+import math
+import random
+import timeit
+
+from isolation.bitboard import knight_masks
+
+UCT_C = math.sqrt(2)  # exploration constant of the UCB1 formula
+
+# Approximate memory cost of one tree node, as measured with sys.getsizeof()
+# on CPython 3 (64-bit): the node with its 7 slots (88 bytes), its list of
+# children (56 bytes plus 8 per child) and its list of untried moves (56
+# bytes plus 8 per move), counting each node once in its parent's lists.
+NODE_BYTES = 216
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+def mask_cells(mask):
+    """Return the list of cell indices set in `mask`. """
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
+
+def play_cell(state, cell):
+    """Return the state reached when the side to move in `state` moves to
+    `cell`.
+    """
+    blocked, locations, side = state
+    locations = (cell, locations[1]) if side == 0 else (locations[0], cell)
+    return blocked | 1 << cell, locations, side ^ 1
+
+
+def board_state(game):
+    """Return the position of `game` as (blocked, locations, side): the
+    bitmask of blocked cells, the cell index (or None) of player 1 and player
+    2, and the index of the player to move.
+    """
+    blocked = (1 << (game.width * game.height)) - 1
+    for move in game.get_blank_spaces():
+        blocked ^= 1 << game.move_to_index(move)
+    side = game.move_count % 2
+    locations = [game.get_player_location(game.active_player),
+                 game.get_player_location(game.inactive_player)]
+    locations = [None if loc is None else game.move_to_index(loc)
+                 for loc in locations]
+    if side:
+        locations.reverse()
+    return blocked, tuple(locations), side
+
+
+class Node(object):
+    """A node of the search tree: the position reached when the player on
+    `side` moves to the cell `move`. `wins` counts the playouts through the
+    node won by that player, and `untried` holds the moves of the position
+    that have no child node yet.
+    """
+    __slots__ = ("move", "side", "children", "untried", "visits", "wins",
+                 "size")
+
+    def __init__(self, move, side, untried):
+        self.move = move
+        self.side = side
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.
+        self.size = 1  # number of nodes in the subtree
+
+    def select_child(self, c):
+        """Return the child maximizing the UCB1 score. """
+        log_n = math.log(self.visits)
+        return max(self.children,
+                   key=lambda n: n.wins / n.visits +
+                   c * math.sqrt(log_n / n.visits))
+
+    def find_child(self, move):
+        for child in self.children:
+            if child.move == move:
+                return child
+        return None
+
+
+class MCTSPlayer(object):
+    """Game-playing agent that chooses moves with UCT Monte Carlo Tree Search.
+
+    Parameters
+    ----------
+    timeout : float (optional)
+        Time remaining (in milliseconds) when search is stopped.
+
+    c : float (optional)
+        The UCB1 exploration constant.
+
+    heuristic : bool (optional)
+        If True, playouts are biased: each playout move is the better of two
+        random legal moves, according to the difference between the moves
+        left to the mover and to its opponent after the move. Otherwise
+        playout moves are uniformly random.
+
+    reuse : bool (optional)
+        If True, keep the search tree between turns and re-root it on the
+        opponent's reply.
+
+    seed : int (optional)
+        Seed of the playout random number generator.
+    """
+
+    def __init__(self, timeout=10., c=UCT_C, heuristic=False, reuse=True,
+                 seed=None):
+        self.TIMER_THRESHOLD = timeout
+        self.c = c
+        self.heuristic = heuristic
+        self.reuse = reuse
+        self.rng = random.Random(seed)
+        self.time_left = None
+        self._root = None
+        self._root_state = None
+        self._tree = None
+        self.playouts = 0
+        self.playouts_per_sec = 0.
+        self.tree_size = 0
+        self.memory_bytes = 0
+        self.reused = False
+        self.total_playouts = 0
+        self.total_moves = 0
+        self.total_reused = 0
+
+    def get_move(self, game, time_left):
+        """Search for the best move with MCTS until the time limit is close
+        and return the most visited move.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        self.time_left = time_left
+        start = timeit.default_timer()
+        self._tree = None
+        self.masks = knight_masks(game.width, game.height)
+        self.full = (1 << (game.width * game.height)) - 1
+        state = board_state(game)
+        root = self.find_root(state)
+        self.reused = root is not None
+        if root is None:
+            root = Node(None, state[2] ^ 1, self.legal_cells(state))
+        self._root = None
+        if not root.untried and not root.children:
+            return (-1, -1)
+
+        self.playouts = 0
+        while time_left() > self.TIMER_THRESHOLD:
+            self.iterate(root, state)
+            self.playouts += 1
+
+        if root.children:
+            best = max(root.children, key=lambda n: n.visits)
+        else:
+            best = Node(self.rng.choice(root.untried), state[2], [])
+        elapsed = timeit.default_timer() - start
+        self.playouts_per_sec = self.playouts / elapsed if elapsed else 0.
+        self.tree_size = root.size
+        self.memory_bytes = root.size * NODE_BYTES
+        self.total_playouts += self.playouts
+        self.total_moves += 1
+        self.total_reused += self.reused
+
+        if self.reuse:
+            self._root = best
+            self._root_state = play_cell(state, best.move)
+        # freeing a large tree takes milliseconds, so the tree of the turn is
+        # only released at the start of the next turn
+        self._tree = root
+        return game.index_to_move(best.move)
+
+    def find_root(self, state):
+        """Return the node of the kept tree for `state`: the child of the
+        root kept by the previous turn that matches the opponent's reply, or
+        None if there is no such node.
+        """
+        if self._root is None:
+            return None
+        old_state = self._root_state
+        opp_move = state[1][old_state[2]]
+        if opp_move is None or play_cell(old_state, opp_move) != state:
+            return None
+        return self._root.find_child(opp_move)
+
+    def legal_cells(self, state):
+        """Return the cells the player to move in `state` can move to. """
+        blocked, locations, side = state
+        loc = locations[side]
+        if loc is None:
+            return mask_cells(self.full & ~blocked)
+        return mask_cells(self.masks[loc] & ~blocked)
+
+    def iterate(self, root, state):
+        """Run one selection, expansion, playout and backup from `root`. """
+        node = root
+        path = [node]
+        # selection
+        while not node.untried and node.children:
+            node = node.select_child(self.c)
+            state = play_cell(state, node.move)
+            path.append(node)
+        # expansion
+        if node.untried:
+            untried = node.untried
+            move = untried.pop(self.rng.randrange(len(untried)))
+            state_after = play_cell(state, move)
+            leaf = Node(move, state[2], self.legal_cells(state_after))
+            node.children.append(leaf)
+            for node in path:
+                node.size += 1
+            path.append(leaf)
+            state = state_after
+        loser = self.playout(state)
+        # backup
+        for node in path:
+            node.visits += 1
+            if node.side != loser:
+                node.wins += 1
+
+    def playout(self, state):
+        """Play random (or heuristic-biased) moves from `state` until the side
+        to move is stuck, and return that side, which loses.
+        """
+        blocked, locations, side = state
+        locations = list(locations)
+        masks, rng, full = self.masks, self.rng, self.full
+        while True:
+            loc = locations[side]
+            open_cells = (full if loc is None else masks[loc]) & ~blocked
+            if not open_cells:
+                return side
+            cells = mask_cells(open_cells)
+            move = cells[rng.randrange(len(cells))]
+            if self.heuristic and len(cells) > 1:
+                other = cells[rng.randrange(len(cells))]
+                if self._gain(other, blocked, locations, side) > \
+                        self._gain(move, blocked, locations, side):
+                    move = other
+            blocked |= 1 << move
+            locations[side] = move
+            side ^= 1
+
+    def _gain(self, cell, blocked, locations, side):
+        """Return the mobility difference for `side` after moving to `cell`.
+        """
+        blocked |= 1 << cell
+        opp = locations[side ^ 1]
+        own_moves = popcount(self.masks[cell] & ~blocked)
+        opp_moves = popcount((self.full if opp is None else self.masks[opp]) &
+                             ~blocked)
+        return own_moves - opp_moves
@@ -0,0 +1,130 @@
+"""Unit tests for the Monte Carlo Tree Search player."""
+
+import random
+import unittest
+
+import isolation
+import mcts
+import competition_agent
+import sample_players
+
+from endgame_test import active_player_wins
+from testutils import fixed_time, random_position
+
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(child) for child in node.children)
+
+
+class StateTest(unittest.TestCase):
+
+    def test_state_matches_board(self):
+        player = mcts.MCTSPlayer()
+        player.masks = mcts.knight_masks(7, 7)
+        player.full = (1 << 49) - 1
+        for seed in range(20):
+            game = random_position(player, seed, seed % 12, 7, 7)
+            state = mcts.board_state(game)
+            self.assertEqual(state[2], game.move_count % 2)
+            self.assertEqual(mcts.popcount(player.full & ~state[0]),
+                             len(game.get_blank_spaces()))
+            self.assertEqual(sorted(player.legal_cells(state)),
+                             sorted(game.get_legal_indices()))
+            for cell in game.get_legal_indices():
+                self.assertEqual(mcts.play_cell(state, cell),
+                                 mcts.board_state(game.forecast_index(cell)))
+
+
+class MCTSPlayerTest(unittest.TestCase):
+
+    def test_plays_legal_moves(self):
+        player = mcts.MCTSPlayer(seed=0)
+        for seed in range(6):
+            game = random_position(player, seed, 3 * seed, 7, 7)
+            move = player.get_move(game, fixed_time(30))
+            self.assertIn(move, game.get_legal_moves())
+
+    def test_tree_statistics(self):
+        player = mcts.MCTSPlayer(seed=0)
+        game = random_position(player, 0, 2, 5, 5)
+        player.get_move(game, fixed_time(50))
+        self.assertGreater(player.playouts, 0)
+        self.assertGreater(player.playouts_per_sec, 0)
+        self.assertEqual(player.memory_bytes,
+                         player.tree_size * mcts.NODE_BYTES)
+        # the kept subtree is the child played, so its playouts are all
+        # counted in the root visits of the turn
+        root = player._root
+        self.assertLess(count_nodes(root), player.tree_size)
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            self.assertEqual(node.size, count_nodes(node))
+            if node.children:
+                # the playout of a node's own expansion is not in a child
+                self.assertIn(node.visits - sum(child.visits
+                                                for child in node.children),
+                              (0, 1))
+            stack.extend(node.children)
+
+    def test_reuses_tree(self):
+        player = mcts.MCTSPlayer(seed=0)
+        game = isolation.Board(player, sample_players.RandomPlayer(), 7, 7)
+        game.apply_move(game.get_legal_moves()[0])
+        game.apply_move(game.get_legal_moves()[0])
+        move = player.get_move(game, fixed_time(50))
+        self.assertFalse(player.reused)
+        game.apply_move(move)
+        kept = player._root
+        reply = max(kept.children, key=lambda n: n.visits)
+        game.apply_index(reply.move)
+        visits = reply.visits
+        player.get_move(game, fixed_time(20))
+        self.assertTrue(player.reused)
+        self.assertEqual(player.total_reused, 1)
+        self.assertGreaterEqual(player.tree_size, count_nodes(reply))
+        self.assertGreater(reply.visits, visits)
+
+    def test_no_reuse(self):
+        player = mcts.MCTSPlayer(reuse=False, seed=0)
+        game = isolation.Board(player, "Opponent", 7, 7)
+        player.get_move(game, fixed_time(20))
+        self.assertIsNone(player._root)
+
+    def test_finds_winning_move(self):
+        found = 0
+        for seed in range(40):
+            player = mcts.MCTSPlayer(heuristic=bool(seed % 2), seed=seed)
+            rng = random.Random(seed)
+            game = isolation.Board(player, "Opponent", 5, 5)
+            while len(game.get_blank_spaces()) > 15 and game.get_legal_moves():
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            moves = game.get_legal_moves()
+            if game.active_player is not player or len(moves) < 2:
+                continue
+            winning = [m for m in moves
+                       if not active_player_wins(game.forecast_move(m))]
+            if not winning or len(winning) == len(moves):
+                continue
+            move = player.get_move(game, fixed_time(100))
+            self.assertIn(move, winning)
+            found += 1
+        self.assertGreater(found, 0)
+
+    def test_no_legal_moves(self):
+        player = mcts.MCTSPlayer()
+        game = isolation.Board(player, "Opponent", 3, 3)
+        game.apply_move((1, 1))  # no knight moves from the centre of a 3x3
+        game.apply_move((0, 0))
+        self.assertEqual(player.get_move(game, fixed_time(20)), (-1, -1))
+
+    def test_competition_agent(self):
+        player = competition_agent.CustomPlayer("mcts", timeout=30.)
+        game = isolation.Board(player, sample_players.RandomPlayer(), 7, 7)
+        winner, _, termination = game.play(time_limit=150)
+        self.assertNotIn(termination, ("timeout", "forfeit"))
+        self.assertGreater(player.mcts.total_playouts, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
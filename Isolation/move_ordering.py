@@ -0,0 +1,106 @@
+"""Move ordering heuristics for the alpha-beta search in game_agent.py.
+
+Alpha-beta prunes the most when the best move of each node is searched
+first. `MoveOrdering` sorts the legal moves of a node using, in priority
+order:
+
+    - the hash move : the best move stored for the position in the
+                      transposition table (or found on the previous pass)
+    - killer moves  : moves that caused a cutoff at the same ply elsewhere in
+                      the tree; they are kept for the whole get_move() call
+    - history       : a score per (side, move) that grows with every cutoff
+                      the move causes; it persists across iterative deepening
+                      passes and across the moves of a game
+
+Named orderings are cumulative: "hash" < "killers" < "history".
+"""
+
+ORDERINGS = ("none", "hash", "killers", "history")
+
+HASH_PRIORITY = float("inf")
+KILLER_PRIORITY = 2.0**60
+
+
+class MoveOrdering(object):
+    """Order the moves of alpha-beta nodes and learn from their cutoffs.
+
+    Parameters
+    ----------
+    hash_move : bool (optional)
+        Search the hash move first.
+
+    killers : bool (optional)
+        Search the killer moves of the ply next.
+
+    history : bool (optional)
+        Order the remaining moves by their history score.
+
+    num_killers : int (optional)
+        The number of killer moves remembered per ply.
+    """
+
+    def __init__(self, hash_move=True, killers=True, history=True,
+                 num_killers=2):
+        self.use_hash_move = hash_move
+        self.use_killers = killers
+        self.use_history = history
+        self.num_killers = num_killers
+        self.killers = []
+        self.history = {}
+
+    def new_search(self):
+        """Forget the killer moves and age the history scores, so that the
+        history of earlier turns still counts but recent cutoffs dominate.
+        """
+        self.killers = []
+        for key in self.history:
+            self.history[key] /= 2.
+
+    def order(self, moves, ply, hash_move=None):
+        """Return the list of moves in the order they should be searched. """
+        if not (self.use_killers or self.use_history):
+            if self.use_hash_move and hash_move in moves:
+                moves = list(moves)
+                moves.remove(hash_move)
+                moves.insert(0, hash_move)
+            return moves
+
+        killers = ()
+        if self.use_killers and ply < len(self.killers):
+            killers = self.killers[ply]
+        history = self.history if self.use_history else {}
+        side = ply & 1
+
+        def priority(move):
+            if move == hash_move and self.use_hash_move:
+                return HASH_PRIORITY
+            if move in killers:
+                return KILLER_PRIORITY - killers.index(move)
+            return history.get((side, move), 0.)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def record_cutoff(self, move, ply, depth):
+        """Update the killers and history after `move` caused a cutoff at
+        `ply` in a subtree searched `depth` plies deep.
+        """
+        if self.use_killers:
+            while len(self.killers) <= ply:
+                self.killers.append([])
+            killers = self.killers[ply]
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[self.num_killers:]
+        if self.use_history:
+            key = (ply & 1, move)
+            self.history[key] = self.history.get(key, 0.) + depth * depth
+
+
+def make_ordering(name):
+    """Return a `MoveOrdering` for one of the names in `ORDERINGS`. """
+    if name not in ORDERINGS:
+        raise ValueError("Unknown move ordering {!r}; expected one of {}"
+                         .format(name, ", ".join(ORDERINGS)))
+    level = ORDERINGS.index(name)
+    return MoveOrdering(hash_move=level >= 1, killers=level >= 2,
+                        history=level >= 3)
@@ -0,0 +1,50 @@
+"""Unit tests for the move ordering heuristics used by the search agents."""
+
+import unittest
+
+from move_ordering import MoveOrdering, make_ordering, ORDERINGS
+
+
+class MoveOrderingTest(unittest.TestCase):
+
+    MOVES = [(0, 1), (1, 0), (2, 3), (3, 2)]
+
+    def test_none_keeps_generation_order(self):
+        ordering = make_ordering("none")
+        self.assertEqual(ordering.order(self.MOVES, 0, (3, 2)), self.MOVES)
+
+    def test_hash_move_first(self):
+        ordering = make_ordering("hash")
+        self.assertEqual(ordering.order(self.MOVES, 0, (2, 3)),
+                         [(2, 3), (0, 1), (1, 0), (3, 2)])
+        # a hash move that is not legal here is ignored
+        self.assertEqual(ordering.order(self.MOVES, 0, (5, 5)), self.MOVES)
+
+    def test_killers_then_history(self):
+        ordering = make_ordering("history")
+        ordering.record_cutoff((3, 2), 1, 2)
+        ordering.record_cutoff((1, 0), 3, 4)
+        # killers of ply 1 come before moves with a larger history score
+        self.assertEqual(ordering.order(self.MOVES, 1, (0, 1)),
+                         [(0, 1), (3, 2), (1, 0), (2, 3)])
+        # history is shared by every ply of the same side
+        self.assertEqual(ordering.order(self.MOVES, 5)[:2], [(1, 0), (3, 2)])
+        # but not with the other side
+        self.assertEqual(ordering.order(self.MOVES, 2), self.MOVES)
+
+    def test_new_search_keeps_history_and_drops_killers(self):
+        ordering = MoveOrdering(num_killers=1)
+        ordering.record_cutoff((2, 3), 0, 3)
+        ordering.record_cutoff((3, 2), 0, 1)
+        self.assertEqual(ordering.killers, [[(3, 2)]])
+        ordering.new_search()
+        self.assertEqual(ordering.killers, [])
+        self.assertEqual(ordering.history[(0, (2, 3))], 4.5)
+
+    def test_unknown_ordering(self):
+        self.assertRaises(ValueError, make_ordering, "random")
+        self.assertEqual(len(ORDERINGS), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""Opening book for the Isolation agents.
+
+A book holds the best move, found by a deep offline search (see
+build_book.py), for every position reachable in the first few plies of a
+game on one board size. Positions are stored once per symmetry class: the
+key of a position is the smallest Zobrist key among its images under the
+symmetries of the board, and the stored move is expressed in the frame of
+that image.
+
+File layout (little endian):
+
+    header : magic b"ISOBOOK1", width (u16), height (u16), plies (u16),
+             search depth (u16), number of entries (u32)
+    entries: (key (u64), move cell index (u16)) sorted by key
+
+The file is memory mapped and searched by bisection, so opening a book costs
+nothing beyond the mapping and lookups only touch the pages they read.
+"""
+import mmap
+import struct
+
+
+MAGIC = b"ISOBOOK1"
+HEADER = struct.Struct("<8sHHHHI")
+ENTRY = struct.Struct("<QH")
+
+
+def position_cells(game):
+    """Return the position of `game` as (blocked, locations, side), where
+    `blocked` is the list of blocked cell indices, `locations` the cell index
+    (or None) of player 1 and player 2, and `side` the index of the player
+    to move.
+    """
+    blank = set(game.move_to_index(move) for move in game.get_blank_spaces())
+    blocked = [idx for idx in range(game.width * game.height)
+               if idx not in blank]
+    side = game.move_count % 2
+    locations = [game.get_player_location(game.active_player),
+                 game.get_player_location(game.inactive_player)]
+    locations = [None if loc is None else game.move_to_index(loc)
+                 for loc in locations]
+    if side:
+        locations.reverse()
+    return blocked, locations, side
+
+
+def canonical_key(game):
+    """Return (key, perm): the smallest Zobrist key of the images of the
+    position of `game` under the board symmetries, and the cell permutation
+    that produces that image (see `Board.canonical_hash()`). Under the
+    identity the key equals `game.hash()`.
+
+    The keys are computed on a copy, so `game` does not start updating the
+    keys of its images on every move of a later search.
+    """
+    return game.copy().canonical_hash()
+
+
+def write_book(path, width, height, plies, depth, entries):
+    """Write a book file from a dict mapping canonical keys to the cell index
+    of the best move in the canonical frame.
+    """
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, width, height, plies, depth, len(entries)))
+        for key in sorted(entries):
+            f.write(ENTRY.pack(key, entries[key]))
+
+
+class OpeningBook(object):
+    """Read-only, memory-mapped view of a book file written by `write_book`.
+
+    Parameters
+    ----------
+    path : str
+        The book file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.plies, self.depth, self._count = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or \
+                len(self._map) != HEADER.size + self._count * ENTRY.size:
+            self._map.close()
+            raise ValueError("{} is not an Isolation opening book".format(path))
+
+    def __len__(self):
+        return self._count
+
+    def __getstate__(self):
+        # the mapping cannot be pickled; workers reopen the file instead
+        return self.path
+
+    def __setstate__(self, path):
+        self.__init__(path)
+
+    def close(self):
+        self._map.close()
+
+    def _find(self, key):
+        """Return the canonical move stored for `key`, or None. """
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, move = ENTRY.unpack_from(self._map,
+                                              HEADER.size + mid * ENTRY.size)
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return move
+        return None
+
+    def lookup(self, game):
+        """Return the book move, as a (row, column) pair, for the position of
+        `game`, or None if the position is not in the book.
+        """
+        if (game.width, game.height) != (self.width, self.height) or \
+                game.move_count >= self.plies:
+            return None
+        key, perm = canonical_key(game)
+        move = self._find(key)
+        if move is None:
+            return None
+        move = game.index_to_move(perm.index(move))
+        # guard against a (very unlikely) key collision
+        return move if move in game.get_legal_moves() else None
@@ -0,0 +1,129 @@
+"""Unit tests for the opening book builder and the memory-mapped reader."""
+
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+
+import isolation
+import build_book
+import game_agent
+import opening_book
+from isolation.symmetry import cell_symmetries
+from sample_players import improved_score
+
+
+def transformed_game(board_cls, line, perm, width, height):
+    """Return a board with the moves of `line` (cell indices) mapped by the
+    cell permutation `perm`."""
+    game = board_cls("Player1", "Player2", width, height)
+    for idx in line:
+        game.apply_index(perm[idx])
+    return game
+
+
+class CanonicalKeyTest(unittest.TestCase):
+
+    def test_symmetries_are_knight_preserving(self):
+        for width, height in [(7, 7), (5, 8)]:
+            perms = cell_symmetries(width, height)
+            self.assertEqual(len(perms), 8 if width == height else 4)
+            self.assertEqual(len(set(perms)), len(perms))
+            table = isolation.isolation.neighbor_table(width, height)
+            for perm in perms:
+                self.assertEqual(sorted(perm), list(range(width * height)))
+                for idx, neighbors in enumerate(table):
+                    self.assertEqual(sorted(perm[n] for n in neighbors),
+                                     sorted(table[perm[idx]]))
+
+    def test_symmetric_positions_share_key(self):
+        for width, height in [(7, 7), (5, 8)]:
+            for seed in range(5):
+                rng = random.Random(seed)
+                game = isolation.Board("Player1", "Player2", width, height)
+                line = []
+                for _ in range(6):
+                    idx = rng.choice(sorted(game.get_legal_indices()))
+                    game.apply_index(idx)
+                    line.append(idx)
+                key, perm = opening_book.canonical_key(game)
+                self.assertEqual(opening_book.canonical_key(
+                    transformed_game(isolation.Board, line, perm, width,
+                                     height))[0], key)
+                for sym in cell_symmetries(width, height):
+                    for board_cls in (isolation.Board, isolation.BitBoard):
+                        image = transformed_game(board_cls, line, sym, width,
+                                                 height)
+                        self.assertEqual(opening_book.canonical_key(image)[0],
+                                         key)
+                        # the identity image key is the Zobrist key
+                        if sym == cell_symmetries(width, height)[0]:
+                            self.assertEqual(
+                                opening_book.position_cells(image),
+                                opening_book.position_cells(game))
+                            self.assertEqual(
+                                image.hash(), game.hash())
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    WIDTH, HEIGHT, PLIES, DEPTH = 5, 5, 3, 3
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmpdir, "book.bin")
+        cls.count = build_book.build_book(cls.path, cls.WIDTH, cls.HEIGHT,
+                                          cls.PLIES, cls.DEPTH)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def test_positions_are_deduplicated(self):
+        positions = build_book.book_positions(self.WIDTH, self.HEIGHT,
+                                              self.PLIES)
+        # 25 first moves fall into 6 classes under the 8 symmetries
+        self.assertEqual(sum(len(line) == 1 for line in positions.values()), 6)
+        self.assertEqual(self.count, len(positions))
+        book = opening_book.OpeningBook(self.path)
+        self.assertEqual(len(book), self.count)
+        self.assertEqual((book.width, book.height, book.plies, book.depth),
+                         (self.WIDTH, self.HEIGHT, self.PLIES, self.DEPTH))
+
+    def test_lookup_covers_every_book_position(self):
+        book = opening_book.OpeningBook(self.path)
+        for seed in range(20):
+            rng = random.Random(seed)
+            game = isolation.BitBoard("Player1", "Player2", self.WIDTH,
+                                      self.HEIGHT)
+            for ply in range(self.PLIES + 1):
+                move = book.lookup(game)
+                if ply < self.PLIES:
+                    self.assertIn(move, game.get_legal_moves())
+                else:
+                    self.assertIsNone(move)
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+        other_size = isolation.Board("Player1", "Player2", 7, 7)
+        self.assertIsNone(book.lookup(other_size))
+
+    def test_rejects_other_files(self):
+        path = os.path.join(self.tmpdir, "not_a_book.bin")
+        with open(path, "wb") as f:
+            f.write(b"x" * 64)
+        self.assertRaises(ValueError, opening_book.OpeningBook, path)
+
+    def test_player_uses_book(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                            book=self.path)
+        player = pickle.loads(pickle.dumps(player))
+        game = isolation.Board(player, "Player2", self.WIDTH, self.HEIGHT)
+        move = player.get_move(game, lambda: 1000.)
+        self.assertEqual(move, player.book.lookup(game))
+        self.assertEqual((player.book_hits, player.nodes), (1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,324 @@
+"""Parallel alpha-beta search by splitting the root moves across processes.
+
+`ParallelAlphaBetaPlayer` runs the same iterative deepening as
+`AlphaBetaPlayer`, but every pass is searched by a pool of worker processes,
+each holding its own `AlphaBetaPlayer` (with its own transposition table and
+move ordering tables, kept across passes and turns). A pass first searches
+the principal variation move of the previous pass in one worker; the other
+root moves are then searched in parallel, one task per move, with the score
+of the first move as the lower bound of their window, so a move is only
+scored exactly when it beats the best move so far ("young brothers wait" at
+the root).
+
+Workers cannot call the `time_left` function of the main process, so each
+pass sends them the absolute deadline of the turn on the shared monotonic
+clock of `timeit.default_timer`; workers abandon their search at the same
+threshold as the main process, which stops waiting for results as soon as
+its own `time_left()` falls below `TIMER_THRESHOLD`.
+
+Run `python parallel.py` to compare the time to depth and the nodes per
+second of the parallel player against the single process player on a fixed
+set of positions.
+
+NOTE: worker processes cannot start processes of their own, so the player
+falls back to the single process search when it runs inside a worker of
+`tournament.py --workers N`.
+"""
+import argparse
+import multiprocessing
+import random
+import timeit
+
+from isolation import Board
+import game_agent
+from game_agent import AlphaBetaPlayer, custom_score, time_check
+
+POLL_SECONDS = .001  # interval between two checks of the clock while waiting
+BENCH_DEPTH = 7
+BENCH_POSITIONS = 8
+
+
+def position_line(game):
+    """Return a tuple of cell indices that reproduces the position of `game`
+    when applied in order to an empty board of the same size. Only the
+    blocked cells, the player locations and the player to move of a position
+    matter, so the moves before the last one of each player are played in an
+    arbitrary order.
+    """
+    locations = [game.get_player_location(game.active_player),
+                 game.get_player_location(game.inactive_player)]
+    if game.move_count % 2:
+        locations.reverse()
+    locations = [None if loc is None else game.move_to_index(loc)
+                 for loc in locations]
+    blocked = set(range(game.width * game.height)) - set(
+        game.move_to_index(move) for move in game.get_blank_spaces())
+    others = sorted(blocked - set(locations))
+    # each player plays its share of the other blocked cells, then moves to
+    # its current location
+    counts = [(game.move_count + 1) // 2, game.move_count // 2]
+    moves = [[], []]
+    for side in (0, 1):
+        if counts[side]:
+            share = counts[side] - 1
+            moves[side] = others[:share] + [locations[side]]
+            others = others[share:]
+    line = []
+    for ply in range(game.move_count):
+        line.append(moves[ply % 2][ply // 2])
+    return tuple(line)
+
+
+def line_board(line, player, width=7, height=7):
+    """Return the board reached by the moves of `line` (see position_line),
+    with `player` as the player to move and a placeholder opponent.
+    """
+    if len(line) % 2 == 0:
+        game = Board(player, "Opponent", width, height)
+    else:
+        game = Board("Opponent", player, width, height)
+    for idx in line:
+        game.apply_index(idx)
+    return game
+
+
+# Player of each worker process, set once per process by _init_worker
+_worker_player = None
+
+
+def _init_worker(score_fn, timeout, tt_mb, ordering):
+    global _worker_player
+    _worker_player = AlphaBetaPlayer(score_fn=score_fn, timeout=timeout,
+                                     tt_mb=tt_mb, ordering=ordering,
+                                     endgame=False)
+    _worker_player.turn = None
+
+
+def _search_moves(task):
+    """Search the root moves of a task in the worker process and return
+    (move, score, pv, nodes) with the cell index of the best move, its score,
+    the principal variation as cell indices and the number of nodes searched;
+    move is None if the search ran out of time.
+    """
+    turn, width, height, line, depth, root_moves, pv, alpha, deadline = task
+    player = _worker_player
+    game = line_board(line, player, width, height)
+    player.time_left = lambda: 1000 * (deadline - timeit.default_timer())
+    if turn != player.turn:
+        player.new_search(game)
+        player.turn = turn
+    nodes = player.nodes
+    player.root_moves = set(root_moves)
+    player.pv = tuple(game.index_to_move(idx) for idx in pv)
+    try:
+        move = player.alphabeta(game, depth, alpha)
+    except game_agent.SearchTimeout:
+        return None, None, (), player.nodes - nodes
+    finally:
+        player.root_moves = None
+    if move == (-1, -1):
+        # every move of the task loses, or fails low: report the first one
+        return root_moves[0], player.last_score, root_moves[:1], \
+            player.nodes - nodes
+    return (game.move_to_index(move), player.last_score,
+            tuple(game.move_to_index(m) for m in player.last_pv),
+            player.nodes - nodes)
+
+
+class ParallelAlphaBetaPlayer(AlphaBetaPlayer):
+    """Game-playing agent that searches the root moves of every iterative
+    deepening pass in parallel worker processes.
+
+    Parameters
+    ----------
+    workers : int (optional)
+        The number of worker processes; defaults to the number of cores.
+        With one worker the player searches in its own process exactly like
+        `AlphaBetaPlayer`.
+
+    search_depth, score_fn, timeout, tt_mb, ordering, book, endgame
+        As for `AlphaBetaPlayer`; `tt_mb` is the budget of the table of each
+        worker. `score_fn` must be a module level function so that it can be
+        sent to the workers.
+
+    The worker pool is started on the first call to get_move() and kept
+    until close() is called. `self.nodes` sums the nodes searched by all
+    workers, including the work of passes that ran out of time.
+    """
+    def __init__(self, workers=None, search_depth=3, score_fn=custom_score,
+                 timeout=10., tt_mb=0, ordering="history", book=None,
+                 endgame=True):
+        super().__init__(search_depth, score_fn, timeout, tt_mb=tt_mb,
+                         ordering=ordering, book=book, endgame=endgame)
+        self.workers = workers or multiprocessing.cpu_count()
+        self.tt_mb = tt_mb
+        self.ordering_name = ordering
+        self._pool = None
+        self._turn = 0
+        self._line = ()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(time_left=None, _pool=None)
+        return state
+
+    def close(self):
+        """Stop the worker processes. """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def start(self):
+        """Start the worker pool unless it is running or cannot be used. """
+        if self._pool is not None or self.workers < 2 or \
+                multiprocessing.current_process().daemon:
+            return
+        self._pool = multiprocessing.Pool(
+            self.workers, _init_worker,
+            (self.score, self.TIMER_THRESHOLD, self.tt_mb,
+             self.ordering_name))
+
+    def get_move(self, game, time_left):
+        """Search for the best move like `AlphaBetaPlayer.get_move()`, with
+        the passes of iterative deepening split across the worker processes.
+        """
+        self.start()
+        return super().get_move(game, time_left)
+
+    def new_search(self, game):
+        super().new_search(game)
+        self._turn += 1
+        self._line = position_line(game)
+
+    def aspiration_search(self, game, depth):
+        """Search `game` to `depth` plies, in parallel if the worker pool is
+        running. Returns the best move and leaves the score and principal
+        variation in `self.last_score` and `self.last_pv`, like alphabeta().
+        """
+        if self._pool is None:
+            return super().aspiration_search(game, depth)
+        moves = game.get_legal_indices()
+        if not moves:
+            self.last_score, self.last_pv = self.score(game, self), ((-1, -1),)
+            return (-1, -1)
+        pv = tuple(game.move_to_index(move) for move in self.pv)
+        first = pv[0] if pv and pv[0] in moves else moves[0]
+        deadline = timeit.default_timer() + self.time_left() / 1000
+
+        def task(root_moves, pv, alpha):
+            return (self._turn, game.width, game.height, self._line, depth,
+                    root_moves, pv, alpha, deadline)
+
+        best_move, best_score, best_pv = self.wait(
+            [task((first,), pv, float("-inf"))])[0][:3]
+        others = []
+        if best_score < float("inf"):
+            others = [task((move,), (), best_score) for move in moves
+                      if move != first]
+        for move, score, line, _ in self.wait(others):
+            if score > best_score:
+                best_move, best_score, best_pv = move, score, line
+        self.last_score = best_score
+        self.last_pv = tuple(game.index_to_move(idx) for idx in best_pv)
+        return game.index_to_move(best_move)
+
+    def wait(self, tasks):
+        """Run the tasks in the worker pool and return their results, or
+        raise `game_agent.SearchTimeout` if the turn runs out of time first.
+        """
+        results = [self._pool.apply_async(_search_moves, (task,))
+                   for task in tasks]
+        for result in results:
+            while not result.ready():
+                time_check(self)
+                result.wait(POLL_SECONDS)
+        results = [result.get() for result in results]
+        self.nodes += sum(result[3] for result in results)
+        if any(result[0] is None for result in results):
+            raise game_agent.SearchTimeout()
+        return results
+
+
+def search_to_depth(player, game, depth):
+    """Run the iterative deepening passes of `player` on `game` up to
+    `depth` without a time limit. Returns (seconds, nodes, move).
+    """
+    player.time_left = lambda: float("inf")
+    player.new_search(game)
+    start = timeit.default_timer()
+    for d in range(1, min(depth, len(game.get_blank_spaces())) + 1):
+        move = player.aspiration_search(game, d)
+        player.pv, player.pv_score = player.last_pv, player.last_score
+    return timeit.default_timer() - start, player.nodes, move
+
+
+def bench_positions(count, seed=0, plies=(4, 12)):
+    """Return `count` positions reached by random moves, each with a number
+    of plies drawn from the range `plies` and with moves left to play.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = Board("Player1", "Player2")
+        for _ in range(rng.randint(*plies)):
+            moves = game.get_legal_indices()
+            if not moves:
+                break
+            game.apply_index(rng.choice(sorted(moves)))
+        if game.get_legal_indices():
+            positions.append(position_line(game))
+    return positions
+
+
+def speedup_report(workers, depth=BENCH_DEPTH, count=BENCH_POSITIONS,
+                   seed=0):
+    """Search every benchmark position to `depth` with the single process
+    and the parallel player, print the time to depth and nodes per second of
+    both, and return the overall speedup in time to depth.
+    """
+    serial = AlphaBetaPlayer(score_fn=custom_score, tt_mb=16, endgame=False)
+    parallel = ParallelAlphaBetaPlayer(workers, score_fn=custom_score,
+                                       tt_mb=16, endgame=False)
+    parallel.start()
+    print("{:>4}{:>12}{:>12}{:>12}{:>12}{:>10}".format(
+        "Pos", "Serial s", "Parallel s", "Serial n/s", "Parallel n/s",
+        "Speedup"))
+    totals = [0., 0.]
+    try:
+        for pos, line in enumerate(bench_positions(count, seed)):
+            row = []
+            for player in (serial, parallel):
+                game = line_board(line, player)
+                row.append(search_to_depth(player, game, depth)[:2])
+            (s_time, s_nodes), (p_time, p_nodes) = row
+            totals[0] += s_time
+            totals[1] += p_time
+            print("{:>4}{:>12.3f}{:>12.3f}{:>12.0f}{:>12.0f}{:>9.2f}x".format(
+                pos + 1, s_time, p_time, s_nodes / s_time, p_nodes / p_time,
+                s_time / p_time))
+    finally:
+        parallel.close()
+    speedup = totals[0] / totals[1]
+    print("Total: serial {:.3f}s, parallel {:.3f}s with {} workers, speedup "
+          "{:.2f}x".format(totals[0], totals[1], parallel.workers, speedup))
+    return speedup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the parallel and "
+                                                 "single process search")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--depth", type=int, default=BENCH_DEPTH,
+                        help="search depth of every position")
+    parser.add_argument("--positions", type=int, default=BENCH_POSITIONS,
+                        help="number of benchmark positions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    speedup_report(args.workers or multiprocessing.cpu_count(), args.depth,
+                   args.positions, args.seed)
+
+
+if __name__ == "__main__":
+    main()
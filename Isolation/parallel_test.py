@@ -0,0 +1,96 @@
+"""Unit tests for the parallel root splitting search."""
+
+import pickle
+import timeit
+import unittest
+
+import isolation
+import parallel
+import sample_players
+
+from game_agent import AlphaBetaPlayer
+from testutils import random_game
+
+
+class PositionLineTest(unittest.TestCase):
+
+    def test_line_reproduces_position(self):
+        for seed in range(30):
+            game = random_game(isolation.Board, seed, seed % 20)
+            copy = isolation.Board("Player1", "Player2")
+            for idx in parallel.position_line(game):
+                copy.apply_index(idx)
+            self.assertEqual(copy.hash(), game.hash())
+            self.assertEqual(copy.move_count, game.move_count)
+            self.assertEqual(sorted(copy.get_blank_spaces()),
+                             sorted(game.get_blank_spaces()))
+            for player in ("Player1", "Player2"):
+                self.assertEqual(copy.get_player_location(player),
+                                 game.get_player_location(player))
+
+
+class SearchMovesTest(unittest.TestCase):
+
+    def test_lost_task_reports_one_of_its_moves(self):
+        # every move of this position loses within 6 plies
+        line = parallel.position_line(random_game(isolation.Board, 4, 32))
+        parallel._init_worker(sample_players.improved_score, 10., 0,
+                              "history")
+        self.addCleanup(setattr, parallel, "_worker_player", None)
+        for root_moves in ((11,), (33,)):
+            task = (0, 7, 7, line, 6, root_moves, (), float("-inf"),
+                    timeit.default_timer() + 10)
+            move, score, pv, nodes = parallel._search_moves(task)
+            self.assertEqual(move, root_moves[0])
+            self.assertEqual(score, float("-inf"))
+            self.assertEqual(pv, root_moves)
+
+
+class ParallelPlayerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.player = parallel.ParallelAlphaBetaPlayer(
+            2, score_fn=sample_players.improved_score, endgame=False)
+        self.addCleanup(self.player.close)
+
+    def test_scores_match_serial_search(self):
+        serial = AlphaBetaPlayer(score_fn=sample_players.improved_score,
+                                 endgame=False)
+        self.player.start()
+        for line in parallel.bench_positions(4, seed=3):
+            scores = []
+            for player in (serial, self.player):
+                game = parallel.line_board(line, player)
+                _, nodes, move = parallel.search_to_depth(player, game, 4)
+                self.assertIn(move, game.get_legal_moves())
+                self.assertGreater(nodes, 0)
+                scores.append(player.last_score)
+            self.assertEqual(scores[0], scores[1])
+
+    def test_plays_within_time(self):
+        game = isolation.Board(self.player, sample_players.RandomPlayer())
+        winner, history, termination = game.play(time_limit=150)
+        self.assertNotIn(termination, ("timeout", "forfeit"))
+        self.assertIsNotNone(self.player._pool)
+        self.assertGreater(self.player.total_nodes, 0)
+
+    def test_single_worker_searches_in_process(self):
+        player = parallel.ParallelAlphaBetaPlayer(1)
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        end = timeit.default_timer() + .1
+        move = player.get_move(game,
+                               lambda: 1000 * (end - timeit.default_timer()))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertIsNone(player._pool)
+
+    def test_pickle_drops_pool(self):
+        self.player.start()
+        copy = pickle.loads(pickle.dumps(self.player))
+        self.assertIsNone(copy._pool)
+        self.assertEqual(copy.workers, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
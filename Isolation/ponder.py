@@ -0,0 +1,211 @@
+"""Pondering: search on the opponent's time.
+
+`PonderingPlayer` is an `AlphaBetaPlayer` that keeps searching while the
+opponent thinks. After each of its own moves it predicts the opponent's reply
+-- the second move of its principal variation -- and a background worker
+process starts an iterative deepening search of the position after that
+reply, with no deadline other than `ponder_limit`.
+
+`isolation.Board.play()` calls `move_played()` on the players after every
+move. When the opponent's move matches the prediction (a ponder hit), the
+next call to get_move() hands the turn deadline to the worker, which keeps
+deepening the search it already started, with its transposition table and
+move ordering tables intact, and returns its result. When the move does not
+match (a ponder miss), the worker is stopped, its work is discarded and the
+move is searched in the main process as usual.
+
+`self.ponder_hits` and `self.ponder_misses` count the predictions that were
+checked, and `self.ponder_depth` sums the depth the worker had already
+completed when each hit was confirmed.
+
+NOTE: pondering only saves time when the worker has a core of its own. The
+worker is started on the first ponder and cannot be started inside a worker
+of `tournament.py --workers N`, where the player searches without pondering.
+"""
+import multiprocessing
+import timeit
+
+from endgame import is_separated
+import game_agent
+from game_agent import AlphaBetaPlayer, custom_score
+from parallel import line_board, position_line
+
+PONDER_LIMIT = 5000.  # most milliseconds spent on one ponder
+
+
+def _ponder_worker(conn, deadline, progress, score_fn, timeout, tt_mb,
+                   ordering):
+    """Search every position received on `conn` until the shared `deadline`
+    (in seconds of `timeit.default_timer`) passes, and send back the result
+    of the last completed iteration as (move, depth, pv, score, nodes); move
+    is None if not even the first iteration completed. The shared `progress`
+    holds the depth of the last completed iteration.
+    """
+    player = AlphaBetaPlayer(score_fn=score_fn, timeout=timeout, tt_mb=tt_mb,
+                             ordering=ordering, endgame=False)
+    player.time_left = lambda: 1000 * (deadline.value - timeit.default_timer())
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        width, height, line, pv = task
+        game = line_board(line, player, width, height)
+        player.new_search(game)
+        player.pv = pv
+        move = None
+        progress.value = 0
+        max_depth = len(game.get_blank_spaces())
+        depth = 0
+        try:
+            while player.time_left() > player.TIMER_THRESHOLD and \
+                    depth < max_depth:
+                depth += 1
+                move = player.aspiration_search(game, depth)
+                player.depth_reached = depth
+                player.pv, player.pv_score = player.last_pv, player.last_score
+                progress.value = depth
+        except game_agent.SearchTimeout:
+            pass
+        conn.send((move, player.depth_reached, player.pv, player.pv_score,
+                   player.nodes))
+
+
+class PonderingPlayer(AlphaBetaPlayer):
+    """Alpha-beta player that searches the predicted reply of the opponent
+    while the opponent thinks.
+
+    Parameters
+    ----------
+    search_depth, score_fn, timeout, tt_mb, ordering, book, endgame
+        As for `AlphaBetaPlayer`; the ponder worker uses the same settings
+        and its own transposition table of `tt_mb` megabytes. `score_fn`
+        must be a module level function so that it can be sent to the
+        worker.
+
+    ponder_limit : float (optional)
+        The most milliseconds the worker spends on one ponder, so that a
+        ponder left behind when a game ends does not keep a core busy.
+    """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 tt_mb=16, ordering="history", book=None, endgame=True,
+                 ponder_limit=PONDER_LIMIT):
+        super().__init__(search_depth, score_fn, timeout, tt_mb=tt_mb,
+                         ordering=ordering, book=book, endgame=endgame)
+        self.tt_mb = tt_mb
+        self.ordering_name = ordering
+        self.ponder_limit = ponder_limit
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self.ponder_depth = 0
+        self._process = None
+        self._conn = None
+        self._deadline = None
+        self._progress = None
+        # (hash, move) of the predicted reply while the worker searches it
+        self._pondering = None
+        self._ponder_hit = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(time_left=None, _process=None, _conn=None,
+                     _deadline=None, _progress=None, _pondering=None,
+                     _ponder_hit=False)
+        return state
+
+    @property
+    def ponder_hit_rate(self):
+        """The fraction of the predicted replies that were played. """
+        checked = self.ponder_hits + self.ponder_misses
+        return self.ponder_hits / checked if checked else 0.
+
+    def start(self):
+        """Start the ponder worker unless it is running or cannot be used.
+        Returns True if the worker is running.
+        """
+        if self._process is None and \
+                not multiprocessing.current_process().daemon:
+            self._conn, child = multiprocessing.Pipe()
+            self._deadline = multiprocessing.Value("d", 0., lock=False)
+            self._progress = multiprocessing.Value("i", 0, lock=False)
+            self._process = multiprocessing.Process(
+                target=_ponder_worker,
+                args=(child, self._deadline, self._progress, self.score,
+                      self.TIMER_THRESHOLD, self.tt_mb, self.ordering_name),
+                daemon=True)
+            self._process.start()
+        return self._process is not None
+
+    def close(self):
+        """Stop the ponder worker. """
+        if self._process is not None:
+            self.stop_ponder()
+            self._conn.send(None)
+            self._process.join()
+            self._process = None
+
+    def move_played(self, game, move):
+        """Called by `Board.play()` after every move: start pondering after
+        our own moves, and check the prediction after the opponent's.
+        """
+        if game.active_player is self:
+            if self._pondering is None:
+                return
+            if move == self._pondering[1]:
+                self._ponder_hit = True
+                self.ponder_hits += 1
+                self.ponder_depth += self._progress.value
+            else:
+                self.stop_ponder()
+                self.ponder_misses += 1
+        elif game.inactive_player is self:
+            self.stop_ponder()
+            if len(self.pv) < 2 or self.pv[0] != move or \
+                    self.pv[1] not in game.get_legal_moves():
+                return
+            if not self.start():
+                return
+            game.apply_move(self.pv[1])
+            self._deadline.value = (timeit.default_timer() +
+                                    self.ponder_limit / 1000)
+            self._conn.send((game.width, game.height, position_line(game),
+                             self.pv[2:]))
+            self._pondering = (game.hash(), self.pv[1])
+
+    def stop_ponder(self):
+        """Stop the worker and discard its result. """
+        if self._pondering is not None:
+            self._deadline.value = 0.
+            self._conn.recv()
+            self._pondering = None
+            self._ponder_hit = False
+
+    def get_move(self, game, time_left):
+        """Search for the best move like `AlphaBetaPlayer.get_move()`, or let
+        the ponder worker finish its search if it pondered this position.
+        """
+        if self._pondering is not None:
+            if self._ponder_hit and game.hash() == self._pondering[0] and \
+                    not (self.endgame and is_separated(game)):
+                move = self.finish_ponder(time_left)
+                if move is not None:
+                    return move
+            self.stop_ponder()
+        return super().get_move(game, time_left)
+
+    def finish_ponder(self, time_left):
+        """Give the ponder worker the deadline of the turn and return its
+        move, or None if it did not complete a single iteration.
+        """
+        self.time_left = time_left
+        self._deadline.value = timeit.default_timer() + time_left() / 1000
+        self._pondering = None
+        self._ponder_hit = False
+        move, depth, pv, score, nodes = self._conn.recv()
+        if move is None:
+            return None
+        self.nodes, self.depth_reached = nodes, depth
+        self.pv, self.pv_score = pv, score
+        self.total_nodes += nodes
+        self.total_depth += depth
+        self.total_moves += 1
+        return move
@@ -0,0 +1,105 @@
+"""Unit tests for the move notifications of Board.play and for pondering."""
+
+import pickle
+import unittest
+
+import isolation
+import ponder
+import sample_players
+
+from testutils import fixed_time
+
+
+class ObservingPlayer(sample_players.GreedyPlayer):
+    """Greedy player that records every move_played() notification. """
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def move_played(self, game, move):
+        self.seen.append((move, game.move_count, game.active_player))
+
+
+class MovePlayedTest(unittest.TestCase):
+
+    def test_observers_see_every_move(self):
+        player = ObservingPlayer()
+        game = isolation.Board(player, sample_players.RandomPlayer(), 5, 5)
+        _, history, _ = game.play()
+        self.assertEqual([move for move, _, _ in player.seen],
+                         [tuple(move) for move in history])
+        self.assertEqual([count for _, count, _ in player.seen],
+                         list(range(1, len(history) + 1)))
+
+    def test_self_play_is_notified_once(self):
+        player = ObservingPlayer()
+        game = isolation.Board(player, player, 5, 5)
+        _, history, _ = game.play()
+        self.assertEqual(len(player.seen), len(history))
+
+
+class PonderingPlayerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.player = ponder.PonderingPlayer(
+            score_fn=sample_players.improved_score, endgame=False)
+        self.addCleanup(self.player.close)
+        self.game = isolation.Board(self.player, "Opponent")
+        self.game.apply_move((3, 3))
+        self.game.apply_move((0, 0))
+
+    def play_own_move(self):
+        move = self.player.get_move(self.game.copy(), fixed_time(50))
+        self.game.apply_move(move)
+        self.player.move_played(self.game.copy(), move)
+        return move
+
+    def play_reply(self, move):
+        self.game.apply_move(move)
+        self.player.move_played(self.game.copy(), move)
+
+    def test_ponder_hit(self):
+        self.play_own_move()
+        self.assertIsNotNone(self.player._pondering)
+        predicted = self.player._pondering[1]
+        self.assertEqual(predicted, self.player.pv[1])
+        self.play_reply(predicted)
+        self.assertEqual((self.player.ponder_hits,
+                          self.player.ponder_misses), (1, 0))
+        move = self.player.get_move(self.game.copy(), fixed_time(50))
+        self.assertIn(move, self.game.get_legal_moves())
+        self.assertGreater(self.player.depth_reached, 0)
+        self.assertIsNone(self.player._pondering)
+        self.assertEqual(self.player.ponder_hit_rate, 1.)
+
+    def test_ponder_miss(self):
+        self.play_own_move()
+        predicted = self.player._pondering[1]
+        other = [move for move in self.game.get_legal_moves()
+                 if move != predicted]
+        self.play_reply(other[0])
+        self.assertEqual((self.player.ponder_hits,
+                          self.player.ponder_misses), (0, 1))
+        self.assertIsNone(self.player._pondering)
+        move = self.player.get_move(self.game.copy(), fixed_time(50))
+        self.assertIn(move, self.game.get_legal_moves())
+        self.assertEqual(self.player.ponder_hit_rate, 0.)
+
+    def test_game_with_pondering(self):
+        opponent = sample_players.GreedyPlayer()
+        game = isolation.Board(self.player, opponent)
+        winner, history, termination = game.play(time_limit=150)
+        self.assertNotEqual(termination, "forfeit")
+        self.assertGreater(self.player.ponder_hits +
+                           self.player.ponder_misses, 0)
+
+    def test_pickle_drops_worker(self):
+        self.play_own_move()
+        copy = pickle.loads(pickle.dumps(self.player))
+        self.assertIsNone(copy._process)
+        self.assertIsNone(copy._pondering)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+"""Append-only store of tournament game records and Elo reporting.
+
+Every game played by tournament.py with `--results FILE` is appended to FILE
+as one JSON object per line, holding:
+
+    run, game       : the tournament seed and the index of the game in its
+                      schedule; together they identify the game
+    player_1/2      : the names of the agents, in move order
+    cpu_name        : the name of the cpu agent of the game
+    test_name       : the name of the test agent of the game
+    seed, opening   : the per-game seed and the two opening moves
+    moves           : the moves played after the opening
+    think_ms        : milliseconds spent in get_move() for each move,
+                      including the final move of the loser
+    winner          : the name of the winning agent
+    termination     : why the loser lost ("forfeit", "timeout", ...)
+
+along with the fields of the result returned by `tournament.play_game()`.
+
+Records are only ever appended, so a crashed run loses at most the game in
+progress and can be resumed by running tournament.py again with the same
+seed and results file.
+
+Usage: python results.py FILE [FILE ...]
+
+prints Elo ratings, with 95% bootstrap confidence intervals, for every agent
+in the given results files.
+"""
+import argparse
+import json
+import math
+import random
+
+from collections import defaultdict
+
+BOOTSTRAP_SAMPLES = 200
+
+
+class ResultsStore(object):
+    """Append-only JSON lines file of game records.
+
+    Parameters
+    ----------
+    path : str
+        The results file; it is created on the first append.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, record):
+        """Write one game record and flush it to disk. """
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, sort_keys=True) + "\n")
+            f.flush()
+
+    def records(self):
+        """Yield every complete record in the file. A truncated last line,
+        left by a crash in the middle of a write, is skipped.
+        """
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def load_run(self, run):
+        """Return a dict mapping game index to record for the games of the
+        tournament run `run` (its seed) that are already stored.
+        """
+        return {r["game"]: r for r in self.records() if r.get("run") == run}
+
+
+def elo_ratings(games, iterations=100):
+    """Return a dict of Elo ratings, averaging 0, fitted to a list of
+    (winner, loser) name pairs with the Bradley-Terry model.
+
+    Each pair of agents that met is credited with one extra half win each
+    way, so that undefeated or winless agents still get a finite rating.
+    """
+    wins = defaultdict(float)
+    meetings = defaultdict(float)
+    for winner, loser in games:
+        if winner == loser:
+            continue
+        wins[winner] += 1
+        meetings[frozenset((winner, loser))] += 1
+    for pair in list(meetings):
+        meetings[pair] += 1
+        for name in pair:
+            wins[name] += 0.5
+
+    names = sorted({name for pair in meetings for name in pair})
+    opponents = defaultdict(list)
+    for pair, n in meetings.items():
+        a, b = tuple(pair)
+        opponents[a].append((b, n))
+        opponents[b].append((a, n))
+
+    # minorization-maximization updates of the Bradley-Terry strengths
+    gamma = {name: 1. for name in names}
+    for _ in range(iterations):
+        gamma = {name: wins[name] / sum(n / (gamma[name] + gamma[other])
+                                        for other, n in opponents[name])
+                 for name in names}
+        scale = math.exp(sum(math.log(g) for g in gamma.values()) / len(names))
+        gamma = {name: g / scale for name, g in gamma.items()}
+
+    return {name: 400 * math.log10(g) for name, g in gamma.items()}
+
+
+def elo_report(records, samples=BOOTSTRAP_SAMPLES, seed=0):
+    """Return a list of (name, elo, low, high, games) sorted by rating,
+    where (low, high) is the 95% confidence interval of the rating obtained
+    by bootstrap resampling of the games.
+    """
+    games = []
+    for r in records:
+        loser = r["player_2"] if r["winner"] == r["player_1"] else r["player_1"]
+        games.append((r["winner"], loser))
+    if not games:
+        return []
+
+    ratings = elo_ratings(games)
+    rng = random.Random(seed)
+    resampled = defaultdict(list)
+    for _ in range(samples):
+        sample = elo_ratings([rng.choice(games) for _ in games])
+        for name in ratings:
+            resampled[name].append(sample.get(name, ratings[name]))
+
+    counts = defaultdict(int)
+    for winner, loser in games:
+        counts[winner] += 1
+        counts[loser] += 1
+
+    report = []
+    for name, elo in ratings.items():
+        values = sorted(resampled[name])
+        low = values[int(0.025 * (len(values) - 1))]
+        high = values[int(0.975 * (len(values) - 1))]
+        report.append((name, elo, low, high, counts[name]))
+    return sorted(report, key=lambda row: row[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report Elo ratings from tournament results files")
+    parser.add_argument("files", nargs="+", help="results files to combine")
+    parser.add_argument("--samples", type=int, default=BOOTSTRAP_SAMPLES,
+                        help="bootstrap samples for the confidence intervals")
+    args = parser.parse_args()
+
+    records = [r for path in args.files for r in ResultsStore(path).records()]
+    print("{} games".format(len(records)))
+    print("{:^15}{:>8}{:>18}{:>8}".format("Agent", "Elo", "95% CI", "Games"))
+    print("-" * 49)
+    for name, elo, low, high, n in elo_report(records, args.samples):
+        print("{:^15}{:>8.0f}{:>18}{:>8}".format(
+            name, elo, "[{:.0f}, {:.0f}]".format(low, high), n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Unit tests for the tournament results store and Elo reporting."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import results
+import tournament
+from sample_players import RandomPlayer, GreedyPlayer
+
+
+class ResultsStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "results.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_truncated_last_line_is_skipped(self):
+        store = results.ResultsStore(self.path)
+        self.assertEqual(list(store.records()), [])
+        store.append({"run": 1, "game": 0})
+        store.append({"run": 2, "game": 0})
+        with open(self.path, "a") as f:
+            f.write('{"run": 1, "ga')
+        self.assertEqual(list(store.records()),
+                         [{"run": 1, "game": 0}, {"run": 2, "game": 0}])
+        self.assertEqual(store.load_run(1), {0: {"run": 1, "game": 0}})
+
+    def test_resume_plays_only_missing_games(self):
+        cpu_agents = [tournament.Agent(RandomPlayer(), "Random")]
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        games = tournament.schedule_games(1, 1, 2, seed=5)
+        store = results.ResultsStore(self.path)
+        first = list(tournament.resume_games(cpu_agents, test_agents,
+                                             games[:2], 5, store))
+        self.assertEqual(len(list(store.records())), 2)
+
+        resumed = list(tournament.resume_games(cpu_agents, test_agents, games,
+                                               5, store))
+        records = list(store.records())
+        self.assertEqual([r["game"] for r in records], [0, 1, 2, 3])
+        self.assertEqual([r["moves"] for r in resumed[:2]],
+                         [r["moves"] for r in first])
+        for record, game in zip(records, games):
+            self.assertEqual(record["seed"], game[4])
+            self.assertEqual(record["player_1"] == "Random", game[2])
+            self.assertIn(record["winner"], ("Random", "Greedy"))
+
+        renamed = [tournament.Agent(GreedyPlayer(), "Greedy_2")]
+        self.assertRaises(ValueError, list,
+                          tournament.resume_games(cpu_agents, renamed, games,
+                                                  5, store))
+
+
+class EloTest(unittest.TestCase):
+
+    def test_ratings_follow_results(self):
+        games = ([("A", "B")] * 30 + [("B", "A")] * 10 +
+                 [("B", "C")] * 30 + [("C", "B")] * 10 +
+                 [("A", "A")] * 5)
+        ratings = results.elo_ratings(games)
+        self.assertAlmostEqual(sum(ratings.values()), 0.)
+        self.assertGreater(ratings["A"], ratings["B"])
+        self.assertGreater(ratings["B"], ratings["C"])
+        # a 3:1 score is worth about 190 Elo
+        self.assertAlmostEqual(ratings["A"] - ratings["B"], 190, delta=30)
+
+    def test_report_intervals(self):
+        records = ([{"player_1": "A", "player_2": "B", "winner": "A"}] * 30 +
+                   [{"player_1": "B", "player_2": "A", "winner": "B"}] * 10)
+        report = results.elo_report(records, samples=50)
+        self.assertEqual([row[0] for row in report], ["A", "B"])
+        for name, elo, low, high, games in report:
+            self.assertLessEqual(low, elo)
+            self.assertGreaterEqual(high, elo)
+            self.assertEqual(games, 40)
+        # undefeated agents still get a finite rating
+        report = results.elo_report(records[:30], samples=10)
+        self.assertLess(report[0][1], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
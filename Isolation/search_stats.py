@@ -0,0 +1,118 @@
+"""Statistics of the search behind one move of a game_agent.py player.
+
+Players created with `collect_stats=True` fill a `SearchStats` object on
+every call to get_move() and leave it in `self.stats`; if `self.stats_sink`
+is set, it is also called with the record of the move (see `to_dict()`).
+`tournament.py --stats FILE` streams these records to FILE as JSON lines.
+
+When statistics are not collected the search calls the move generator and
+the evaluation function directly, and only checks `self.stats` once per
+search and once per cutoff, so the cost of the instrumentation is
+negligible.
+"""
+import timeit
+
+
+class SearchStats(object):
+    """Counters and timers of the search for one move.
+
+    Parameters
+    ----------
+    time_left : float
+        The milliseconds left in the turn when the search started.
+
+    Attributes
+    ----------
+    nodes : int
+        The positions searched (one call to the move generator each).
+    leaves : int
+        The positions evaluated with the score function.
+    cutoffs : int
+        The beta cutoffs, and `cutoff_index[i]` the number of them caused by
+        the move searched in position i (0 is the first move searched).
+    depth : int
+        The depth of the deepest completed iteration.
+    iteration_nodes : list
+        The nodes searched by each completed iteration of iterative
+        deepening.
+    total_ms, movegen_ms, score_ms : float
+        The time of the whole move, and the time spent generating moves and
+        evaluating positions.
+    """
+
+    def __init__(self, time_left):
+        self.start_ms = time_left
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = 0
+        self.cutoff_index = []
+        self.depth = 0
+        self.iteration_nodes = []
+        self.total_ms = 0.
+        self.movegen_ms = 0.
+        self.score_ms = 0.
+
+    def legal_moves(self, game):
+        """Return `game.get_legal_indices()`, timing the call. """
+        start = timeit.default_timer()
+        moves = game.get_legal_indices()
+        self.movegen_ms += 1000 * (timeit.default_timer() - start)
+        self.nodes += 1
+        return moves
+
+    def timed_score(self, score_fn):
+        """Return a wrapper of `score_fn` that counts and times its calls. """
+        def score(game, player):
+            start = timeit.default_timer()
+            value = score_fn(game, player)
+            self.score_ms += 1000 * (timeit.default_timer() - start)
+            self.leaves += 1
+            return value
+        return score
+
+    def cutoff(self, index):
+        """Record a cutoff caused by the move searched in position `index`.
+        """
+        self.cutoffs += 1
+        if index >= len(self.cutoff_index):
+            self.cutoff_index.extend([0] * (index + 1 -
+                                            len(self.cutoff_index)))
+        self.cutoff_index[index] += 1
+
+    def finish(self, time_left, depth):
+        """Record the end of the search, with `time_left` milliseconds left
+        and `depth` plies completed.
+        """
+        self.total_ms = self.start_ms - time_left
+        self.depth = depth
+
+    @property
+    def ebf(self):
+        """The effective branching factor: the ratio of the nodes of the last
+        two iterations, or for a single search the b for which b ** depth
+        equals the number of nodes; None if no iteration completed.
+        """
+        if len(self.iteration_nodes) >= 2 and self.iteration_nodes[-2]:
+            return self.iteration_nodes[-1] / self.iteration_nodes[-2]
+        if self.depth and self.nodes:
+            return self.nodes ** (1. / self.depth)
+        return None
+
+    @property
+    def overhead_ms(self):
+        """The time of the move spent outside of move generation and
+        evaluation: search bookkeeping, tables, ordering and timer checks.
+        """
+        return max(0., self.total_ms - self.movegen_ms - self.score_ms)
+
+    def to_dict(self):
+        """Return the statistics as a dict of JSON serialisable values. """
+        ebf = self.ebf
+        return {"nodes": self.nodes, "leaves": self.leaves,
+                "cutoffs": self.cutoffs, "cutoff_index": self.cutoff_index,
+                "depth": self.depth, "iteration_nodes": self.iteration_nodes,
+                "ebf": None if ebf is None else round(ebf, 3),
+                "total_ms": round(self.total_ms, 3),
+                "movegen_ms": round(self.movegen_ms, 3),
+                "score_ms": round(self.score_ms, 3),
+                "overhead_ms": round(self.overhead_ms, 3)}
@@ -0,0 +1,122 @@
+"""Unit tests for the per-move search statistics."""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import game_agent
+import sample_players
+import tournament
+
+from results import ResultsStore
+from search_stats import SearchStats
+from testutils import fixed_time, midgame
+
+
+class SearchStatsTest(unittest.TestCase):
+
+    def test_cutoff_index(self):
+        stats = SearchStats(100.)
+        for index in (0, 0, 2):
+            stats.cutoff(index)
+        self.assertEqual(stats.cutoffs, 3)
+        self.assertEqual(stats.cutoff_index, [2, 0, 1])
+
+    def test_ebf_and_overhead(self):
+        stats = SearchStats(100.)
+        stats.iteration_nodes = [10, 40]
+        stats.movegen_ms, stats.score_ms = 20., 30.
+        stats.finish(40., 2)
+        self.assertEqual(stats.ebf, 4.)
+        self.assertEqual(stats.total_ms, 60.)
+        self.assertEqual(stats.overhead_ms, 10.)
+        stats.iteration_nodes, stats.nodes = [], 27
+        stats.depth = 3
+        self.assertAlmostEqual(stats.ebf, 3.)
+
+
+class PlayerStatsTest(unittest.TestCase):
+
+    def test_alphabeta_stats(self):
+        records = []
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, collect_stats=True,
+            endgame=False)
+        player.stats_sink = records.append
+        game = midgame(player)
+        player.get_move(game, fixed_time(100))
+        self.assertEqual(len(records), 1)
+        stats = player.stats
+        self.assertEqual(records[0], json.loads(json.dumps(stats.to_dict())))
+        self.assertEqual(stats.nodes, player.nodes)
+        self.assertEqual(stats.depth, player.depth_reached)
+        self.assertEqual(sum(stats.iteration_nodes), player.nodes)
+        self.assertGreater(stats.leaves, 0)
+        self.assertGreater(stats.cutoffs, 0)
+        self.assertEqual(sum(stats.cutoff_index), stats.cutoffs)
+
+    def test_minimax_stats(self):
+        calls = []
+
+        def score(game, player):
+            calls.append(game)
+            return sample_players.improved_score(game, player)
+
+        player = game_agent.MinimaxPlayer(search_depth=2, score_fn=score,
+                                          collect_stats=True)
+        game = midgame(player)
+        player.get_move(game, lambda: 1000.)
+        stats = player.stats
+        self.assertEqual(stats.depth, 2)
+        self.assertEqual(stats.leaves, len(calls))
+        # the root, its children and the leaves each generate moves once
+        self.assertEqual(stats.nodes, 1 + len(game.get_legal_moves()) +
+                         len(calls))
+        self.assertEqual(stats.cutoffs, 0)
+
+    def test_disabled_stats_search_the_same_tree(self):
+        players = [game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, collect_stats=collect)
+            for collect in (False, True)]
+        moves = []
+        for player in players:
+            # the move generator shuffles the moves
+            random.seed(1)
+            player.time_left = lambda: 1000.
+            player.stats = SearchStats(1000.) if player.collect_stats else None
+            moves.append(player.alphabeta(midgame(player), 4))
+        self.assertEqual(moves[0], moves[1])
+        self.assertEqual(players[0].nodes, players[1].nodes)
+        self.assertEqual(players[1].stats.nodes, players[1].nodes)
+
+
+class TournamentStatsTest(unittest.TestCase):
+
+    def test_stats_are_streamed_to_the_sink(self):
+        path = os.path.join(tempfile.mkdtemp(), "stats.jsonl")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, collect_stats=True)
+        cpu_agents = [tournament.Agent(sample_players.GreedyPlayer(),
+                                       "Greedy")]
+        test_agents = [tournament.Agent(player, "AB_Stats")]
+        games = tournament.schedule_games(1, 1, 1, seed=5)
+        results = list(tournament.run_games(cpu_agents, test_agents, games,
+                                            stats=ResultsStore(path)))
+        records = list(ResultsStore(path).records())
+        # one record per get_move() call of the test agent
+        self.assertEqual(len(records), sum(
+            len(r["think_ms"][1 if r["cpu_first"] else 0::2])
+            for r in results))
+        self.assertTrue(all("stats" not in r for r in results))
+        self.assertEqual({r["agent"] for r in records}, {"AB_Stats"})
+        self.assertEqual({r["game_seed"] for r in records},
+                         {r["seed"] for r in results})
+        self.assertIsNone(player.stats_sink)
+
+
+if __name__ == '__main__':
+    unittest.main()
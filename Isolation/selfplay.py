@@ -0,0 +1,257 @@
+"""Self-play sample generator and offline heuristic evaluation.
+
+Comparing score functions with tournament.py means playing timed matches,
+whose results depend on the speed of each heuristic and on the load of the
+machine. This script instead plays self-play games between two copies of an
+`AlphaBetaPlayer` searching to a fixed depth, or to a fixed number of nodes,
+on every move, so that a game only depends on its seed. The games are spread
+over worker processes, and every position of every game (after the random
+opening, while the side to move has a move) becomes one sample of a columnar
+file (see columnar.py) with the columns:
+
+    game          : the seed of the game
+    ply           : the number of moves played before the position
+    blocked       : bitmask of the blocked cells (bit `row + column * height`)
+    active        : the cell index of the player to move (-1 if not placed)
+    inactive      : the cell index of the other player (-1 if not placed)
+    outcome       : 1 if the player to move won the game, else -1
+    <score name>  : the value of every score function of SCORE_FNS for the
+                    player to move
+
+The score functions are then compared offline, in bulk, by how well the sign
+of their value predicts the outcome and by the correlation of their value
+with it; with numpy installed the evaluation is vectorised over all samples.
+
+Usage: python selfplay.py FILE [--games N] [--workers N] [--depth N | --nodes N]
+
+appends the samples of N new games to FILE and prints the evaluation of every
+score function over all the samples of FILE (--games 0 only evaluates).
+"""
+import argparse
+import math
+import multiprocessing
+import random
+
+from collections import OrderedDict
+
+from columnar import ColumnReader, ColumnWriter, np
+from isolation import Board
+from game_agent import (AlphaBetaPlayer, custom_score, custom_score_2,
+                        custom_score_3)
+from sample_players import open_move_score, improved_score, center_score
+
+SCORE_FNS = OrderedDict((fn.__name__, fn) for fn in [
+    custom_score, custom_score_2, custom_score_3, improved_score,
+    open_move_score, center_score])
+
+SELFPLAY_DEPTH = 3  # plies searched on every move by default
+OPENING_PLIES = 2  # random moves played before the agents take over
+PHASES = [("opening", 0, 12), ("midgame", 12, 24), ("endgame", 24, None)]
+
+
+def sample_schema(score_names):
+    """Return the columnar schema of the samples with the values of the
+    named score functions.
+    """
+    return ([("game", "u4"), ("ply", "u1"), ("blocked", "u8"),
+             ("active", "i1"), ("inactive", "i1"), ("outcome", "i1")] +
+            [(name, "f8") for name in score_names])
+
+
+def choose_move(player, game, depth, nodes=None):
+    """Return the move `player` chooses in `game` with an iterative deepening
+    alpha-beta search that stops after the pass to `depth` or, with `nodes`,
+    after the first pass that brings the nodes searched to `nodes`.
+    """
+    player.time_left = lambda: float("inf")
+    player.new_search(game)
+    max_depth = len(game.get_blank_spaces())
+    move, depth_reached = None, 0
+    while depth_reached < max_depth:
+        depth_reached += 1
+        move = player.alphabeta(game, depth_reached)
+        if nodes is None and depth_reached >= depth:
+            break
+        if nodes is not None and player.nodes >= nodes:
+            break
+    return move
+
+
+def play_selfplay_game(seed, score_fn=custom_score, depth=SELFPLAY_DEPTH,
+                       nodes=None, opening_plies=OPENING_PLIES,
+                       score_names=tuple(SCORE_FNS)):
+    """Play one self-play game from a random opening and return its samples
+    as a list of rows of `sample_schema(score_names)`. The game only depends
+    on `seed` and the parameters.
+    """
+    rng = random.Random(seed)
+    random.seed(seed)  # the move generators shuffle the moves
+    players = [AlphaBetaPlayer(score_fn=score_fn) for _ in range(2)]
+    game = Board(players[0], players[1])
+    score_fns = [SCORE_FNS[name] for name in score_names]
+    for _ in range(opening_plies):
+        game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+
+    full = (1 << game.width * game.height) - 1
+    positions = []
+    while game.get_legal_moves():
+        active = game.active_player
+        blocked = full ^ sum(1 << game.move_to_index(move)
+                             for move in game.get_blank_spaces())
+        locations = [game.get_player_location(p)
+                     for p in (active, game.inactive_player)]
+        locations = [-1 if loc is None else game.move_to_index(loc)
+                     for loc in locations]
+        positions.append((active, [seed, game.move_count, blocked] +
+                          locations + [0] +
+                          [fn(game, active) for fn in score_fns]))
+        game.apply_move(choose_move(active, game, depth, nodes))
+
+    # the player to move has lost
+    loser = game.active_player
+    for active, row in positions:
+        row[5] = -1 if active is loser else 1
+    return [row for _, row in positions]
+
+
+def _play_worker_game(args):
+    seed, score_name, depth, nodes, opening_plies, score_names = args
+    return play_selfplay_game(seed, SCORE_FNS[score_name], depth, nodes,
+                              opening_plies, score_names)
+
+
+def generate(path, seeds, score_fn=custom_score, depth=SELFPLAY_DEPTH,
+             nodes=None, opening_plies=OPENING_PLIES, workers=1,
+             score_names=tuple(SCORE_FNS)):
+    """Play a self-play game for each of `seeds`, spread over `workers`
+    processes, and append the samples to the columnar file `path` as the
+    games finish. Returns the number of samples written.
+
+    The agents use `score_fn`, which must be one of SCORE_FNS so that the
+    workers can find it by name. The searches are not timed, so the number
+    of workers is not limited by the number of cores, only by memory.
+    """
+    tasks = [(seed, score_fn.__name__, depth, nodes, opening_plies,
+              tuple(score_names)) for seed in seeds]
+    samples = 0
+    with ColumnWriter(path, sample_schema(score_names)) as writer:
+        if workers <= 1:
+            results = map(_play_worker_game, tasks)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers)
+            results = pool.imap_unordered(_play_worker_game, tasks)
+        try:
+            for rows in results:
+                for row in rows:
+                    writer.append(row)
+                samples += len(rows)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    return samples
+
+
+def _agreement(scores, outcomes):
+    """Return the number of samples whose score is finite and not zero, the
+    fraction of them whose score has the sign of the outcome, and the
+    correlation between the finite scores and the outcomes.
+    """
+    if np is not None:
+        finite = np.isfinite(scores)
+        decided = finite & (scores != 0)
+        count = int(decided.sum())
+        accuracy = float(np.mean(np.sign(scores[decided]) ==
+                                 outcomes[decided])) if count else 0.
+        x, y = scores[finite], outcomes[finite].astype(float)
+        if len(x) < 2 or x.std() == 0 or y.std() == 0:
+            return count, accuracy, 0.
+        return count, accuracy, float(np.corrcoef(x, y)[0, 1])
+
+    pairs = [(s, o) for s, o in zip(scores, outcomes) if math.isfinite(s)]
+    decided = [(s, o) for s, o in pairs if s != 0]
+    count = len(decided)
+    accuracy = sum((s > 0) == (o > 0) for s, o in decided) / count \
+        if count else 0.
+    if len(pairs) < 2:
+        return count, accuracy, 0.
+    mean_s = sum(s for s, _ in pairs) / len(pairs)
+    mean_o = sum(o for _, o in pairs) / len(pairs)
+    cov = sum((s - mean_s) * (o - mean_o) for s, o in pairs)
+    var_s = sum((s - mean_s) ** 2 for s, _ in pairs)
+    var_o = sum((o - mean_o) ** 2 for _, o in pairs)
+    if not var_s or not var_o:
+        return count, accuracy, 0.
+    return count, accuracy, cov / math.sqrt(var_s * var_o)
+
+
+def evaluate(path, score_names=None):
+    """Return a list of (name, phase, samples, accuracy, correlation) rows
+    evaluating every score function of the samples in `path` (or the named
+    ones) against the outcomes, over all samples ("all") and over the
+    samples of each game phase of PHASES.
+    """
+    reader = ColumnReader(path)
+    if score_names is None:
+        score_names = [name for name, kind in reader.schema
+                       if name in SCORE_FNS]
+    columns = reader.columns(["ply", "outcome"] + list(score_names))
+    plies, outcomes = columns["ply"], columns["outcome"]
+    phases = [("all", 0, None)] + PHASES
+    rows = []
+    for name in score_names:
+        scores = columns[name]
+        for phase, start, end in phases:
+            if np is not None:
+                keep = plies >= start
+                if end is not None:
+                    keep &= plies < end
+                selected = (scores[keep], outcomes[keep])
+            else:
+                keep = [i for i, ply in enumerate(plies)
+                        if ply >= start and (end is None or ply < end)]
+                selected = ([scores[i] for i in keep],
+                            [outcomes[i] for i in keep])
+            rows.append((name, phase) + _agreement(*selected))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate self-play samples and evaluate heuristics")
+    parser.add_argument("path", help="the columnar sample file")
+    parser.add_argument("--games", type=int, default=100,
+                        help="self-play games to add (default: 100)")
+    parser.add_argument("--workers", type=int,
+                        default=multiprocessing.cpu_count(),
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--depth", type=int, default=SELFPLAY_DEPTH,
+                        help="fixed search depth of the agents (default: "
+                             "{})".format(SELFPLAY_DEPTH))
+    parser.add_argument("--nodes", type=int, default=None,
+                        help="search until this many nodes instead of to a "
+                             "fixed depth")
+    parser.add_argument("--agent-score", default="custom_score",
+                        choices=list(SCORE_FNS),
+                        help="score function of the self-play agents")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game; game i uses seed + i")
+    args = parser.parse_args()
+
+    if args.games:
+        samples = generate(args.path, range(args.seed, args.seed + args.games),
+                           SCORE_FNS[args.agent_score], args.depth,
+                           args.nodes, workers=args.workers)
+        print("{} games, {} samples added".format(args.games, samples))
+
+    print("{:<16}{:<10}{:>10}{:>10}{:>13}".format(
+        "Score", "Phase", "Samples", "Accuracy", "Correlation"))
+    print("-" * 59)
+    for name, phase, count, accuracy, corr in evaluate(args.path):
+        print("{:<16}{:<10}{:>10}{:>10.1%}{:>13.3f}".format(
+            name, phase, count, accuracy, corr))
+
+
+if __name__ == "__main__":
+    main()
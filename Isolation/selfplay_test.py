@@ -0,0 +1,69 @@
+"""Unit tests for the self-play sample generator."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import selfplay
+
+from columnar import ColumnReader
+from sample_players import improved_score
+
+
+class SelfPlayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "samples.isoc")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_games_are_reproducible(self):
+        first = selfplay.play_selfplay_game(3, depth=2)
+        self.assertEqual(selfplay.play_selfplay_game(3, depth=2), first)
+        self.assertNotEqual(selfplay.play_selfplay_game(4, depth=2), first)
+        # the side to move alternates, and so does the outcome
+        self.assertEqual([row[1] for row in first],
+                         list(range(2, 2 + len(first))))
+        outcomes = [row[5] for row in first]
+        self.assertEqual(outcomes[::2], [outcomes[0]] * len(outcomes[::2]))
+        self.assertEqual(outcomes[1::2], [-outcomes[0]] *
+                         len(outcomes[1::2]))
+        # the player to move last had no move left, so lost
+        self.assertEqual(outcomes[-1], 1)
+
+    def test_node_budget(self):
+        rows = selfplay.play_selfplay_game(1, nodes=50,
+                                           score_names=["improved_score"])
+        self.assertEqual(len(rows[0]), len(selfplay.sample_schema(
+            ["improved_score"])))
+
+    def test_generate_and_evaluate(self):
+        seeds = range(4)
+        samples = selfplay.generate(self.path, seeds, improved_score,
+                                    depth=1, workers=2)
+        reader = ColumnReader(self.path)
+        self.assertEqual(len(reader), samples)
+        expected = [row for seed in seeds for row in
+                    selfplay.play_selfplay_game(seed, improved_score, 1)]
+        columns = reader.columns()
+        names = [name for name, _ in selfplay.sample_schema(
+            selfplay.SCORE_FNS)]
+        stored = sorted(zip(*[list(columns[name]) for name in names]))
+        self.assertEqual(stored, sorted(tuple(row) for row in expected))
+
+        rows = selfplay.evaluate(self.path)
+        self.assertEqual(len(rows), len(selfplay.SCORE_FNS) *
+                         (len(selfplay.PHASES) + 1))
+        for name, phase, count, accuracy, corr in rows:
+            self.assertTrue(0 <= accuracy <= 1)
+            self.assertTrue(-1 <= corr <= 1)
+        # open_move_score never scores a playable position at zero
+        everything = [r for r in rows if r[:2] == ("open_move_score", "all")]
+        self.assertEqual(everything[0][2], samples)
+
+
+if __name__ == '__main__':
+    unittest.main()
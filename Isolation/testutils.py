@@ -0,0 +1,46 @@
+"""Helpers shared by the unit tests."""
+
+import random
+import timeit
+
+import isolation
+
+
+def random_game(board_cls, seed, plies, width=7, height=7,
+                player_1="Player1", player_2="Player2"):
+    """Return a board advanced `plies` random moves from the empty board,
+    where the moves only depend on `seed`; fewer if the game ends first.
+    """
+    rng = random.Random(seed)
+    game = board_cls(player_1, player_2, width=width, height=height)
+    for _ in range(plies):
+        moves = sorted(game.get_legal_moves())
+        if not moves:
+            break
+        game.apply_move(rng.choice(moves))
+    return game
+
+
+def random_position(player, seed, plies, width=7, height=7,
+                    board_cls=isolation.Board):
+    """Return a board where `player` is to move against "Opponent" after
+    `plies` random moves (see `random_game`).
+    """
+    players = (player, "Opponent") if plies % 2 == 0 else ("Opponent", player)
+    return random_game(board_cls, seed, plies, width, height, *players)
+
+
+def midgame(player):
+    """Return a fixed midgame position with `player` to move. """
+    game = isolation.Board(player, "Opponent")
+    for move in [(3, 3), (0, 0), (1, 2), (2, 2), (3, 1), (4, 4)]:
+        game.apply_move(move)
+    return game
+
+
+def fixed_time(ms):
+    """Return a time_left() function that runs out after `ms` milliseconds
+    of wall clock time.
+    """
+    end = timeit.default_timer() + ms / 1000
+    return lambda: 1000 * (end - timeit.default_timer())
@@ -0,0 +1,98 @@
+"""Time management for the iterative deepening agents in game_agent.py.
+
+Without a time manager, `AlphaBetaPlayer` starts a new iteration whenever
+some time is left and reads the clock at every node, so the last iteration
+of nearly every move is aborted by the timeout and its work is thrown away.
+A `TimeManager` predicts the cost of the next iteration from the cost of the
+last one and the effective branching factor (the ratio of the nodes of the
+last two iterations), and only starts the iteration if it is expected to
+finish within the budget of the move. The search then reads the clock only
+every `poll_nodes` nodes.
+
+The budget is the time left when the search starts, minus the timeout
+margin, scaled by the factor of the game phase: a factor below 1 stops
+deepening earlier, while a factor above 1 starts iterations that are
+expected to overrun the time left, in the hope that they finish or at least
+search the best move of the previous iteration first.
+"""
+
+POLL_NODES = 16  # nodes searched between two reads of the clock
+
+# Time budget factors of the opening, middle game and endgame
+PHASE_FACTORS = (1., 1., 1.)
+
+# The opening ends once this fraction of the cells is blocked, and the
+# endgame starts once that fraction is
+OPENING_END = .25
+ENDGAME_START = .6
+
+
+class TimeManager(object):
+    """Decide whether the next iteration of a search can finish in time.
+
+    Parameters
+    ----------
+    poll_nodes : int (optional)
+        The number of nodes searched between two reads of the clock.
+
+    phase_factors : (float, float, float) (optional)
+        The factors applied to the time budget in the opening, the middle
+        game and the endgame (see `phase()`).
+    """
+
+    def __init__(self, poll_nodes=POLL_NODES, phase_factors=PHASE_FACTORS):
+        self.poll_nodes = poll_nodes
+        self.phase_factors = phase_factors
+        self.budget = 0.
+        self._iterations = []
+
+    def phase(self, game):
+        """Return 0, 1 or 2 if `game` is in the opening, the middle game or
+        the endgame, by the fraction of the board that is blocked.
+        """
+        cells = game.width * game.height
+        blocked = 1. - len(game.get_blank_spaces()) / cells
+        if blocked < OPENING_END:
+            return 0
+        if blocked < ENDGAME_START:
+            return 1
+        return 2
+
+    def start(self, game, time_left, threshold):
+        """Set the budget of a search of `game` that starts with `time_left`
+        milliseconds left and must end before `threshold` are left.
+        """
+        factor = self.phase_factors[self.phase(game)]
+        self.budget = max(0., time_left - threshold) * factor
+        self._iterations = []
+
+    def iteration_done(self, nodes, elapsed):
+        """Record the nodes and milliseconds of a completed iteration. """
+        self._iterations.append((nodes, elapsed))
+
+    @property
+    def ebf(self):
+        """The effective branching factor of the last two iterations, or
+        None until two iterations have completed.
+        """
+        if len(self._iterations) < 2 or not self._iterations[-2][0]:
+            return None
+        return self._iterations[-1][0] / self._iterations[-2][0]
+
+    def predicted_cost(self):
+        """Return the expected milliseconds of the next iteration, or None if
+        there is not enough data to tell.
+        """
+        ebf = self.ebf
+        if ebf is None:
+            return None
+        return self._iterations[-1][1] * max(1., ebf)
+
+    def next_iteration_fits(self, elapsed):
+        """Return True if the next iteration is expected to finish within the
+        budget of the search, `elapsed` milliseconds after it started.
+        """
+        cost = self.predicted_cost()
+        if cost is None:
+            return True
+        return elapsed + cost <= self.budget
@@ -0,0 +1,101 @@
+"""Unit tests for the iterative deepening time manager."""
+
+import unittest
+
+import isolation
+import game_agent
+import sample_players
+
+from testutils import midgame
+from time_manager import TimeManager
+
+
+class FakeClock(object):
+    """time_left() function that loses `step` milliseconds per call. """
+
+    def __init__(self, time_left, step=1.):
+        self.left = time_left
+        self.step = step
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        self.left -= self.step
+        return self.left
+
+
+class TimeManagerTest(unittest.TestCase):
+
+    def test_phase(self):
+        manager = TimeManager()
+        game = isolation.Board("Player1", "Player2")
+        self.assertEqual(manager.phase(game), 0)
+        # the phase only depends on the number of blocked cells
+        for idx in range(21):
+            game.apply_index(idx)
+        self.assertEqual(manager.phase(game), 1)
+        for idx in range(21, 35):
+            game.apply_index(idx)
+        self.assertEqual(manager.phase(game), 2)
+
+    def test_budget_uses_phase_factor(self):
+        manager = TimeManager(phase_factors=(.5, 1., 2.))
+        game = isolation.Board("Player1", "Player2")
+        manager.start(game, 110., 10.)
+        self.assertEqual(manager.budget, 50.)
+
+    def test_prediction(self):
+        manager = TimeManager()
+        manager.start(isolation.Board("Player1", "Player2"), 110., 10.)
+        self.assertTrue(manager.next_iteration_fits(99.))
+        manager.iteration_done(100, 2.)
+        self.assertIsNone(manager.ebf)
+        manager.iteration_done(400, 8.)
+        self.assertEqual(manager.ebf, 4.)
+        self.assertEqual(manager.predicted_cost(), 32.)
+        self.assertTrue(manager.next_iteration_fits(68.))
+        self.assertFalse(manager.next_iteration_fits(69.))
+
+
+class PlayerTimeTest(unittest.TestCase):
+
+    def test_polls_every_n_nodes(self):
+        for poll in (1, 16):
+            player = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score,
+                time_manager=TimeManager(poll_nodes=poll))
+            player.time_left = clock = FakeClock(1e9, step=0.)
+            player.alphabeta(midgame(player), 4)
+            # one read at the root, then one every `poll` nodes
+            self.assertEqual(clock.calls, 1 + (player.nodes - 1) // poll + 1)
+
+    def test_no_manager_polls_every_node(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, time_manager=False)
+        player.time_left = clock = FakeClock(1e9, step=0.)
+        player.alphabeta(midgame(player), 4)
+        self.assertEqual(clock.calls, player.nodes + 1)
+
+    def test_skips_iterations_that_cannot_finish(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score,
+            time_manager=TimeManager(poll_nodes=1))
+        game = midgame(player)
+        move = player.get_move(game, FakeClock(2000., step=.1))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player.skipped_iterations, 1)
+        self.assertEqual(player.wasted_ms, 0.)
+
+    def test_wasted_time_of_aborted_iteration(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, time_manager=False)
+        game = midgame(player)
+        move = player.get_move(game, FakeClock(200., step=.1))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(player.skipped_iterations, 0)
+        self.assertGreater(player.wasted_ms, 0.)
+        self.assertEqual(player.total_wasted_ms, player.wasted_ms)
+
+
+if __name__ == '__main__':
+    unittest.main()
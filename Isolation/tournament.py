@@ -10,8 +10,19 @@ The matches are fair because the board is initialized randomly for both
 players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
+
+With --sprt the matches against each opponent stop as soon as a sequential
+probability ratio test decides whether the test agent is stronger, which
+saves most of the games of lopsided pairings.
+
+With --stats FILE the test agents collect search statistics on every move
+(see search_stats.py), which are appended to FILE as JSON lines while the
+tournament runs.
 """
+import argparse
 import itertools
+import math
+import multiprocessing
 import random
 import warnings
 
@@ -22,10 +33,27 @@ from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
                         custom_score_2, custom_score_3)
+from mcts import MCTSPlayer
+from move_ordering import ORDERINGS
+from parallel import ParallelAlphaBetaPlayer
+from ponder import PonderingPlayer
+from results import ResultsStore
+from time_manager import TimeManager
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
 
+# Counters of the test agents summed over each game (see print_search_stats)
+SEARCH_COUNTERS = ("total_nodes", "total_depth", "total_moves",
+                   "total_playouts", "total_wasted_ms", "ponder_hits",
+                   "ponder_misses")
+
+SPRT_MAX_MATCHES = 50  # most game pairs per pairing in SPRT mode
+SPRT_ELO0 = 0.  # null hypothesis: the test agent is not stronger
+SPRT_ELO1 = 50.  # alternative: the test agent is this many Elo stronger
+SPRT_ALPHA = 0.05  # probability of accepting H1 when H0 holds
+SPRT_BETA = 0.05  # probability of accepting H0 when H1 holds
+
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
 function against a baseline agent using alpha-beta search and iterative
@@ -37,77 +65,224 @@ game_agent.py.
 Agent = namedtuple("Agent", ["player", "name"])
 
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
-    """Compare the test agents to the cpu agent in "fair" matches.
+def schedule_games(num_cpu_agents, num_test_agents, num_matches, seed):
+    """Return the list of games played in the tournament, drawn from `seed`.
 
-    "Fair" matches use random starting locations and force the agents to
-    play as both first and second player to control for advantages resulting
-    from choosing better opening moves or having first initiative to move.
+    Each game is a tuple (cpu_idx, test_idx, cpu_first, opening, game_seed).
+    Every match uses one random opening (a random move and response) for all
+    the test agents, which play it once as the first and once as the second
+    player; `game_seed` seeds the global `random` module while the game is
+    played, so the game can be replayed exactly (up to timeouts).
     """
-    timeout_count = 0
-    forfeit_count = 0
-    for _ in range(num_matches):
-
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
-
-        # initialize all games with a random move and response
-        for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
-                game.apply_move(move)
-
-        # play all games and tally the results
+    rng = random.Random(seed)
+    games = []
+    for cpu_idx in range(num_cpu_agents):
+        for _ in range(num_matches):
+            board = Board("Player1", "Player2")
+            opening = []
+            for _ in range(2):
+                move = rng.choice(sorted(board.get_legal_moves()))
+                board.apply_move(move)
+                opening.append(move)
+            for test_idx in range(num_test_agents):
+                for cpu_first in (True, False):
+                    games.append((cpu_idx, test_idx, cpu_first, tuple(opening),
+                                  rng.getrandbits(32)))
+    return games
+
+
+def play_game(cpu_player, test_player, game, time_limit=TIME_LIMIT):
+    """Play one scheduled game (see `schedule_games`) between the two players
+    and return a dict describing the result, including the moves played after
+    the opening and the milliseconds spent on each move. If the test player
+    collects search statistics, "stats" holds the records of its moves.
+    """
+    cpu_idx, test_idx, cpu_first, opening, game_seed = game
+    if cpu_first:
+        board = Board(cpu_player, test_player)
+    else:
+        board = Board(test_player, cpu_player)
+    for move in opening:
+        board.apply_move(move)
+
+    before = [getattr(test_player, name, 0) for name in SEARCH_COUNTERS]
+    stats = []
+    collect = getattr(test_player, "collect_stats", False)
+    if collect:
+        test_player.stats_sink = stats.append
+    random.seed(game_seed)
+    winner, moves, termination = board.play(time_limit=time_limit)
+    if collect:
+        test_player.stats_sink = None
+    search = [getattr(test_player, name, 0) - start
+              for name, start in zip(SEARCH_COUNTERS, before)]
+    return {"cpu": cpu_idx, "test": test_idx, "cpu_first": cpu_first,
+            "opening": opening, "seed": game_seed,
+            "test_won": winner == test_player, "termination": termination,
+            "search": search, "moves": moves,
+            "think_ms": [round(t, 3) for t in board.move_times],
+            "stats": stats}
+
+
+# Agents of the worker processes of a parallel tournament, set once per
+# process by _init_worker so they are not pickled with every game
+_worker_agents = None
+
+
+def _init_worker(cpu_agents, test_agents):
+    global _worker_agents
+    _worker_agents = (cpu_agents, test_agents)
+
+
+def _play_worker_game(game):
+    cpu_agents, test_agents = _worker_agents
+    return play_game(cpu_agents[game[0]].player, test_agents[game[1]].player,
+                     game)
+
+
+def write_stats(cpu_agents, test_agents, result, stats):
+    """Remove the search statistics from `result` and append them to the
+    `ResultsStore` `stats`, if given, one record per move of the test agent
+    tagged with the agents and the seed of the game.
+    """
+    records = result.pop("stats", None)
+    if stats is None or not records:
+        return
+    for move, record in enumerate(records):
+        stats.append(dict(record, agent=test_agents[result["test"]].name,
+                          opponent=cpu_agents[result["cpu"]].name,
+                          game_seed=result["seed"], move=move))
+
+
+def run_games(cpu_agents, test_agents, games, workers=1, stats=None):
+    """Play the scheduled games and yield their results in schedule order.
+
+    With more than one worker the games are farmed out to a pool of worker
+    processes, each holding its own copy of the agents. A worker plays one
+    game at a time, so the number of workers is capped at the number of
+    cores to keep the per-move time limit fair. The search statistics of
+    each game are written to the `ResultsStore` `stats`, if given, as soon
+    as the game ends.
+    """
+    workers = min(workers, multiprocessing.cpu_count())
+    if workers <= 1:
         for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
-            win_counts[winner] += 1
-
-        if termination == "timeout":
-            timeout_count += 1
-        elif winner not in test_agents and termination == "forfeit":
-            forfeit_count += 1
-
-    return timeout_count, forfeit_count
-
-
-def update(total_wins, wins):
-    for player in total_wins:
-        total_wins[player] += wins[player]
-    return total_wins
-
+            result = play_game(cpu_agents[game[0]].player,
+                               test_agents[game[1]].player, game)
+            write_stats(cpu_agents, test_agents, result, stats)
+            yield result
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(cpu_agents, test_agents)) as pool:
+        for result in pool.imap(_play_worker_game, games):
+            write_stats(cpu_agents, test_agents, result, stats)
+            yield result
+
+
+def game_record(cpu_agents, test_agents, seed, idx, result):
+    """Return the results file record (see results.py) of the result of the
+    game `idx` of the tournament run with `seed`.
+    """
+    cpu_name = cpu_agents[result["cpu"]].name
+    test_name = test_agents[result["test"]].name
+    players = [cpu_name, test_name] if result["cpu_first"] else [test_name,
+                                                                cpu_name]
+    return dict(result, run=seed, game=idx, cpu_name=cpu_name,
+                test_name=test_name, player_1=players[0],
+                player_2=players[1],
+                winner=test_name if result["test_won"] else cpu_name)
+
+
+def resume_games(cpu_agents, test_agents, games, seed, store, workers=1,
+                 indices=None, stats=None):
+    """Yield the results of the scheduled games in schedule order, reading
+    the games already recorded in `store` for the run `seed` and playing (and
+    recording) the others. `indices` are the positions of `games` in the
+    schedule of the run, when they are only a part of it.
+    """
+    if indices is None:
+        indices = range(len(games))
+    stored = store.load_run(seed)
+    for idx in indices:
+        record = stored.get(idx)
+        if record is not None and (
+                record["test"] >= len(test_agents) or
+                record["cpu"] >= len(cpu_agents) or
+                record["cpu_name"] != cpu_agents[record["cpu"]].name or
+                record["test_name"] != test_agents[record["test"]].name):
+            raise ValueError("Results file {} holds game {} of run {} with "
+                             "different agents".format(store.path, idx, seed))
+
+    pending = [game for idx, game in zip(indices, games) if idx not in stored]
+    played = run_games(cpu_agents, test_agents, pending, workers, stats)
+    for idx in indices:
+        if idx in stored:
+            yield stored[idx]
+            continue
+        result = next(played)
+        store.append(game_record(cpu_agents, test_agents, seed, idx, result))
+        yield result
+
+
+def play_matches(cpu_agents, test_agents, num_matches, workers=1, seed=None,
+                 store=None, stats=None):
+    """Play matches between the test agent and each cpu_agent individually.
+
+    When a `ResultsStore` is given, every game is recorded to it, and the
+    games of the same run (same `seed`) that it already holds are not played
+    again, so that an interrupted tournament can be resumed. The search
+    statistics of the test agents are written to the `ResultsStore` `stats`,
+    if given.
+    """
+    if seed is None:
+        seed = random.randrange(2**32)
+    workers = max(1, min(workers, multiprocessing.cpu_count()))
+    games = schedule_games(len(cpu_agents), len(test_agents), num_matches, seed)
+    games_per_round = 2 * num_matches * len(test_agents)
+    if store is None:
+        results = run_games(cpu_agents, test_agents, games, workers, stats)
+    else:
+        results = resume_games(cpu_agents, test_agents, games, seed, store,
+                               workers, stats=stats)
 
-def play_matches(cpu_agents, test_agents, num_matches):
-    """Play matches between the test agent and each cpu_agent individually. """
     total_wins = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
     total_forfeits = 0.
     total_matches = 2 * num_matches * len(cpu_agents)
 
+    print("\nSeed: {}  Workers: {}".format(seed, workers))
     print("\n{:^9}{:^13}{:^13}{:^13}{:^13}{:^13}".format(
         "Match #", "Opponent", test_agents[0].name, test_agents[1].name,
         test_agents[2].name, test_agents[3].name))
     print("{:^9}{:^13} {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5}"
           .format("", "", *(["Won", "Lost"] * 4)))
 
-    for idx, agent in enumerate(cpu_agents):
-        wins = {test_agents[0].player: 0,
-                test_agents[1].player: 0,
-                test_agents[2].player: 0,
-                test_agents[3].player: 0,
-                agent.player: 0}
-
-        print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
-
-        counts = play_round(agent, test_agents, wins, num_matches)
-        total_timeouts += counts[0]
-        total_forfeits += counts[1]
-        total_wins = update(total_wins, wins)
-        _total = 2 * num_matches
-        round_totals = sum([[wins[agent.player], _total - wins[agent.player]]
-                            for agent in test_agents], [])
-        print(" {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5}"
-              .format(*round_totals))
+    wins = [0] * len(test_agents)
+    search_totals = [[0] * len(SEARCH_COUNTERS) for _ in test_agents]
+    for idx, result in enumerate(results):
+        if idx % games_per_round == 0:
+            agent = cpu_agents[result["cpu"]]
+            print("{!s:^9}{:^13}".format(result["cpu"] + 1, agent.name),
+                  end="", flush=True)
+
+        if result["test_won"]:
+            wins[result["test"]] += 1
+        for i, value in enumerate(result["search"]):
+            search_totals[result["test"]][i] += value
+        if result["termination"] == "timeout":
+            total_timeouts += 1
+        elif not result["test_won"] and result["termination"] == "forfeit":
+            total_forfeits += 1
+
+        if (idx + 1) % games_per_round == 0:
+            _total = 2 * num_matches
+            round_totals = sum([[w, _total - w] for w in wins], [])
+            print(" {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5} {:^5}| {:^5}"
+                  .format(*round_totals))
+            for agent, w in zip(test_agents, wins):
+                total_wins[agent.player] += w
+            wins = [0] * len(test_agents)
 
     print("-" * 74)
     print("{:^9}{:^13}{:^13}{:^13}{:^13}{:^13}\n".format(
@@ -124,19 +299,289 @@ def play_matches(cpu_agents, test_agents, num_matches):
     if total_forfeits:
         print(("\nYour ID search forfeited {} games while there were still " +
                "legal moves available to play.\n").format(total_forfeits))
+    print_search_stats(test_agents, search_totals)
 
 
-def main():
+def elo_to_score(elo):
+    """Return the expected score of an agent `elo` points stronger. """
+    return 1 / (1 + 10**(-elo / 400))
 
-    # Define two agents to compare -- these agents will play from the same
-    # starting position against the same adversaries in the tournament
-    test_agents = [
+
+def sprt_bounds(alpha=SPRT_ALPHA, beta=SPRT_BETA):
+    """Return the (lower, upper) log-likelihood ratio bounds at which the SPRT
+    accepts H0 and H1 respectively.
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def sprt_llr(scores, elo0=SPRT_ELO0, elo1=SPRT_ELO1):
+    """Return the log-likelihood ratio of H1 (`elo1`) against H0 (`elo0`)
+    given the scores of the test agent in each game pair (0, 0.5 or 1).
+
+    The pair scores are not independent coin flips -- both games share an
+    opening -- so the ratio uses the normal approximation of the generalized
+    SPRT, with the variance measured on the pairs themselves. One pseudo pair
+    of each score is added to the variance estimate so that a short run of
+    identical results does not end the test with a zero variance.
+    """
+    if not scores:
+        return 0.
+    s0, s1 = elo_to_score(elo0), elo_to_score(elo1)
+    mean = sum(scores) / len(scores)
+    padded = list(scores) + [0., 0.5, 1.]
+    padded_mean = sum(padded) / len(padded)
+    var = sum((x - padded_mean)**2 for x in padded) / len(padded)
+    return len(scores) * (s1 - s0) * (2 * mean - s0 - s1) / (2 * var)
+
+
+def play_sprt(cpu_agents, test_agents, max_matches, elo0=SPRT_ELO0,
+              elo1=SPRT_ELO1, alpha=SPRT_ALPHA, beta=SPRT_BETA, workers=1,
+              seed=None, store=None, stats=None, fixed_matches=NUM_MATCHES):
+    """Play game pairs between each test agent and each cpu agent until an
+    SPRT of "the test agent is `elo1` stronger" against "the test agent is
+    `elo0` stronger" accepts one of them, or `max_matches` pairs are played.
+
+    The games are those of the fixed tournament with `max_matches` matches
+    and the same `seed`; each round plays the next game pair of every
+    undecided pairing, so the rounds use the worker pool like `play_matches`.
+    The games played are compared to those of the fixed tournament of
+    `fixed_matches` matches that `play_matches` would play instead.
+    Return a dict mapping (cpu_idx, test_idx) to the list of pair scores.
+    """
+    if seed is None:
+        seed = random.randrange(2**32)
+    workers = max(1, min(workers, multiprocessing.cpu_count()))
+    num_test = len(test_agents)
+    games = schedule_games(len(cpu_agents), num_test, max_matches, seed)
+    lower, upper = sprt_bounds(alpha, beta)
+
+    print("\nSeed: {}  Workers: {}".format(seed, workers))
+    print("SPRT elo0={:g} elo1={:g} alpha={:g} beta={:g}  LLR bounds "
+          "[{:.2f}, {:.2f}]".format(elo0, elo1, alpha, beta, lower, upper))
+
+    pairings = [(c, t) for c in range(len(cpu_agents)) for t in range(num_test)]
+    scores = {pairing: [] for pairing in pairings}
+    decisions = {}
+    for match in range(max_matches):
+        active = [p for p in pairings if p not in decisions]
+        if not active:
+            break
+        indices = [2 * ((c * max_matches + match) * num_test + t) + i
+                   for c, t in active for i in (0, 1)]
+        batch = [games[idx] for idx in indices]
+        if store is None:
+            results = run_games(cpu_agents, test_agents, batch, workers,
+                                stats)
+        else:
+            results = resume_games(cpu_agents, test_agents, batch, seed,
+                                   store, workers, indices, stats)
+        results = list(results)
+        for pairing, first, second in zip(active, results[::2], results[1::2]):
+            scores[pairing].append((first["test_won"] + second["test_won"]) / 2)
+            llr = sprt_llr(scores[pairing], elo0, elo1)
+            if llr >= upper:
+                decisions[pairing] = "H1"
+            elif llr <= lower:
+                decisions[pairing] = "H0"
+
+    print("\n{:^13}{:^13}{:>7}{:>8}{:>8}{:>8}".format(
+        "Agent", "Opponent", "Pairs", "Score", "LLR", "Result"))
+    print("-" * 57)
+    for c, t in sorted(pairings, key=lambda p: (p[1], p[0])):
+        pair_scores = scores[(c, t)]
+        print("{:^13}{:^13}{:>7}{:>7.1f}%{:>8.2f}{:>8}".format(
+            test_agents[t].name, cpu_agents[c].name, len(pair_scores),
+            100 * sum(pair_scores) / len(pair_scores),
+            sprt_llr(pair_scores, elo0, elo1), decisions.get((c, t), "-")))
+
+    played = 2 * sum(len(pair_scores) for pair_scores in scores.values())
+    fixed = 2 * fixed_matches * len(pairings)
+    if played <= fixed:
+        comparison = "{} saved, {:.1f}%".format(
+            fixed - played, 100 * (fixed - played) / fixed)
+    else:
+        comparison = "{} more, {:.1f}%".format(
+            played - fixed, 100 * (played - fixed) / fixed)
+    print("\nGames played: {} against {} in the fixed schedule of {} matches "
+          "({}); at most {}".format(played, fixed, fixed_matches, comparison,
+                                   len(games)))
+    return scores
+
+
+def mcts_agents():
+    return [
+        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
+        Agent(MCTSPlayer(), "MCTS"),
+        Agent(MCTSPlayer(heuristic=True), "MCTS_Heur"),
+        Agent(MCTSPlayer(reuse=False), "MCTS_NoReuse")
+    ]
+
+
+def time_agents():
+    return [
+        Agent(AlphaBetaPlayer(score_fn=improved_score, time_manager=False),
+              "AB_NoTM"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_TM"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score,
+                              time_manager=TimeManager(poll_nodes=1)),
+              "AB_TM_Poll1"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score,
+                              time_manager=TimeManager(
+                                  phase_factors=(.5, 1.5, 1.))),
+              "AB_TM_Phase")
+    ]
+
+
+def heuristic_agents():
+    return [
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
         Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3")
     ]
 
+
+def ordering_agents():
+    return [
+        Agent(AlphaBetaPlayer(score_fn=improved_score, tt_mb=16,
+                              ordering=ordering), "AB_" + ordering)
+        for ordering in ORDERINGS
+    ]
+
+
+def pv_agents():
+    return [
+        Agent(AlphaBetaPlayer(score_fn=improved_score, pv_reuse=False),
+              "AB_NoPV"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_PV"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score, aspiration=1.),
+              "AB_PV_Asp"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score, aspiration=1.,
+                              tt_mb=16), "AB_PV_Asp_TT")
+    ]
+
+
+def ponder_agents():
+    return [
+        Agent(AlphaBetaPlayer(score_fn=improved_score, tt_mb=16), "AB_TT"),
+        Agent(PonderingPlayer(score_fn=improved_score), "AB_Ponder"),
+        Agent(PonderingPlayer(score_fn=improved_score, ponder_limit=1000.),
+              "AB_Ponder_1s"),
+        Agent(ParallelAlphaBetaPlayer(2, score_fn=improved_score, tt_mb=16),
+              "AB_Parallel")
+    ]
+
+
+def search_agents():
+    return [
+        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_MinMax"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score, pvs=True), "AB_PVS"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score, lmr=1), "AB_LMR"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score, pvs=True, lmr=1),
+              "AB_PVS_LMR")
+    ]
+
+
+# Sets of four test agents that can be compared with --compare
+COMPARISONS = {"heuristics": heuristic_agents, "orderings": ordering_agents,
+               "pv": pv_agents, "mcts": mcts_agents, "time": time_agents,
+               "search": search_agents, "ponder": ponder_agents}
+
+
+def tournament_workers(test_agents, workers):
+    """Return the number of worker processes to play the games of
+    `test_agents` with: 1 if a test agent starts processes of its own
+    (pondering or parallel search), which it cannot do from the daemonic
+    processes of a tournament pool, with a warning if `workers` asked for
+    more.
+    """
+    if workers > 1 and any(
+            isinstance(agent.player, (PonderingPlayer,
+                                      ParallelAlphaBetaPlayer))
+            for agent in test_agents):
+        warnings.warn("Pondering and parallel agents cannot start their "
+                      "processes inside tournament workers; playing the "
+                      "games in this process instead of {} workers"
+                      .format(workers))
+        return 1
+    return workers
+
+
+def print_search_stats(test_agents, search_totals):
+    """Print the average nodes searched, depth reached and milliseconds
+    wasted in aborted iterations per move by each test agent that records
+    them (see `AlphaBetaPlayer`), the average playouts per move of the MCTS
+    agents (see `MCTSPlayer`) and the ponder hit rate of the pondering agents
+    (see `PonderingPlayer`), given the totals of SEARCH_COUNTERS of each
+    agent.
+    """
+    print("\n{:^13}{:>12}{:>12}{:>12}{:>12}{:>12}".format(
+        "Per move:", "Nodes", "Depth", "Playouts", "Wasted ms",
+        "Ponder hits"))
+    for agent, totals in zip(test_agents, search_totals):
+        nodes, depth, moves, playouts, wasted, hits, misses = totals
+        if moves:
+            ponder = "-"
+            if hits + misses:
+                ponder = "{:.1f}%".format(100 * hits / (hits + misses))
+            print("{:^13}{:>12.1f}{:>12.2f}{:>12.1f}{:>12.1f}{:>12}".format(
+                agent.name, nodes / moves, depth / moves, playouts / moves,
+                wasted / moves, ponder))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--compare", choices=sorted(COMPARISONS),
+                        default="heuristics",
+                        help="the set of test agents to compare: the custom "
+                             "heuristics, the move orderings, the principal "
+                             "variation/aspiration options of AB_Improved, "
+                             "the MCTS variants, the time managers, the "
+                             "PVS/late move reduction options, or pondering "
+                             "and parallel search (always played in this "
+                             "process)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of games played in parallel, at most "
+                             "one per core (default: 1)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the openings and of every game, to "
+                             "reproduce a previous run")
+    parser.add_argument("--results", default=None,
+                        help="append every game to this results file; with "
+                             "--seed, resume the run from the games the "
+                             "file already holds (report with results.py)")
+    parser.add_argument("--stats", default=None,
+                        help="collect search statistics of every move of "
+                             "the test agents and append them to this file "
+                             "as JSON lines")
+    parser.add_argument("--matches", type=int, default=None,
+                        help="matches against each opponent (default: {}); "
+                             "with --sprt, the most game pairs played per "
+                             "pairing (default: {})".format(
+                                 NUM_MATCHES, SPRT_MAX_MATCHES))
+    parser.add_argument("--sprt", action="store_true",
+                        help="stop each pairing of a test agent and an "
+                             "opponent as soon as an SPRT of --elo0 against "
+                             "--elo1 is decided")
+    parser.add_argument("--elo0", type=float, default=SPRT_ELO0,
+                        help="Elo advantage of the test agent under H0")
+    parser.add_argument("--elo1", type=float, default=SPRT_ELO1,
+                        help="Elo advantage of the test agent under H1")
+    parser.add_argument("--alpha", type=float, default=SPRT_ALPHA,
+                        help="SPRT false positive rate")
+    parser.add_argument("--beta", type=float, default=SPRT_BETA,
+                        help="SPRT false negative rate")
+    args = parser.parse_args()
+
+    # Define two agents to compare -- these agents will play from the same
+    # starting position against the same adversaries in the tournament
+    test_agents = COMPARISONS[args.compare]()
+    workers = tournament_workers(test_agents, args.workers)
+    if args.stats:
+        for agent in test_agents:
+            if hasattr(agent.player, "collect_stats"):
+                agent.player.collect_stats = True
+
     # Define a collection of agents to compete against the test agents
     cpu_agents = [
         Agent(RandomPlayer(), "Random"),
@@ -152,7 +597,22 @@ def main():
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    store = ResultsStore(args.results) if args.results else None
+    stats = ResultsStore(args.stats) if args.stats else None
+    try:
+        if args.sprt:
+            play_sprt(cpu_agents, test_agents,
+                      args.matches or SPRT_MAX_MATCHES, args.elo0, args.elo1,
+                      args.alpha, args.beta, workers=workers, seed=args.seed,
+                      store=store, stats=stats)
+        else:
+            play_matches(cpu_agents, test_agents, args.matches or NUM_MATCHES,
+                         workers=workers, seed=args.seed, store=store,
+                         stats=stats)
+    finally:
+        for agent in test_agents:
+            if hasattr(agent.player, "close"):
+                agent.player.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+"""Unit tests for the tournament scheduling and parallel game runner."""
+
+import unittest
+from unittest import mock
+
+import tournament
+from sample_players import RandomPlayer, GreedyPlayer
+
+
+class TournamentTest(unittest.TestCase):
+
+    def test_schedule_is_reproducible_and_fair(self):
+        games = tournament.schedule_games(2, 3, 4, seed=11)
+        self.assertEqual(games, tournament.schedule_games(2, 3, 4, seed=11))
+        self.assertNotEqual(games, tournament.schedule_games(2, 3, 4, seed=12))
+        self.assertEqual(len(games), 2 * 3 * 4 * 2)
+        # every test agent plays each opening once with each colour
+        for match in range(0, len(games), 6):
+            block = games[match:match + 6]
+            self.assertEqual(len({g[3] for g in block}), 1)
+            self.assertEqual(sorted((g[1], g[2]) for g in block),
+                             sorted((t, c) for t in range(3)
+                                    for c in (True, False)))
+            self.assertNotEqual(block[0][3][0], block[0][3][1])
+
+    def test_parallel_results_match_serial(self):
+        cpu_agents = [tournament.Agent(RandomPlayer(), "Random")]
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy"),
+                       tournament.Agent(RandomPlayer(), "Random")]
+        games = tournament.schedule_games(1, 2, 2, seed=3)
+        serial = list(tournament.run_games(cpu_agents, test_agents, games))
+        with mock.patch.object(tournament.multiprocessing, "cpu_count",
+                               return_value=2):
+            parallel = list(tournament.run_games(cpu_agents, test_agents,
+                                                 games, workers=2))
+        for result in serial + parallel:
+            self.assertEqual(len(result.pop("think_ms")),
+                             len(result["moves"]) + 1)
+        self.assertEqual(serial, parallel)
+        self.assertEqual([(r["cpu"], r["test"]) for r in serial],
+                         [(g[0], g[1]) for g in games])
+
+    def test_sprt_llr(self):
+        lower, upper = tournament.sprt_bounds(0.05, 0.05)
+        self.assertAlmostEqual(lower, -upper)
+        self.assertEqual(tournament.sprt_llr([]), 0.)
+        self.assertGreater(tournament.sprt_llr([1.] * 20), upper)
+        self.assertLess(tournament.sprt_llr([0.] * 20), lower)
+        self.assertLess(tournament.sprt_llr([0.5] * 20), 0.)
+        # a couple of won pairs are not enough to decide
+        self.assertLess(tournament.sprt_llr([1., 1.]), upper)
+
+    def test_sprt_stops_decided_pairings(self):
+        cpu_agents = [tournament.Agent(RandomPlayer(), "Random"),
+                      tournament.Agent(GreedyPlayer(), "Greedy")]
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        # undecided then H1 for pairing 0, H0 for pairing 1, then the report
+        with mock.patch.object(tournament, "sprt_llr", side_effect=[
+                0., -10., 10., 0., 0.]), mock.patch("builtins.print"):
+            scores = tournament.play_sprt(cpu_agents, test_agents, 4, seed=7)
+        # pairing 0 is decided after two pairs and pairing 1 after one
+        self.assertEqual([len(scores[(0, 0)]), len(scores[(1, 0)])], [2, 1])
+
+        with mock.patch.object(tournament, "sprt_llr", return_value=0.), \
+                mock.patch.object(tournament, "run_games",
+                                  wraps=tournament.run_games) as run_games, \
+                mock.patch("builtins.print"):
+            tournament.play_sprt(cpu_agents, test_agents, 2, seed=7)
+        schedule = tournament.schedule_games(2, 1, 2, seed=7)
+        played = [game for call in run_games.call_args_list
+                  for game in call[0][2]]
+        self.assertEqual(sorted(played), sorted(schedule))
+        for call in run_games.call_args_list:
+            batch = call[0][2]
+            for first, second in zip(batch[::2], batch[1::2]):
+                self.assertEqual(first[:2], second[:2])
+                self.assertEqual(first[3], second[3])
+                self.assertNotEqual(first[2], second[2])
+
+    def test_sprt_reports_games_against_the_fixed_schedule(self):
+        cpu_agents = [tournament.Agent(RandomPlayer(), "Random")]
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        for fixed_matches, report in [(1, "2 more, 100.0%"),
+                                      (5, "6 saved, 60.0%")]:
+            with mock.patch.object(tournament, "sprt_llr", return_value=0.), \
+                    mock.patch("builtins.print") as printed:
+                tournament.play_sprt(cpu_agents, test_agents, 2, seed=7,
+                                     fixed_matches=fixed_matches)
+            self.assertIn(report, printed.call_args_list[-1][0][0])
+
+
+class PonderComparisonTest(unittest.TestCase):
+
+    def test_ponder_agents_play_in_process(self):
+        test_agents = tournament.COMPARISONS["ponder"]()
+        self.addCleanup(lambda: [agent.player.close()
+                                 for agent in test_agents
+                                 if hasattr(agent.player, "close")])
+        with self.assertWarns(UserWarning):
+            self.assertEqual(tournament.tournament_workers(test_agents, 4), 1)
+        self.assertEqual(tournament.tournament_workers(test_agents, 1), 1)
+        heuristics = tournament.COMPARISONS["heuristics"]()
+        self.assertEqual(tournament.tournament_workers(heuristics, 4), 4)
+
+    def test_pondering_agent_reports_hits(self):
+        cpu_agents = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        test_agents = tournament.COMPARISONS["ponder"]()[1:2]
+        self.addCleanup(test_agents[0].player.close)
+        games = tournament.schedule_games(1, 1, 1, seed=3)
+        results = list(tournament.run_games(cpu_agents, test_agents, games))
+        player = test_agents[0].player
+        self.assertEqual(len(results), 2)
+        self.assertGreater(player.ponder_hits + player.ponder_misses, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Transposition table used by the search agents in game_agent.py to reuse the
+results of positions that were already searched, either earlier in the same
+iterative deepening pass, in a previous pass, or on a previous turn.
+
+The table is a fixed number of buckets, sized from a memory budget. Each
+bucket holds two entries: a depth-preferred slot that keeps the deepest
+result seen for the bucket in the current search, and an always-replace slot
+that keeps the most recent result that did not qualify for the first one.
+"""
+
+EXACT = 0  # the stored score is the exact minimax value of the position
+LOWER = 1  # the search failed high; the true value is >= the stored score
+UPPER = 2  # the search failed low; the true value is <= the stored score
+
+# Memory cost of one stored entry as measured with sys.getsizeof() on
+# CPython 3 (64-bit): the 6-tuple (88 bytes), a 64-bit Zobrist key (36), a
+# float score (24) and the list slot that points to the entry (8). Depths,
+# bounds, ages and cell-index moves are cached small ints (on boards of up
+# to 257 cells).
+ENTRY_BYTES = 156
+
+
+class TranspositionTable(object):
+    """Bounded hash table of search results keyed on `Board.hash()`.
+
+    Entries are tuples (key, depth, score, bound, move, age). The `age` is
+    the number of the search that stored the entry; depth-preferred slots
+    filled by an older search may be replaced by shallower results.
+
+    Parameters
+    ----------
+    size_mb : float (optional)
+        The memory budget of the table in megabytes. The budget is turned
+        into a number of buckets using the measured size of one entry, so it
+        is an estimate of the memory held by a full table rather than a hard
+        limit.
+    """
+
+    def __init__(self, size_mb=16.):
+        self.num_buckets = max(1, int(size_mb * 2**20) // (2 * ENTRY_BYTES))
+        self.age = 0
+        self.clear()
+
+    def clear(self):
+        """Remove every entry from the table and reset all the counters. """
+        self._deep = [None] * self.num_buckets
+        self._recent = [None] * self.num_buckets
+        self.hits = self.misses = self.collisions = self.stores = 0
+        self._totals = {"hits": 0, "misses": 0, "collisions": 0, "stores": 0}
+
+    def reset_stats(self):
+        """Fold the counters of the current search into the running totals
+        reported by `stats(cumulative=True)`, then zero them.
+        """
+        self._totals["hits"] += self.hits
+        self._totals["misses"] += self.misses
+        self._totals["collisions"] += self.collisions
+        self._totals["stores"] += self.stores
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def new_search(self):
+        """Start a new search: age the stored entries and start new counters,
+        so that `stats()` reports on this search only.
+        """
+        self.age += 1
+        self.reset_stats()
+
+    def probe(self, key):
+        """Return the entry stored for `key`, or None.
+
+        A miss on a bucket that holds entries for other keys is counted as a
+        collision.
+        """
+        idx = key % self.num_buckets
+        entry = self._deep[idx]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        other = self._recent[idx]
+        if other is not None and other[0] == key:
+            self.hits += 1
+            return other
+        self.misses += 1
+        if entry is not None or other is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """Record the result of searching the position `key` to `depth` plies.
+
+        The result replaces the depth-preferred entry of its bucket if that
+        entry is for the same position, was stored by an older search, or was
+        searched no deeper; otherwise it replaces the always-replace entry.
+        """
+        self.stores += 1
+        idx = key % self.num_buckets
+        new_entry = (key, depth, score, bound, move, self.age)
+        entry = self._deep[idx]
+        if (entry is None or entry[0] == key or entry[5] != self.age or
+                entry[1] <= depth):
+            self._deep[idx] = new_entry
+        else:
+            self._recent[idx] = new_entry
+
+    def stats(self, cumulative=False):
+        """Return a dict with the counters of the current search, i.e. the
+        last call to `AlphaBetaPlayer.get_move()`. Hits in that search include
+        entries stored on earlier turns. With `cumulative=True` the counters
+        cover every search since the table was created or last cleared.
+        """
+        counts = {"hits": self.hits, "misses": self.misses,
+                  "collisions": self.collisions, "stores": self.stores}
+        if cumulative:
+            for counter, total in self._totals.items():
+                counts[counter] += total
+        probes = counts["hits"] + counts["misses"]
+        counts["probes"] = probes
+        counts["hit_rate"] = counts["hits"] / probes if probes else 0.
+        return counts
+
+    def __len__(self):
+        return (sum(entry is not None for entry in self._deep) +
+                sum(entry is not None for entry in self._recent))
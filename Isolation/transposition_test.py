@@ -0,0 +1,58 @@
+"""Unit tests for the transposition table used by the search agents."""
+
+import unittest
+
+from transposition import (TranspositionTable, ENTRY_BYTES, EXACT, LOWER,
+                           UPPER)
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def setUp(self):
+        # a single bucket, so every key competes for the same two slots
+        self.tt = TranspositionTable(size_mb=0)
+        self.tt.new_search()
+
+    def test_budget_sets_bucket_count(self):
+        tt = TranspositionTable(size_mb=1)
+        self.assertEqual(tt.num_buckets, 2**20 // (2 * ENTRY_BYTES))
+        self.assertEqual(self.tt.num_buckets, 1)
+
+    def test_probe_counts_hits_misses_and_collisions(self):
+        self.assertIsNone(self.tt.probe(7))
+        self.tt.store(7, 3, 1.5, EXACT, (1, 2))
+        self.assertEqual(self.tt.probe(7), (7, 3, 1.5, EXACT, (1, 2), 1))
+        self.assertIsNone(self.tt.probe(8))
+        stats = self.tt.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["collisions"]),
+                         (1, 2, 1))
+        self.tt.new_search()
+        self.assertEqual(self.tt.stats()["probes"], 0)
+        self.tt.probe(7)
+        totals = self.tt.stats(cumulative=True)
+        self.assertEqual((totals["hits"], totals["misses"], totals["probes"]),
+                         (2, 2, 4))
+
+    def test_depth_preferred_and_always_replace(self):
+        self.tt.store(1, 5, 0., EXACT, (0, 0))
+        # shallower result for another key goes to the always-replace slot
+        self.tt.store(2, 2, 0., LOWER, (0, 1))
+        self.tt.store(3, 1, 0., UPPER, (0, 2))
+        self.assertEqual(self.tt.probe(1)[1], 5)
+        self.assertIsNone(self.tt.probe(2))
+        self.assertEqual(self.tt.probe(3)[1], 1)
+        # a result at least as deep takes over the depth-preferred slot
+        self.tt.store(4, 5, 0., EXACT, (0, 3))
+        self.assertIsNone(self.tt.probe(1))
+        self.assertEqual(len(self.tt), 2)
+
+    def test_older_searches_are_replaced(self):
+        self.tt.store(1, 9, 0., EXACT, (0, 0))
+        self.tt.new_search()
+        self.tt.store(2, 1, 0., EXACT, (0, 1))
+        self.assertIsNone(self.tt.probe(1))
+        self.assertEqual(self.tt.probe(2)[1], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()